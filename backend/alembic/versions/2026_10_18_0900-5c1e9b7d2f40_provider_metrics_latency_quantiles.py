@@ -0,0 +1,39 @@
+"""Provider metrics latency quantiles
+
+Revision ID: 5c1e9b7d2f40
+Revises: a2073f0f28fb
+Create Date: 2026-10-18 09:00:00.000000+00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5c1e9b7d2f40"
+down_revision = "a2073f0f28fb"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "provider_metrics", sa.Column("p50_latency", sa.Float(), nullable=True)
+    )
+    op.add_column(
+        "provider_metrics", sa.Column("p95_latency", sa.Float(), nullable=True)
+    )
+    op.add_column(
+        "provider_metrics", sa.Column("p99_latency", sa.Float(), nullable=True)
+    )
+    op.add_column(
+        "provider_metrics", sa.Column("latency_histogram", sa.JSON(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("provider_metrics", "latency_histogram")
+    op.drop_column("provider_metrics", "p99_latency")
+    op.drop_column("provider_metrics", "p95_latency")
+    op.drop_column("provider_metrics", "p50_latency")
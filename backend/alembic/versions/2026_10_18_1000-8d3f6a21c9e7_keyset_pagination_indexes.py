@@ -0,0 +1,73 @@
+"""Keyset pagination indexes for generations and models
+
+Revision ID: 8d3f6a21c9e7
+Revises: 5c1e9b7d2f40
+Create Date: 2026-10-18 10:00:00.000000+00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8d3f6a21c9e7"
+down_revision = "5c1e9b7d2f40"
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text("status IN ('QUEUED', 'PROCESSING')")
+FAILED = sa.text("status = 'FAILED'")
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_generations_user_created",
+        "generations",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_generations_user_active",
+        "generations",
+        ["user_id", "created_at", "id"],
+        unique=False,
+        postgresql_where=ACTIVE,
+        sqlite_where=ACTIVE,
+    )
+    op.create_index(
+        "ix_generations_user_failed",
+        "generations",
+        ["user_id", "created_at", "id"],
+        unique=False,
+        postgresql_where=FAILED,
+        sqlite_where=FAILED,
+    )
+    # Leading column of the composite indexes; the single-column ones are redundant
+    op.drop_index(op.f("ix_generations_user_id"), table_name="generations")
+    op.create_index(
+        "ix_influencer_models_user_created",
+        "influencer_models",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+    op.drop_index(op.f("ix_influencer_models_user_id"), table_name="influencer_models")
+
+
+def downgrade() -> None:
+    op.create_index(
+        op.f("ix_influencer_models_user_id"),
+        "influencer_models",
+        ["user_id"],
+        unique=False,
+    )
+    op.drop_index("ix_influencer_models_user_created", table_name="influencer_models")
+    op.create_index(
+        op.f("ix_generations_user_id"),
+        "generations",
+        ["user_id"],
+        unique=False,
+    )
+    op.drop_index("ix_generations_user_failed", table_name="generations")
+    op.drop_index("ix_generations_user_active", table_name="generations")
+    op.drop_index("ix_generations_user_created", table_name="generations")
@@ -0,0 +1,61 @@
+"""In-process caching primitives"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """
+    Size-bounded LRU cache with per-entry TTL
+
+    Bounded both by entry count and by the total ``size`` reported for each
+    entry (e.g. encoded bytes), evicting least recently used entries first.
+    Not thread-safe: intended for use from a single event loop.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_size: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.total_size = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, V, int]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self.delete(key)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V, ttl: float, size: int = 1) -> None:
+        if self.max_size is not None and size > self.max_size:
+            return
+        self.delete(key)
+        self._data[key] = (time.monotonic() + ttl, value, size)
+        self.total_size += size
+        while len(self._data) > self.max_entries or (
+            self.max_size is not None and self.total_size > self.max_size
+        ):
+            _, (_, _, evicted_size) = self._data.popitem(last=False)
+            self.total_size -= evicted_size
+
+    def delete(self, key: Hashable) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.total_size -= entry[2]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.total_size = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key) is not None
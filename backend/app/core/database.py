@@ -1,48 +1,162 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+import itertools
+import time
+from typing import Any, AsyncIterator, Dict
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import ORMExecuteState, Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 from app.core.config import settings
+from app.core.telemetry import DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW, DB_POOL_WAIT
 
-# Handle different database URLs
-DATABASE_URL = settings.DATABASE_URL
-if DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
-
-# SQLite specific configuration
-connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
-
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True,
-    connect_args=connect_args,
-)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Connection pool that reports checkout wait, usage and overflow
+
+    Subclassed per engine by ``_make_engine`` with ``engine_label`` set, so
+    the primary's and each replica's pool report under their own label.
+    """
+
+    engine_label = "primary"
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        record = super()._do_get()
+        DB_POOL_WAIT.labels(self.engine_label).observe(time.perf_counter() - start)
+        self._report()
+        return record
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        super()._do_return_conn(record)
+        self._report()
+
+    def _report(self) -> None:
+        DB_POOL_CHECKED_OUT.labels(self.engine_label).set(self.checkedout())
+        DB_POOL_OVERFLOW.labels(self.engine_label).set(max(0, self.overflow()))
+
+
+def _async_url(url: str) -> str:
+    """Use the asyncpg driver for plain PostgreSQL URLs"""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://")
+    return url
+
+
+def _make_engine(url: str, label: str = "primary") -> AsyncEngine:
+    url = _async_url(url)
+    if url.startswith("sqlite"):
+        # SQLite specific configuration
+        return create_async_engine(
+            url,
+            echo=settings.DB_ECHO,
+            connect_args={"check_same_thread": False},
+        )
+
+    connect_args: Dict[str, Any] = {}
+    if url.startswith("postgresql+asyncpg"):
+        # 0 disables prepared statement caching (needed behind PgBouncer)
+        connect_args["prepared_statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        # A subclass rather than an attribute: pools are rebuilt on dispose()
+        poolclass=type(
+            "InstrumentedQueuePool", (InstrumentedQueuePool,), {"engine_label": label}
+        ),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+# Primary handles writes; replicas (if configured) serve read-only sessions
+engine = _make_engine(settings.DATABASE_URL)
+read_engines = [
+    _make_engine(url, f"replica-{index}")
+    for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+]
 
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
+_read_sessionmakers = itertools.cycle(
+    [
+        async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+        for read_engine in read_engines
+    ]
+    or [AsyncSessionLocal]
+)
+
+
+def ReadSessionLocal() -> AsyncSession:
+    """Session on the next read replica (the primary when there are none)"""
+    return next(_read_sessionmakers)()
+
 
 Base = declarative_base()
 
 
-async def init_db():
+@event.listens_for(Session, "after_flush")
+def _mark_flushed(session: Session, flush_context: Any) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml(orm_execute_state: ORMExecuteState) -> None:
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _clear_writes(session: Session) -> None:
+    session.info.pop("has_writes", None)
+
+
+def has_pending_writes(session: AsyncSession) -> bool:
+    """Whether the session changed anything that is not committed yet"""
+    return bool(
+        session.new
+        or session.dirty
+        or session.deleted
+        or session.sync_session.info.get("has_writes")
+    )
+
+
+async def init_db() -> None:
     """Initialize database"""
     async with engine.begin() as conn:
         # Create all tables
         await conn.run_sync(Base.metadata.create_all)
 
 
-async def get_db():
-    """Dependency for getting database session"""
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """Dependency for a primary session; commits only if the request wrote"""
     async with AsyncSessionLocal() as session:
         try:
             yield session
-            await session.commit()
+            if has_pending_writes(session):
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
-        finally:
-            await session.close()
+
+
+async def get_read_db() -> AsyncIterator[AsyncSession]:
+    """Dependency for read-only queries, served by a replica when configured"""
+    async with ReadSessionLocal() as session:
+        yield session
@@ -1,25 +1,16 @@
-from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.core.database import AsyncSessionLocal
+from app.core.database import get_db, get_read_db  # noqa: F401 (re-exported)
+from app.core.principal_cache import principal_cache, token_key
 from app.core.security import decode_token
 from app.models.user import User
 
 security = HTTPBearer()
 
 
-async def get_db() -> Generator:
-    """Get database session"""
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
-
-
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
@@ -37,9 +28,16 @@ async def get_current_user(
     if payload is None:
         raise credentials_exception
     
-    email: str = payload.get("sub")
+    email = payload.get("sub")
     if email is None:
         raise credentials_exception
+
+    key = token_key(token)
+    user, revoked = await principal_cache.lookup(key)
+    if revoked:
+        raise credentials_exception
+    if user is not None:
+        return user
     
     # Get user from database
     result = await db.execute(select(User).where(User.email == email))
@@ -47,7 +45,8 @@ async def get_current_user(
     
     if user is None:
         raise credentials_exception
-    
+
+    await principal_cache.store(key, user, payload["exp"])
     return user
 
 
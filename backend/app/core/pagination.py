@@ -0,0 +1,53 @@
+"""Keyset (cursor) pagination over (created_at, id), newest first"""
+
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import Select, tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except ValueError as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def paginate(
+    query: Select, created_at: Any, row_id: Any, cursor: Optional[str], limit: int
+) -> Select:
+    """
+    Restrict ``query`` to the page after ``cursor``
+
+    Seeks on ``(created_at, id)`` instead of using OFFSET, so every page costs
+    one index range scan however deep it is. One extra row is fetched to tell
+    whether another page follows; pass the result to ``page_of``.
+    """
+    if cursor:
+        after_created, after_id = decode_cursor(cursor)
+        query = query.where(tuple_(created_at, row_id) < (after_created, after_id))
+    return query.order_by(created_at.desc(), row_id.desc()).limit(limit + 1)
+
+
+def page_of(rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Split fetched rows into the page and the cursor for the next one"""
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return items, next_cursor
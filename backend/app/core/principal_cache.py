@@ -0,0 +1,224 @@
+"""
+Verified-principal cache for get_current_user
+Authenticated users are cached per token in process and in Redis, so most
+requests resolve their user without touching the database.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+import structlog
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.user import PlanType, User
+
+logger = structlog.get_logger()
+
+PRINCIPAL_PREFIX = "auth:principal:"
+USER_TOKENS_PREFIX = "auth:tokens:"
+REVOKED_PREFIX = "auth:revoked:"
+INVALIDATE_CHANNEL = "auth:invalidate"
+
+
+def token_key(token: str) -> str:
+    """Cache key for a bearer token (the raw token is never stored)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _encode(user: User) -> Dict[str, Any]:
+    return {
+        "id": user.id,
+        "email": user.email,
+        "name": user.name,
+        "plan": getattr(user.plan, "value", user.plan),
+        "credits": user.credits,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "updated_at": user.updated_at.isoformat() if user.updated_at else None,
+    }
+
+
+def _decode(principal: Dict[str, Any]) -> User:
+    """Detached User carrying the cached fields (no password hash)"""
+    fields = dict(principal)
+    fields["plan"] = PlanType(fields["plan"])
+    for name in ("created_at", "updated_at"):
+        if fields[name]:
+            fields[name] = datetime.fromisoformat(fields[name])
+    return User(**fields)
+
+
+class PrincipalCache:
+    """
+    Two-tier cache of authenticated users keyed by token hash
+
+    Local entries live for ``settings.PRINCIPAL_CACHE_LOCAL_TTL`` seconds and
+    Redis entries for ``settings.PRINCIPAL_CACHE_TTL``, both capped at the
+    token's expiry. Any committed update to a User drops that user's entries
+    everywhere: Redis keys are deleted and every API process evicts its local
+    copies on an ``auth:invalidate`` message. Logged-out tokens are recorded as
+    revoked until they expire.
+    """
+
+    def __init__(self) -> None:
+        self.local: TTLCache[Dict[str, Any]] = TTLCache(
+            max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES
+        )
+        # user ID -> token keys cached locally, for eviction by user
+        self.user_tokens: Dict[str, Set[str]] = {}
+        self.listener: Optional[asyncio.Task] = None
+        self.background: Set[asyncio.Task] = set()
+
+    async def lookup(self, key: str) -> Tuple[Optional[User], bool]:
+        """Return ``(user, revoked)`` for a token key; user is None on a miss"""
+        principal = self.local.get(key)
+        if principal is not None:
+            return _decode(principal), False
+        if not settings.PRINCIPAL_CACHE_REDIS:
+            return None, False
+
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.get(f"{PRINCIPAL_PREFIX}{key}")
+                pipe.exists(f"{REVOKED_PREFIX}{key}")
+                raw, revoked = await pipe.execute()
+        except Exception as e:
+            logger.warning("Principal cache unavailable", error=str(e))
+            return None, False
+        if revoked:
+            return None, True
+        if raw is None:
+            return None, False
+        principal = json.loads(raw)
+        self._store_local(key, principal, settings.PRINCIPAL_CACHE_LOCAL_TTL)
+        return _decode(principal), False
+
+    async def store(self, key: str, user: User, expires_at: float) -> None:
+        """Cache a user just loaded from the database for a token"""
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            return
+        principal = _encode(user)
+        self._store_local(
+            key, principal, min(settings.PRINCIPAL_CACHE_LOCAL_TTL, remaining)
+        )
+        if not settings.PRINCIPAL_CACHE_REDIS:
+            return
+
+        ttl = max(1, int(min(settings.PRINCIPAL_CACHE_TTL, remaining)))
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.set(f"{PRINCIPAL_PREFIX}{key}", json.dumps(principal), ex=ttl)
+                pipe.sadd(f"{USER_TOKENS_PREFIX}{user.id}", key)
+                pipe.expire(
+                    f"{USER_TOKENS_PREFIX}{user.id}", settings.PRINCIPAL_CACHE_TTL
+                )
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Principal cache write failed", error=str(e))
+
+    def _store_local(self, key: str, principal: Dict[str, Any], ttl: float) -> None:
+        self.local.set(key, principal, ttl)
+        self.user_tokens.setdefault(principal["id"], set()).add(key)
+
+    def evict_local(self, user_id: str) -> None:
+        for key in self.user_tokens.pop(user_id, ()):
+            self.local.delete(key)
+
+    async def invalidate(self, user_ids: Iterable[str]) -> None:
+        """Drop cached principals for these users in every process"""
+        user_ids = list(user_ids)
+        for user_id in user_ids:
+            self.evict_local(user_id)
+        if not settings.PRINCIPAL_CACHE_REDIS:
+            return
+
+        redis = get_redis()
+        try:
+            for user_id in user_ids:
+                index = f"{USER_TOKENS_PREFIX}{user_id}"
+                keys = await redis.smembers(index)
+                async with redis.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        if isinstance(key, bytes):
+                            key = key.decode()
+                        pipe.delete(f"{PRINCIPAL_PREFIX}{key}")
+                    pipe.delete(index)
+                    pipe.publish(INVALIDATE_CHANNEL, user_id)
+                    await pipe.execute()
+        except Exception as e:
+            logger.error("Principal invalidation failed", users=user_ids, error=str(e))
+
+    def invalidate_soon(self, user_ids: Iterable[str]) -> None:
+        """Invalidate from synchronous code (ORM events)"""
+        user_ids = list(user_ids)
+        for user_id in user_ids:
+            self.evict_local(user_id)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self.invalidate(user_ids))
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+
+    async def revoke(self, key: str, user_id: str, expires_at: float) -> None:
+        """Reject a logged-out token until it would have expired anyway"""
+        self.local.delete(key)
+        self.user_tokens.get(user_id, set()).discard(key)
+        remaining = int(expires_at - time.time())
+        if remaining <= 0 or not settings.PRINCIPAL_CACHE_REDIS:
+            return
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.set(f"{REVOKED_PREFIX}{key}", 1, ex=remaining)
+            pipe.delete(f"{PRINCIPAL_PREFIX}{key}")
+            pipe.srem(f"{USER_TOKENS_PREFIX}{user_id}", key)
+            pipe.publish(INVALIDATE_CHANNEL, user_id)
+            await pipe.execute()
+
+    def start(self) -> None:
+        if settings.PRINCIPAL_CACHE_REDIS:
+            self.listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        tasks = list(self.background)
+        if self.listener is not None:
+            self.listener.cancel()
+            tasks.append(self.listener)
+            self.listener = None
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATE_CHANNEL)
+                # Entries cached before (re)subscribing may have missed messages
+                self.local.clear()
+                self.user_tokens.clear()
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is None:
+                        continue
+                    user_id = message["data"]
+                    if isinstance(user_id, bytes):
+                        user_id = user_id.decode()
+                    self.evict_local(user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(
+                    "Principal invalidation stream interrupted", error=str(e)
+                )
+                await asyncio.sleep(1.0)
+            finally:
+                await pubsub.aclose()
+
+
+principal_cache = PrincipalCache()
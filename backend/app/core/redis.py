@@ -0,0 +1,47 @@
+"""Shared Redis client"""
+
+import time
+from typing import Any, Optional
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.telemetry import REDIS_LATENCY
+
+_client: Optional[redis.Redis] = None
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client that records each command's round trip"""
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_LATENCY.labels(str(args[0]).upper()).observe(
+                time.perf_counter() - start
+            )
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client (backed by a connection pool)"""
+    global _client
+    if _client is None:
+        pool = redis.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        )
+        _client = InstrumentedRedis(connection_pool=pool)
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared client and its pool"""
+    global _client
+    if _client is not None:
+        await _client.aclose(close_connection_pool=True)
+        _client = None
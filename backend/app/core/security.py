@@ -1,11 +1,30 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional, Tuple, TypeVar
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from app.core.config import settings
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. Hashes with a different cost are flagged for rehashing.
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt releases the GIL, so a small thread pool keeps it off the event loop
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+# Hashing calls running or queued for the pool
+_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+T = TypeVar("T")
+
+
+class PasswordHashingBusy(Exception):
+    """Too many password hashes queued; the caller should retry later"""
+
 
 # JWT settings
 ALGORITHM = "HS256"
@@ -22,6 +41,39 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_hashing(fn: Callable[..., T], *args: Any) -> T:
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), settings.PASSWORD_HASH_WAIT)
+    except asyncio.TimeoutError:
+        raise PasswordHashingBusy()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_slots.release()
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    hashed: str = await _run_hashing(pwd_context.hash, password)
+    return hashed
+
+
+async def verify_and_update(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the hashing pool
+
+    Returns ``(valid, new_hash)``; ``new_hash`` is set when the stored hash
+    uses outdated settings (e.g. a lower ``BCRYPT_ROUNDS``) and should replace it.
+    """
+    result: Tuple[bool, Optional[str]] = await _run_hashing(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+    return result
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -0,0 +1,242 @@
+"""
+Prometheus metrics
+With ``PROMETHEUS_MULTIPROC_DIR`` set, every API and worker process writes its
+samples to memory-mapped files in that directory and ``/metrics`` aggregates
+them, so scrapes see all uvicorn workers rather than whichever one answered.
+The directory must be emptied before the processes sharing it start
+(``python -m app.core.telemetry``), and exited processes' live gauges are
+dropped so they stop counting towards the sums.
+"""
+
+import glob
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, MutableMapping, Optional
+
+from app.core.config import settings
+
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    # prometheus_client picks its value storage at import time
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+
+from prometheus_client import (  # noqa: E402
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LONG_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time to the response start, by route template",
+    ["method", "route", "status"],
+)
+ROUTER_LATENCY = Histogram(
+    "router_generate_duration_seconds",
+    "ModelRouter.generate latency including failover and queueing",
+    ["task", "provider", "status"],
+    buckets=LONG_BUCKETS,
+)
+ROUTER_RETRIES = Counter(
+    "router_retries_total",
+    "Provider calls retried after a retryable error",
+    ["task", "provider"],
+)
+ROUTER_FAILOVERS = Counter(
+    "router_failovers_total",
+    "Providers given up on during sequential failover",
+    ["task", "provider"],
+)
+SCHEDULER_QUEUED = Gauge(
+    "scheduler_queued",
+    "Generations waiting for an execution slot, by priority",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+SCHEDULER_WAIT = Histogram(
+    "scheduler_wait_seconds",
+    "Time from queueing to admission into an execution slot, by priority",
+    ["priority"],
+    buckets=LONG_BUCKETS,
+)
+SCHEDULER_PREEMPTIONS = Counter(
+    "scheduler_preemptions_total",
+    "Low-priority calls cancelled and re-queued to make room for high priority",
+)
+RATE_LIMIT_WAIT = Histogram(
+    "provider_rate_limit_wait_seconds",
+    "Time queued for provider request, token and concurrency budget",
+    ["provider"],
+    buckets=(0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+RATE_LIMIT_TIMEOUTS = Counter(
+    "provider_rate_limit_timeouts_total",
+    "Calls that gave up waiting for provider capacity",
+    ["provider"],
+)
+ROUTER_HEDGES = Counter(
+    "router_hedges_total",
+    "Hedged backup calls launched after the threshold, and backup calls that won",
+    ["task", "provider", "outcome"],
+)
+ROUTER_HEDGE_SAVED = Histogram(
+    "router_hedge_latency_saved_seconds",
+    "Primary provider's p99 latency minus the winning backup's response time",
+    ["task", "provider"],
+    buckets=LONG_BUCKETS,
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["engine"],
+    buckets=FAST_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond the pool size",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+REDIS_LATENCY = Histogram(
+    "redis_command_duration_seconds",
+    "Redis round trip by command",
+    ["command"],
+    buckets=FAST_BUCKETS,
+)
+QUEUE_DEPTH = Gauge(
+    "dramatiq_queue_messages",
+    "Messages waiting in a Dramatiq queue, sampled at scrape time",
+    ["queue", "state"],
+    multiprocess_mode="mostrecent",
+)
+
+
+class PrometheusMiddleware:
+    """
+    Records request latency per route template
+
+    Measured to the start of the response so streaming endpoints (SSE) report
+    how quickly they answered rather than how long the client stayed connected.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]]):
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: MutableMapping,
+        receive: Callable[[], Awaitable[Any]],
+        send: Callable[[Dict], Awaitable[None]],
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        observed = False
+
+        async def send_wrapper(message: Dict) -> None:
+            nonlocal observed
+            if message["type"] == "http.response.start" and not observed:
+                observed = True
+                self._observe(scope, message["status"], start)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not observed:
+                self._observe(scope, 500, start)
+            raise
+
+    @staticmethod
+    def _observe(scope: MutableMapping, status: int, start: float) -> None:
+        route = scope.get("route")
+        HTTP_LATENCY.labels(
+            scope["method"],
+            getattr(route, "path", "unmatched"),
+            str(status),
+        ).observe(time.perf_counter() - start)
+
+
+async def sample_queue_depth() -> None:
+    """Refresh the Dramatiq queue gauges (ready and delayed messages)"""
+    from app.core.redis import get_redis
+    from app.workers.tasks import redis_broker
+
+    queues = sorted(redis_broker.get_declared_queues())
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for queue in queues:
+            pipe.llen(f"{redis_broker.namespace}:{queue}")
+            pipe.llen(f"{redis_broker.namespace}:{queue}.DQ")
+        sizes = await pipe.execute()
+    for index, queue in enumerate(queues):
+        QUEUE_DEPTH.labels(queue, "ready").set(sizes[2 * index])
+        QUEUE_DEPTH.labels(queue, "delayed").set(sizes[2 * index + 1])
+
+
+def render_metrics() -> bytes:
+    """Exposition text for every process sharing the metrics directory"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def reset_multiproc_dir() -> None:
+    """Delete every process's samples; run before the server's processes start"""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        return
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+
+
+def mark_process_dead(pid: Optional[int] = None) -> None:
+    """Drop the live gauges of an exited process (by default this one)"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def sweep_dead_processes() -> None:
+    """Drop live gauges left behind by processes that exited without cleanup"""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        return
+    pids = set()
+    for path in glob.glob(os.path.join(directory, "gauge_live*.db")):
+        match = re.search(r"_(\d+)\.db$", path)
+        if match:
+            pids.add(int(match.group(1)))
+    for pid in pids:
+        if not _alive(pid):
+            multiprocess.mark_process_dead(pid)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+if __name__ == "__main__":
+    reset_multiproc_dir()
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,7 +7,19 @@ import structlog
 
 from app.core.config import settings
 from app.core.database import init_db
-from app.routers import health, auth, models, generations, agents
+from app.core.principal_cache import principal_cache
+from app.core.redis import close_redis, get_redis
+from app.core.telemetry import (
+    PrometheusMiddleware,
+    mark_process_dead,
+    sweep_dead_processes,
+)
+from app.orchestrator import model_router, register_default_providers
+from app.services.health import health_prober
+from app.services.storage import close_storage
+from app.services.generation_events import status_dispatcher
+from app.services.webhooks import generation_updates
+from app.routers import health, auth, models, generations, agents, webhooks, metrics
 
 # Configure structured logging
 structlog.configure(
@@ -24,10 +37,33 @@ async def lifespan(app: FastAPI):
     """Application startup and shutdown events"""
     # Startup
     logger.info("Starting AI Clone API", env=settings.APP_ENV)
+    sweep_dead_processes()
     await init_db()
+    get_redis()  # Create the shared connection pool
+    health_prober.start()
+    register_default_providers(model_router)
+    policy_refresh = asyncio.create_task(
+        model_router.policy.refresh_periodically(settings.ROUTING_REFRESH_INTERVAL)
+    )
+    metrics_flush = asyncio.create_task(
+        model_router.metrics_flusher.flush_periodically(settings.METRICS_FLUSH_INTERVAL)
+    )
+    generation_updates.start()
+    principal_cache.start()
     yield
     # Shutdown
     logger.info("Shutting down AI Clone API")
+    policy_refresh.cancel()
+    metrics_flush.cancel()
+    await asyncio.gather(metrics_flush, return_exceptions=True)
+    await generation_updates.stop()
+    await principal_cache.stop()
+    await status_dispatcher.close()
+    await model_router.singleflight.close()
+    await health_prober.stop()
+    await close_storage()
+    await close_redis()
+    mark_process_dead()
 
 
 app = FastAPI(
@@ -47,15 +83,18 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(PrometheusMiddleware)
 
 # Include routers
 app.include_router(health.router, prefix="/health", tags=["Health"])
+app.include_router(metrics.router, prefix="/metrics", tags=["Monitoring"])
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(models.router, prefix="/api/v1/models", tags=["AI Models"])
 app.include_router(
     generations.router, prefix="/api/v1/generations", tags=["Generations"]
 )
 app.include_router(agents.router, prefix="/api/v1/agents", tags=["AI Agents"])
+app.include_router(webhooks.router, prefix="/api/v1/webhooks", tags=["Webhooks"])
 
 
 @app.exception_handler(Exception)
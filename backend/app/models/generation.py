@@ -1,4 +1,14 @@
-from sqlalchemy import Column, String, DateTime, Enum as SQLEnum, ForeignKey, Float, JSON
+from sqlalchemy import (
+    Column,
+    String,
+    DateTime,
+    Enum as SQLEnum,
+    ForeignKey,
+    Float,
+    JSON,
+    Index,
+    text,
+)
 from sqlalchemy.sql import func
 import enum
 from app.core.database import Base
@@ -20,9 +30,31 @@ class GenerationStatus(str, enum.Enum):
 
 class Generation(Base):
     __tablename__ = "generations"
+    __table_args__ = (
+        # Keyset pagination of a user's history, newest first
+        Index("ix_generations_user_created", "user_id", "created_at", "id"),
+        # Status filters: in-flight and failed rows are a small share of the
+        # table, so these stay small; "completed" uses the full index above
+        Index(
+            "ix_generations_user_active",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_where=text("status IN ('QUEUED', 'PROCESSING')"),
+            sqlite_where=text("status IN ('QUEUED', 'PROCESSING')"),
+        ),
+        Index(
+            "ix_generations_user_failed",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'FAILED'"),
+            sqlite_where=text("status = 'FAILED'"),
+        ),
+    )
 
     id = Column(String, primary_key=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
     model_id = Column(
         String, ForeignKey("influencer_models.id"), nullable=True, index=True
     )
@@ -32,6 +64,7 @@ class Generation(Base):
     cost = Column(Float, default=0.0)  # Cost in USD
     latency = Column(Float, nullable=True)  # Latency in seconds
     output_url = Column(String, nullable=True)
+    # Large payloads are replaced by a blob reference (app/services/payloads.py)
     input_data = Column(JSON, nullable=True)
     output_metadata = Column(JSON, nullable=True)
     error_message = Column(String, nullable=True)
@@ -1,4 +1,12 @@
-from sqlalchemy import Column, String, DateTime, Enum as SQLEnum, ForeignKey, JSON
+from sqlalchemy import (
+    Column,
+    String,
+    DateTime,
+    Enum as SQLEnum,
+    ForeignKey,
+    JSON,
+    Index,
+)
 from sqlalchemy.sql import func
 import enum
 from app.core.database import Base
@@ -20,9 +28,13 @@ class ModelStatus(str, enum.Enum):
 
 class InfluencerModel(Base):
     __tablename__ = "influencer_models"
+    __table_args__ = (
+        # Keyset pagination of a user's models, newest first
+        Index("ix_influencer_models_user_created", "user_id", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
     name = Column(String, nullable=False)
     type = Column(SQLEnum(ModelType), nullable=False)
     provider = Column(String, nullable=False)  # e.g., "elevenlabs", "replicate"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Integer, DateTime
+from sqlalchemy import Column, String, Float, Integer, DateTime, JSON
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -6,10 +6,15 @@ from app.core.database import Base
 class ProviderMetrics(Base):
     __tablename__ = "provider_metrics"
 
-    id = Column(String, primary_key=True)
+    id = Column(String, primary_key=True)  # "{provider}:{model_type}"
     provider = Column(String, nullable=False, index=True)
     model_type = Column(String, nullable=False)  # voice, image, video, text
     avg_latency = Column(Float, default=0.0)  # Average latency in seconds
+    p50_latency = Column(Float, nullable=True)  # Seconds
+    p95_latency = Column(Float, nullable=True)
+    p99_latency = Column(Float, nullable=True)
+    # Decayed latency sketch and outcome totals, merged on every flush
+    latency_histogram = Column(JSON, nullable=True)
     failure_rate = Column(Float, default=0.0)  # Percentage 0-100
     cost_per_second = Column(Float, nullable=True)  # Cost per second
     total_requests = Column(Integer, default=0)
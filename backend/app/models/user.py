@@ -1,6 +1,8 @@
-from sqlalchemy import Column, String, Integer, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, String, Integer, DateTime, Enum as SQLEnum, event
+from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 from datetime import datetime
+from typing import Any
 import enum
 from app.core.database import Base
 
@@ -22,3 +24,25 @@ class User(Base):
     credits = Column(Integer, default=100, nullable=False)
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+@event.listens_for(User, "after_update")
+def _queue_principal_invalidation(mapper: Any, connection: Any, target: "User") -> None:
+    """Cached principals carry plan, credits and credentials; drop them on change"""
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("updated_users", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_principals(session: Session) -> None:
+    user_ids = session.info.pop("updated_users", None)
+    if user_ids:
+        from app.core.principal_cache import principal_cache
+
+        principal_cache.invalidate_soon(user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_invalidations(session: Session) -> None:
+    session.info.pop("updated_users", None)
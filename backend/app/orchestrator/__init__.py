@@ -1,5 +1,9 @@
 """AI orchestration layer"""
 
-from app.orchestrator.model_router import model_router, ModelRouter
+from app.orchestrator.model_router import (
+    model_router,
+    ModelRouter,
+    register_default_providers,
+)
 
-__all__ = ["model_router", "ModelRouter"]
+__all__ = ["model_router", "ModelRouter", "register_default_providers"]
@@ -0,0 +1,123 @@
+"""
+Generation result cache
+Content-addressed two-tier cache (in-process LRU + Redis) for deterministic requests
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Optional
+import structlog
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+
+def payload_key(
+    task: str, payload: Dict[str, Any], route: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Canonical SHA-256 of a task and its payload (key order independent)
+
+    ``route`` holds routing arguments that change which result a request may
+    receive, such as an explicit provider list.
+    """
+    body: Dict[str, Any] = {"task": task, "payload": payload}
+    if route:
+        body["route"] = route
+    canonical = json.dumps(
+        body,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class GenerationCache:
+    """
+    Caches successful provider results keyed on ``payload_key``
+
+    Only deterministic requests are cached: text at temperature 0 and speech
+    with a fixed voice, plus any task given a positive TTL in
+    ``settings.CACHE_TTLS``. Redis errors degrade to a miss, never a failure.
+    """
+
+    def __init__(self) -> None:
+        self.local: TTLCache[str] = TTLCache(
+            max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+            max_size=settings.CACHE_LOCAL_MAX_BYTES,
+        )
+        self.stats: Dict[str, int] = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "errors": 0,
+        }
+
+    def is_cacheable(self, task: str, payload: Dict[str, Any]) -> bool:
+        if not settings.CACHE_ENABLED or self.ttl_for(task) <= 0:
+            return False
+        if task == "generate_text":
+            return bool(payload.get("temperature", 0.7) == 0)
+        if task == "voice_clone":
+            return bool(payload.get("voice_id"))
+        return True
+
+    def ttl_for(self, task: str) -> int:
+        return settings.CACHE_TTLS.get(task, 0)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        encoded = self.local.get(key)
+        if encoded is not None:
+            self.stats["local_hits"] += 1
+            result: Dict[str, Any] = json.loads(encoded)
+            return result
+
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                pipe.get(self._redis_key(key))
+                pipe.ttl(self._redis_key(key))
+                raw, ttl = await pipe.execute()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning("Generation cache read failed", error=str(e))
+            raw, ttl = None, 0
+
+        if raw is None:
+            self.stats["misses"] += 1
+            return None
+
+        encoded = raw.decode() if isinstance(raw, bytes) else raw
+        if ttl > 0:
+            # Promote to the local tier for the rest of the entry's lifetime
+            self.local.set(key, encoded, ttl, size=len(encoded))
+        self.stats["redis_hits"] += 1
+        result = json.loads(encoded)
+        return result
+
+    async def set(self, key: str, task: str, result: Dict[str, Any]) -> None:
+        ttl = self.ttl_for(task)
+        encoded = json.dumps(result, default=str)
+        self.local.set(key, encoded, ttl, size=len(encoded))
+        self.stats["stores"] += 1
+        try:
+            await get_redis().set(self._redis_key(key), encoded, ex=ttl)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning("Generation cache write failed", error=str(e))
+
+    def _redis_key(self, key: str) -> str:
+        return f"{settings.CACHE_REDIS_PREFIX}{key}"
+
+    def get_stats(self) -> Dict[str, float]:
+        """Hit/miss counters plus the overall hit rate"""
+        stats: Dict[str, float] = dict(self.stats)
+        hits = stats["local_hits"] + stats["redis_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        stats["local_entries"] = len(self.local)
+        return stats
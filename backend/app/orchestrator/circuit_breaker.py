@@ -0,0 +1,150 @@
+"""
+Circuit breakers for provider/task pairs
+Fail fast on providers that are down instead of retrying into an outage
+"""
+
+import enum
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+
+class CircuitState(str, enum.Enum):
+    CLOSED = "closed"  # Calls flow normally
+    OPEN = "open"  # Calls are rejected until the cool-down ends
+    HALF_OPEN = "half_open"  # A limited number of probe calls test recovery
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker for one provider/task pair
+
+    Trips when the failure rate over the last ``window`` calls reaches
+    ``failure_rate`` (after ``min_calls``), or after ``consecutive_failures``
+    failures in a row. Timeouts count as failures. After ``open_seconds`` the
+    breaker lets ``half_open_probes`` calls through; a successful probe closes
+    it and a failed one re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 10,
+        window: int = 20,
+        consecutive_failures: int = 5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.consecutive_failures = consecutive_failures
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = CircuitState.CLOSED
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.failure_streak = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be rejected (does not consume a probe slot)"""
+        if self.state == CircuitState.OPEN:
+            return time.monotonic() - self.opened_at < self.open_seconds
+        if self.state == CircuitState.HALF_OPEN:
+            return self.probes_in_flight >= self.half_open_probes
+        return False
+
+    def allow(self) -> bool:
+        """Reserve permission for one call"""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.open_seconds:
+                return False
+            self._transition(CircuitState.HALF_OPEN)
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                return False
+            self.probes_in_flight += 1
+
+        return True
+
+    def record_success(self) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+            self._transition(CircuitState.CLOSED)
+            return
+        self.outcomes.append(True)
+        self.failure_streak = 0
+
+    def record_failure(self) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+            self._transition(CircuitState.OPEN)
+            return
+        self.outcomes.append(False)
+        self.failure_streak += 1
+        if self.state == CircuitState.CLOSED and self._should_trip():
+            self._transition(CircuitState.OPEN)
+
+    def release(self) -> None:
+        """Release a probe slot for a call that ended without a health verdict"""
+        if self.state == CircuitState.HALF_OPEN:
+            self.probes_in_flight = max(0, self.probes_in_flight - 1)
+
+    def _should_trip(self) -> bool:
+        if self.failure_streak >= self.consecutive_failures:
+            return True
+        if len(self.outcomes) < self.min_calls:
+            return False
+        return self.outcomes.count(False) / len(self.outcomes) >= self.failure_rate
+
+    def _transition(self, state: CircuitState) -> None:
+        previous = self.state
+        self.state = state
+        if state == CircuitState.OPEN:
+            self.opened_at = time.monotonic()
+            self.probes_in_flight = 0
+        elif state == CircuitState.CLOSED:
+            self.outcomes.clear()
+            self.failure_streak = 0
+            self.probes_in_flight = 0
+        logger.warning(
+            "Circuit breaker state changed",
+            circuit=self.name,
+            previous=previous.value,
+            state=state.value,
+        )
+
+
+class CircuitBreakerRegistry:
+    """Lazily creates one breaker per (provider, task) from settings"""
+
+    def __init__(self) -> None:
+        self.breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, provider: str, task: str) -> CircuitBreaker:
+        key = (provider, task)
+        if key not in self.breakers:
+            self.breakers[key] = CircuitBreaker(
+                name=f"{provider}:{task}",
+                failure_rate=settings.CIRCUIT_FAILURE_RATE,
+                min_calls=settings.CIRCUIT_MIN_CALLS,
+                window=settings.CIRCUIT_WINDOW,
+                consecutive_failures=settings.CIRCUIT_CONSECUTIVE_FAILURES,
+                open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+                half_open_probes=settings.CIRCUIT_HALF_OPEN_PROBES,
+            )
+        return self.breakers[key]
+
+    def snapshot(self) -> Dict[str, str]:
+        """Current state of every breaker, keyed by 'provider:task'"""
+        return {breaker.name: breaker.state.value for breaker in self.breakers.values()}
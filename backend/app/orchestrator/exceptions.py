@@ -0,0 +1,78 @@
+"""Orchestrator errors"""
+
+# HTTP statuses that are worth retrying even though they are 4xx
+RETRYABLE_CLIENT_STATUSES = {408, 409, 425, 429}
+
+
+class UnsupportedTaskError(Exception):
+    """Raised when a provider is asked to run a task it does not implement"""
+
+    def __init__(self, provider: str, task: str):
+        self.provider = provider
+        self.task = task
+        super().__init__(f"Provider {provider} does not support {task}")
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker rejects a call"""
+
+    def __init__(self, provider: str, task: str):
+        self.provider = provider
+        self.task = task
+        super().__init__(f"Circuit open for provider {provider} on {task}")
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a call waited too long for provider rate-limit capacity"""
+
+    def __init__(self, provider: str, waited: float):
+        self.provider = provider
+        self.waited = waited
+        super().__init__(
+            f"Timed out after {waited:.1f}s waiting for {provider} capacity"
+        )
+
+
+class StageFailed(Exception):
+    """Raised when a pipeline stage (or one it depends on) did not complete"""
+
+    def __init__(self, stage: str, reason: str):
+        self.stage = stage
+        self.reason = reason
+        super().__init__(f"Stage {stage} failed: {reason}")
+
+
+class StageDeferred(Exception):
+    """Raised when a pipeline stage is waiting on work queued elsewhere"""
+
+    def __init__(self, stage: str, reason: str):
+        self.stage = stage
+        self.reason = reason
+        super().__init__(f"Stage {stage} deferred: {reason}")
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Whether retrying the same call could succeed
+
+    Programming and capability errors, and vendor 4xx responses other than
+    timeouts and rate limits, fail the same way every time. A local rate-limit
+    timeout means the provider is saturated, so the next provider is tried.
+    """
+    if isinstance(
+        exc,
+        (
+            UnsupportedTaskError,
+            CircuitOpenError,
+            RateLimitTimeout,
+            NotImplementedError,
+            ValueError,
+            TypeError,
+            KeyError,
+        ),
+    ):
+        return False
+    status_code = getattr(exc, "status_code", None)
+    if isinstance(status_code, int) and 400 <= status_code < 500:
+        return status_code in RETRYABLE_CLIENT_STATUSES
+    return True
@@ -0,0 +1,308 @@
+"""
+Rolling provider statistics used by the orchestrator for routing decisions
+"""
+
+import asyncio
+import math
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional
+import structlog
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.provider_metrics import ProviderMetrics
+
+logger = structlog.get_logger()
+
+# ProviderMetrics.model_type for each router task
+TASK_MODEL_TYPES = {
+    "voice_clone": "voice",
+    "generate_image": "image",
+    "generate_video": "video",
+    "generate_text": "text",
+}
+
+# Latencies below this (seconds) share the lowest bucket
+MIN_LATENCY = 0.001
+
+
+class LatencySketch:
+    """
+    Log-bucketed latency histogram with bounded relative error
+
+    Bucket ``k`` counts latencies in ``(gamma^(k-1), gamma^k]``, so any
+    quantile is answered within ``settings.METRICS_SKETCH_ACCURACY`` of the
+    true value. Sketches merge by adding bucket counts, which lets the flusher
+    fold each process' deltas into the persisted histogram.
+    """
+
+    def __init__(self, buckets: Optional[Dict[int, float]] = None):
+        accuracy = settings.METRICS_SKETCH_ACCURACY
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, float] = dict(buckets or {})
+
+    def add(self, latency: float) -> None:
+        key = math.ceil(math.log(max(latency, MIN_LATENCY)) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def merge(self, other: "LatencySketch") -> None:
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def decay(self, factor: float) -> None:
+        """Scale every bucket so older observations weigh less"""
+        self.buckets = {
+            key: count * factor
+            for key, count in self.buckets.items()
+            if count * factor >= 0.01
+        }
+
+    @property
+    def count(self) -> float:
+        return sum(self.buckets.values())
+
+    def quantile(self, pct: float) -> Optional[float]:
+        """Latency at percentile ``pct`` (0-100), or None without data"""
+        total = self.count
+        if not total:
+            return None
+        rank = pct / 100 * total
+        seen = 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= rank:
+                return 2 * self.gamma**key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {str(key): count for key, count in self.buckets.items()}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, float]]) -> "LatencySketch":
+        return cls({int(key): count for key, count in (data or {}).items()})
+
+
+class ProviderStats:
+    """
+    Rolling latency window and outcome counters for one provider/task pair
+
+    Only the most recent ``window`` calls are kept so percentiles and failure
+    rates follow the provider's current behaviour rather than its all-time average.
+    Calls since the last flush are also accumulated in a sketch and counters
+    that ``drain`` hands to ``MetricsFlusher``. Everything here is updated from
+    the event loop without awaiting, so no locking is needed.
+    """
+
+    def __init__(self, window: int = 200):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.costs: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self._reset_pending()
+
+    def _reset_pending(self) -> None:
+        self.pending_sketch = LatencySketch()
+        self.pending_successes = 0
+        self.pending_failures = 0
+        self.pending_latency = 0.0
+        self.pending_cost = 0.0
+
+    def record_success(self, latency: float, cost: Optional[float] = None) -> None:
+        """Record a successful call, its latency in seconds and its cost in USD"""
+        self.latencies.append(latency)
+        if cost is not None:
+            self.costs.append(cost)
+            self.pending_cost += cost
+        self.outcomes.append(True)
+        self.successes += 1
+        self.pending_sketch.add(latency)
+        self.pending_successes += 1
+        self.pending_latency += latency
+
+    def record_failure(self) -> None:
+        """Record a failed call"""
+        self.outcomes.append(False)
+        self.failures += 1
+        self.pending_failures += 1
+
+    def drain(self) -> Optional[Dict[str, Any]]:
+        """Take the calls recorded since the last drain, or None if there were none"""
+        if not (self.pending_successes or self.pending_failures):
+            return None
+        delta = {
+            "sketch": self.pending_sketch,
+            "successes": self.pending_successes,
+            "failures": self.pending_failures,
+            "latency": self.pending_latency,
+            "cost": self.pending_cost,
+        }
+        self._reset_pending()
+        return delta
+
+    @property
+    def samples(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def failure_rate(self) -> Optional[float]:
+        """Fraction of failed calls in the window (0-1), or None without data"""
+        if not self.outcomes:
+            return None
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    @property
+    def mean_cost(self) -> Optional[float]:
+        """Mean cost of successful calls in the window, or None without data"""
+        if not self.costs:
+            return None
+        return sum(self.costs) / len(self.costs)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Return the latency at percentile ``pct`` (0-100), or None without data"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class MetricsFlusher:
+    """
+    Periodically folds in-process ProviderStats into ``ProviderMetrics``
+
+    Each flush drains every provider/task pair and merges the deltas into one
+    row per (provider, model_type) in a single transaction, holding row locks
+    so concurrent flushes from other processes can't overwrite each other.
+    Persisted histograms and outcome counts decay by ``settings.METRICS_DECAY``
+    per ``METRICS_FLUSH_INTERVAL`` of wall time since the row was last written,
+    so the rate doesn't depend on how many processes flush.
+    """
+
+    def __init__(self, metrics: Dict[str, Dict[str, ProviderStats]]):
+        self.metrics = metrics
+
+    def _collect(self) -> Dict[str, Dict[str, Any]]:
+        """Drain all stats, merged by ProviderMetrics row ID"""
+        merged: Dict[str, Dict[str, Any]] = {}
+        for provider, by_task in self.metrics.items():
+            for task, stats in by_task.items():
+                delta = stats.drain()
+                if delta is None:
+                    continue
+                model_type = TASK_MODEL_TYPES.get(task, task)
+                row_id = f"{provider}:{model_type}"
+                if row_id not in merged:
+                    merged[row_id] = dict(
+                        delta, provider=provider, model_type=model_type
+                    )
+                    continue
+                into = merged[row_id]
+                into["sketch"].merge(delta["sketch"])
+                for field in ("successes", "failures", "latency", "cost"):
+                    into[field] += delta[field]
+        return merged
+
+    async def flush(self) -> None:
+        deltas = self._collect()
+        if not deltas:
+            return
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(ProviderMetrics)
+                    .where(ProviderMetrics.id.in_(list(deltas)))
+                    .order_by(ProviderMetrics.id)
+                    .with_for_update()
+                )
+                rows = {row.id: row for row in result.scalars()}
+                for row_id, delta in deltas.items():
+                    row = rows.get(row_id)
+                    if row is None:
+                        row = ProviderMetrics(
+                            id=row_id,
+                            provider=delta["provider"],
+                            model_type=delta["model_type"],
+                            total_requests=0,
+                            successful_requests=0,
+                        )
+                        session.add(row)
+                    self._apply(row, delta)
+                await session.commit()
+        except Exception as e:
+            logger.warning("Provider metrics flush failed", error=str(e))
+            self._restore(deltas)
+            return
+        logger.info("Provider metrics flushed", rows=len(deltas))
+
+    @staticmethod
+    def _apply(row: ProviderMetrics, delta: Dict[str, Any]) -> None:
+        now = datetime.utcnow()
+        decay = 1.0
+        if row.last_updated is not None:
+            elapsed = max(0.0, (now - row.last_updated).total_seconds())
+            decay = settings.METRICS_DECAY ** (
+                elapsed / settings.METRICS_FLUSH_INTERVAL
+            )
+        state = dict(row.latency_histogram or {})
+        sketch = LatencySketch.from_dict(state.get("buckets"))
+        sketch.decay(decay)
+        sketch.merge(delta["sketch"])
+
+        successes = state.get("successes", 0.0) * decay + delta["successes"]
+        failures = state.get("failures", 0.0) * decay + delta["failures"]
+        latency = state.get("latency", 0.0) * decay + delta["latency"]
+        cost = state.get("cost", 0.0) * decay + delta["cost"]
+
+        row.latency_histogram = {
+            "buckets": sketch.to_dict(),
+            "successes": successes,
+            "failures": failures,
+            "latency": latency,
+            "cost": cost,
+        }
+        row.p50_latency = sketch.quantile(50)
+        row.p95_latency = sketch.quantile(95)
+        row.p99_latency = sketch.quantile(99)
+        row.avg_latency = latency / successes if successes else None
+        row.cost_per_second = cost / latency if cost and latency else None
+        row.failure_rate = 100 * failures / (successes + failures)
+        row.total_requests = (row.total_requests or 0) + (
+            delta["successes"] + delta["failures"]
+        )
+        row.successful_requests = (row.successful_requests or 0) + delta["successes"]
+        row.last_updated = now
+
+    def _restore(self, deltas: Dict[str, Dict[str, Any]]) -> None:
+        """Put undelivered deltas back so the next flush retries them"""
+        for delta in deltas.values():
+            by_task = self.metrics.get(delta["provider"], {})
+            task = next(
+                (
+                    t
+                    for t in by_task
+                    if TASK_MODEL_TYPES.get(t, t) == delta["model_type"]
+                ),
+                None,
+            )
+            if task is None:
+                continue
+            stats = by_task[task]
+            stats.pending_sketch.merge(delta["sketch"])
+            stats.pending_successes += delta["successes"]
+            stats.pending_failures += delta["failures"]
+            stats.pending_latency += delta["latency"]
+            stats.pending_cost += delta["cost"]
+
+    async def flush_periodically(self, interval: float) -> None:
+        """Flush every ``interval`` seconds; runs until cancelled"""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await self.flush()
+        finally:
+            # Don't lose the tail of the process' metrics on shutdown
+            await self.flush()
@@ -4,12 +4,59 @@ Routes requests to providers with failover and parallel execution
 """
 
 import asyncio
-from typing import List, Optional, Dict, Any
+import functools
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Union,
+)
 import structlog
 from datetime import datetime
 
+from app.core.config import settings
+from app.core.telemetry import (
+    ROUTER_FAILOVERS,
+    ROUTER_HEDGE_SAVED,
+    ROUTER_HEDGES,
+    ROUTER_LATENCY,
+    ROUTER_RETRIES,
+)
+from app.orchestrator import offline_batch
+from app.orchestrator.cache import GenerationCache, payload_key
+from app.orchestrator.circuit_breaker import CircuitBreakerRegistry
+from app.orchestrator.exceptions import (
+    CircuitOpenError,
+    UnsupportedTaskError,
+    is_retryable,
+)
+from app.orchestrator.metrics import MetricsFlusher, ProviderStats
+from app.orchestrator.rate_limiter import ProviderRateLimiter, estimate_tokens
+from app.orchestrator.routing_policy import RoutingPolicy
+from app.orchestrator.scheduler import PriorityScheduler
+from app.orchestrator.singleflight import SingleFlight
+from app.providers import ElevenLabsProvider, OpenAIProvider, ReplicateProvider
+from app.providers.base_provider import STREAMING_TASKS, TASK_METHODS
+
 logger = structlog.get_logger()
 
+# Per-provider semaphores of the generate_many batch the current task belongs to
+_batch_provider_slots: ContextVar[Optional[Dict[str, asyncio.Semaphore]]] = ContextVar(
+    "batch_provider_slots", default=None
+)
+
 
 class ModelRouter:
     """
@@ -17,21 +64,62 @@ class ModelRouter:
     
     Responsibilities:
     - Route inference requests to providers
+    - Adaptive provider ordering from live latency, failure and cost metrics
     - Retry logic with exponential backoff
     - Provider failover
+    - Circuit breakers that skip providers during outages
+    - Per-provider rate limits and concurrency caps
+    - Weighted-fair priority scheduling across users
+    - Bulk generation with bounded concurrency and backpressure
+    - Offline low-priority text through the OpenAI Batch API
     - Parallel execution
+    - Streaming output with failover before the first token
+    - Hedged requests (backup launched only for slow primaries)
+    - Result caching for deterministic requests
+    - Coalescing of identical in-flight requests
     - Cost tracking
     - Latency tracking
     """
 
-    def __init__(self):
+    def __init__(self) -> None:
         self.providers: Dict[str, Any] = {}
-        self.metrics: Dict[str, Dict] = {}
+        # task -> {provider name -> bound adapter method}, built at registration
+        self.capability_index: Dict[str, Dict[str, Callable]] = {}
+        self.metrics: Dict[str, Dict[str, ProviderStats]] = {}
+        self.policy = RoutingPolicy(self.metrics)
+        self.metrics_flusher = MetricsFlusher(self.metrics)
+        self.breakers = CircuitBreakerRegistry()
+        self.cache = GenerationCache()
+        self.singleflight = SingleFlight()
+        self.rate_limiter = ProviderRateLimiter()
+        self.scheduler = PriorityScheduler()
 
-    def register_provider(self, name: str, provider: Any):
-        """Register a provider adapter"""
+    def register_provider(self, name: str, provider: Any) -> None:
+        """Register a provider adapter and index the tasks it supports"""
         self.providers[name] = provider
-        logger.info("Provider registered", provider=name)
+        for handlers in self.capability_index.values():
+            handlers.pop(name, None)
+
+        capabilities = getattr(provider, "capabilities", None)
+        if capabilities is None:
+            # Duck-typed adapter: index whatever task methods it defines
+            capabilities = [
+                task
+                for task, method in TASK_METHODS.items()
+                if callable(getattr(provider, method, None))
+            ]
+        for task in capabilities:
+            self.capability_index.setdefault(task, {})[name] = getattr(
+                provider, TASK_METHODS[task]
+            )
+
+        logger.info(
+            "Provider registered", provider=name, capabilities=sorted(capabilities)
+        )
+
+    def supports(self, provider: str, task: str) -> bool:
+        """Whether a registered provider implements ``task``"""
+        return provider in self.capability_index.get(task, {})
 
     async def generate(
         self,
@@ -40,7 +128,13 @@ class ModelRouter:
         providers: Optional[List[str]] = None,
         priority: str = "normal",
         parallel: bool = False,
+        hedge: bool = False,
         max_retries: int = 3,
+        objective: Optional[str] = None,
+        use_cache: bool = True,
+        coalesce: bool = True,
+        user_id: Optional[str] = None,
+        generation_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Execute AI generation task with intelligent routing
@@ -49,36 +143,97 @@ class ModelRouter:
             task: Task type (e.g., 'voice_clone', 'image_generate')
             payload: Input data for generation
             providers: List of provider names to try (in order if parallel=False)
-            priority: Priority level ('low', 'normal', 'high')
+            priority: Priority level ('low', 'normal', 'high'); 'low' work may be
+                preempted and re-queued when 'high' work needs the capacity
             parallel: If True, execute all providers in parallel and return fastest
+            hedge: If True, start with the first provider and only launch the next
+                one when the current call exceeds the task's latency percentile
             max_retries: Maximum retry attempts per provider
+            objective: 'latency' or 'cost' when ranking default providers
+                (defaults to settings.ROUTING_OBJECTIVE)
+            use_cache: Set False to bypass the result cache for this request
+            coalesce: Set False to never share a provider call with identical
+                concurrent requests
+            user_id: Requesting user, for fair sharing within a priority
+            generation_id: Generation row to complete. 'low' priority text
+                requests with one are queued for the OpenAI Batch API and
+                return status 'queued'; the row is updated when the batch ends
         
         Returns:
             Dict with result, provider used, cost, and latency
         """
         start_time = datetime.now()
+
+        cache_key = None
+        if use_cache and self.cache.is_cacheable(task, payload):
+            # A pinned provider list must not be served another provider's result
+            cache_key = payload_key(
+                task, payload, {"providers": providers} if providers else None
+            )
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                cached["cached"] = True
+                cached["cost"] = 0.0
+                cached["total_latency"] = (datetime.now() - start_time).total_seconds()
+                ROUTER_LATENCY.labels(
+                    task, cached.get("provider") or "none", "cached"
+                ).observe(cached["total_latency"])
+                logger.info("Generation served from cache", task=task)
+                return cached
+
+        if (
+            generation_id
+            and offline_batch.is_eligible(task, priority)
+            and self.supports("openai", task)
+            and (not providers or "openai" in providers)
+        ):
+            await offline_batch.enqueue(generation_id, payload)
+            logger.info("Generation queued for batch", generation_id=generation_id)
+            return {
+                "status": "queued",
+                "provider": "openai",
+                "generation_id": generation_id,
+                "cost": 0.0,
+            }
         
-        if not providers:
-            providers = self._get_default_providers(task)
-        
-        logger.info(
-            "Starting generation",
-            task=task,
-            providers=providers,
-            priority=priority,
-            parallel=parallel,
+        route = functools.partial(
+            self._route,
+            task,
+            payload,
+            providers,
+            priority,
+            parallel,
+            hedge,
+            max_retries,
+            objective,
+            cache_key,
         )
-
-        if parallel:
-            result = await self._execute_parallel(task, payload, providers, max_retries)
+        # Coalesced callers share one scheduler slot with the leading call
+        scheduled = functools.partial(self.scheduler.run, priority, user_id, route)
+        if coalesce and settings.SINGLEFLIGHT_ENABLED:
+            # Identical concurrent requests routed the same way share one call
+            key = payload_key(
+                task,
+                payload,
+                {
+                    "providers": providers,
+                    "parallel": parallel,
+                    "hedge": hedge,
+                    "objective": objective,
+                },
+            )
+            result = dict(await self.singleflight.do(key, scheduled))
         else:
-            result = await self._execute_sequential(task, payload, providers, max_retries)
+            result = await scheduled()
 
         end_time = datetime.now()
         latency = (end_time - start_time).total_seconds()
 
         result["total_latency"] = latency
-        
+        ROUTER_LATENCY.labels(
+            task, result.get("provider") or "none", result.get("status", "unknown")
+        ).observe(latency)
+
         logger.info(
             "Generation completed",
             task=task,
@@ -89,27 +244,393 @@ class ModelRouter:
 
         return result
 
+    async def generate_many(
+        self,
+        requests: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        concurrency: Optional[int] = None,
+        provider_concurrency: Optional[int] = None,
+        item_retries: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run many generations and yield their results as they finish
+
+        Each request is a dict of ``generate`` keyword arguments (``task`` and
+        ``payload`` required). Requests are pulled from ``requests`` only when
+        one of ``concurrency`` slots frees up and while the consumer keeps
+        reading results, so memory is bounded by the concurrency rather than
+        the batch size. Calls to any one provider are further capped at
+        ``provider_concurrency`` within the batch. A failed item is retried on
+        its own up to ``item_retries`` times without holding up the rest.
+
+        Each result carries the request's position in the input as ``index``.
+        """
+        concurrency = concurrency or settings.BATCH_CONCURRENCY
+        provider_concurrency = (
+            provider_concurrency or settings.BATCH_PROVIDER_CONCURRENCY
+        )
+        if item_retries is None:
+            item_retries = settings.BATCH_ITEM_RETRIES
+        provider_slots: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(provider_concurrency)
+        )
+
+        async def run_item(index: int, request: Dict[str, Any]) -> Dict[str, Any]:
+            # Set inside the item's task so the limit applies to its provider calls
+            _batch_provider_slots.set(provider_slots)
+            for attempt in range(item_retries + 1):
+                try:
+                    result = await self.generate(**request)
+                    retryable = result.get("status") == "failed"
+                except Exception as e:
+                    result = {"status": "failed", "error": str(e)}
+                    retryable = is_retryable(e)
+                if not retryable or attempt == item_retries:
+                    break
+                logger.warning(
+                    "Batch item failed, retrying",
+                    index=index,
+                    attempt=attempt + 1,
+                    error=result.get("error"),
+                )
+                await asyncio.sleep(2**attempt)
+            return {**result, "index": index, "attempts": attempt + 1}
+
+        if isinstance(requests, AsyncIterable):
+            source = requests.__aiter__()
+        else:
+            source = _aiter(requests)
+
+        pending: Dict[asyncio.Task, int] = {}
+        index = 0
+        exhausted = False
+        try:
+            while pending or not exhausted:
+                # Backpressure: only pull new requests while a slot is free
+                while not exhausted and len(pending) < concurrency:
+                    try:
+                        request = await source.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    pending[asyncio.create_task(run_item(index, request))] = index
+                    index += 1
+
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for finished in done:
+                    del pending[finished]
+                    yield finished.result()
+        finally:
+            await self._cancel_pending(pending)
+
+        logger.info("Batch generation completed", items=index)
+
+    async def _route(
+        self,
+        task: str,
+        payload: Dict[str, Any],
+        providers: Optional[List[str]],
+        priority: str,
+        parallel: bool,
+        hedge: bool,
+        max_retries: int,
+        objective: Optional[str],
+        cache_key: Optional[str],
+    ) -> Dict[str, Any]:
+        """Pick providers and execute the task (the part shared by coalesced callers)"""
+        providers = self._select_providers(task, providers, objective)
+
+        logger.info(
+            "Starting generation",
+            task=task,
+            providers=providers,
+            priority=priority,
+            parallel=parallel,
+            hedge=hedge,
+        )
+
+        if hedge:
+            result = await self._execute_hedged(task, payload, providers, max_retries)
+        elif parallel:
+            result = await self._execute_parallel(task, payload, providers, max_retries)
+        else:
+            result = await self._execute_sequential(
+                task, payload, providers, max_retries
+            )
+
+        if cache_key is not None and result.get("status") == "success":
+            await self.cache.set(cache_key, task, result)
+
+        return result
+
+    def _select_providers(
+        self,
+        task: str,
+        providers: Optional[List[str]],
+        objective: Optional[str],
+        capability: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Rank default providers (when none are given) and drop the ones that
+        lack ``capability`` (defaults to the task itself) or have an open circuit,
+        before any network call, retry or backoff
+        """
+        if not providers:
+            providers = self.policy.rank(
+                task, self._get_default_providers(task), objective
+            )
+
+        capability = capability or task
+        unsupported = [p for p in providers if not self.supports(p, capability)]
+        if unsupported:
+            logger.warning(
+                "Skipping providers without capability",
+                task=task,
+                capability=capability,
+                skipped=unsupported,
+            )
+        providers = [p for p in providers if p not in unsupported]
+
+        available = [p for p in providers if not self.breakers.get(p, task).is_open]
+        if len(available) < len(providers):
+            logger.warning(
+                "Skipping providers with open circuits",
+                task=task,
+                skipped=[p for p in providers if p not in available],
+            )
+        return available
+
+    async def stream(
+        self,
+        task: str,
+        payload: Dict[str, Any],
+        providers: Optional[List[str]] = None,
+        objective: Optional[str] = None,
+        priority: str = "high",
+        user_id: Optional[str] = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Stream a generation incrementally (e.g. text tokens)
+
+        Fails over to the next provider only while nothing has been yielded;
+        once the first event is out, a provider error is re-raised because the
+        client already holds a partial answer. The final "done" event carries
+        provider, cost and latency metadata.
+        """
+        start = time.perf_counter()
+        capability = STREAMING_TASKS.get(task)
+        if capability is None:
+            raise ValueError(f"Task {task} has no streaming variant")
+
+        providers = self._select_providers(task, providers, objective, capability)
+        logger.info("Starting streaming generation", task=task, providers=providers)
+
+        # Streams hold a scheduler slot for their whole duration
+        async with self.scheduler.slot(priority, user_id):
+            for provider in providers:
+                breaker = self.breakers.get(provider, task)
+                if not breaker.allow():
+                    continue
+
+                stats = self._get_stats(provider, task)
+                timeout = settings.PROVIDER_TIMEOUTS.get(task)
+                events = self.capability_index[capability][provider](payload)
+                started = False
+                settled = False
+                try:
+                    async with self.rate_limiter.slot(
+                        provider, estimate_tokens(task, payload)
+                    ):
+                        while True:
+                            try:
+                                if started:
+                                    event = await events.__anext__()
+                                else:
+                                    # Only the wait for the first token is bounded
+                                    event = await asyncio.wait_for(
+                                        events.__anext__(), timeout
+                                    )
+                            except StopAsyncIteration:
+                                break
+
+                            started = True
+                            if event.get("type") == "done":
+                                total_latency = time.perf_counter() - start
+                                event.update(
+                                    provider=provider,
+                                    status="success",
+                                    total_latency=total_latency,
+                                )
+                                stats.record_success(total_latency, event.get("cost"))
+                                breaker.record_success()
+                                settled = True
+                                logger.info(
+                                    "Streaming generation completed",
+                                    task=task,
+                                    provider=provider,
+                                    latency=total_latency,
+                                    cost=event.get("cost"),
+                                )
+                            yield event
+                    return
+                except Exception as e:
+                    if is_retryable(e):
+                        stats.record_failure()
+                        breaker.record_failure()
+                        settled = True
+                    if started:
+                        raise
+                    logger.warning(
+                        "Stream failed before first token, trying next",
+                        provider=provider,
+                        error=str(e),
+                    )
+                finally:
+                    if not settled:
+                        breaker.release()
+                    await events.aclose()
+
+        yield {"type": "error", "status": "failed", "error": "All providers failed"}
+
     async def _execute_parallel(
         self, task: str, payload: Dict[str, Any], providers: List[str], max_retries: int
     ) -> Dict[str, Any]:
         """Execute task on multiple providers in parallel, return fastest successful result"""
-        tasks = [
-            self._execute_with_retry(task, payload, provider, max_retries)
+        pending = {
+            asyncio.create_task(
+                self._execute_with_retry(task, payload, provider, max_retries)
+            )
             for provider in providers
-        ]
+        }
 
-        # Return first successful result
-        for coro in asyncio.as_completed(tasks):
-            try:
-                result = await coro
-                if result.get("status") == "success":
-                    return result
-            except Exception as e:
-                logger.error("Provider failed in parallel execution", error=str(e))
-                continue
+        try:
+            # Return first successful result
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for finished in done:
+                    try:
+                        result = finished.result()
+                    except Exception as e:
+                        logger.error(
+                            "Provider failed in parallel execution", error=str(e)
+                        )
+                        continue
+                    if result.get("status") == "success":
+                        return result
+        finally:
+            # Losers keep billing and holding sockets unless cancelled
+            await self._cancel_pending(pending)
+
+        return {"status": "failed", "error": "All providers failed"}
+
+    async def _execute_hedged(
+        self, task: str, payload: Dict[str, Any], providers: List[str], max_retries: int
+    ) -> Dict[str, Any]:
+        """
+        Execute task on the primary provider, hedging to the next provider only
+        when the in-flight call is slower than the task's latency percentile.
+        The first successful result wins and slower calls are cancelled.
+        """
+        start = time.perf_counter()
+        remaining = list(providers)
+        pending: Dict["asyncio.Task[Dict[str, Any]]", str] = {}
+        launched: List[str] = []
+
+        def launch() -> Optional[float]:
+            provider = remaining.pop(0)
+            launched.append(provider)
+            pending[
+                asyncio.create_task(
+                    self._execute_with_retry(task, payload, provider, max_retries)
+                )
+            ] = provider
+            return self._hedge_delay(task, provider)
+
+        if not remaining:
+            return {"status": "failed", "error": "All providers failed"}
+
+        delay = launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=delay if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if not done:
+                    # Current calls passed the hedge threshold: start a backup
+                    ROUTER_HEDGES.labels(task, remaining[0], "fired").inc()
+                    logger.info(
+                        "Hedging slow provider",
+                        task=task,
+                        waiting_on=list(pending.values()),
+                        backup=remaining[0],
+                        delay=delay,
+                    )
+                    delay = launch()
+                    continue
+
+                for finished in done:
+                    provider = pending.pop(finished)
+                    try:
+                        result: Optional[Dict[str, Any]] = finished.result()
+                    except Exception as e:
+                        logger.warning(
+                            "Provider failed in hedged execution",
+                            provider=provider,
+                            error=str(e),
+                        )
+                        result = None
+
+                    if result and result.get("status") == "success":
+                        self._record_hedge_win(task, provider, launched, start)
+                        return result
+
+                # Failed calls are replaced right away instead of waiting for the delay
+                if not pending and remaining:
+                    delay = launch()
+        finally:
+            await self._cancel_pending(pending)
 
         return {"status": "failed", "error": "All providers failed"}
 
+    def _hedge_delay(self, task: str, provider: str) -> float:
+        """Seconds to wait on ``provider`` before launching a backup"""
+        stats = self._get_stats(provider, task)
+        if stats.samples < settings.HEDGE_MIN_SAMPLES:
+            return settings.HEDGE_DEFAULT_DELAY
+        pct = settings.HEDGE_PERCENTILES.get(task, settings.HEDGE_DEFAULT_PERCENTILE)
+        delay = stats.percentile(pct)
+        return settings.HEDGE_DEFAULT_DELAY if delay is None else delay
+
+    def _record_hedge_win(
+        self, task: str, provider: str, launched: List[str], start: float
+    ) -> None:
+        """Count backup wins and the latency they saved versus the primary's tail"""
+        if provider == launched[0]:
+            return
+        ROUTER_HEDGES.labels(task, provider, "won").inc()
+        primary_tail = self._get_stats(launched[0], task).percentile(99)
+        if primary_tail is not None:
+            elapsed = time.perf_counter() - start
+            ROUTER_HEDGE_SAVED.labels(task, provider).observe(
+                max(0.0, primary_tail - elapsed)
+            )
+
+    @staticmethod
+    async def _cancel_pending(pending: Collection[asyncio.Task]) -> None:
+        """Cancel in-flight provider calls and wait for them to unwind"""
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
     async def _execute_sequential(
         self, task: str, payload: Dict[str, Any], providers: List[str], max_retries: int
     ) -> Dict[str, Any]:
@@ -125,7 +646,7 @@ class ModelRouter:
                     provider=provider,
                     error=str(e),
                 )
-                continue
+            ROUTER_FAILOVERS.labels(task, provider).inc()
 
         return {"status": "failed", "error": "All providers failed"}
 
@@ -138,6 +659,11 @@ class ModelRouter:
                 result = await self._execute_single(task, payload, provider)
                 return result
             except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if self.breakers.get(provider, task).is_open:
+                    # This failure tripped the breaker: don't back off into it
+                    raise
                 wait_time = 2 ** attempt  # Exponential backoff
                 logger.warning(
                     "Retry after failure",
@@ -147,6 +673,7 @@ class ModelRouter:
                     error=str(e),
                 )
                 if attempt < max_retries - 1:
+                    ROUTER_RETRIES.labels(task, provider).inc()
                     await asyncio.sleep(wait_time)
                 else:
                     raise
@@ -157,27 +684,61 @@ class ModelRouter:
         self, task: str, payload: Dict[str, Any], provider: str
     ) -> Dict[str, Any]:
         """Execute task on a single provider"""
-        if provider not in self.providers:
-            raise ValueError(f"Provider {provider} not registered")
+        handler = self.capability_index.get(task, {}).get(provider)
+        if handler is None:
+            if provider not in self.providers:
+                raise ValueError(f"Provider {provider} not registered")
+            raise UnsupportedTaskError(provider, task)
 
-        provider_instance = self.providers[provider]
-        
-        # Route to appropriate method based on task
-        if task == "voice_clone":
-            result = await provider_instance.clone_voice(payload)
-        elif task == "generate_image":
-            result = await provider_instance.generate_image(payload)
-        elif task == "generate_video":
-            result = await provider_instance.generate_video(payload)
-        elif task == "generate_text":
-            result = await provider_instance.generate_text(payload)
+        breaker = self.breakers.get(provider, task)
+        if not breaker.allow():
+            raise CircuitOpenError(provider, task)
+
+        stats = self._get_stats(provider, task)
+        timeout = settings.PROVIDER_TIMEOUTS.get(task)
+
+        batch_slots = _batch_provider_slots.get()
+        batch_gate: AsyncContextManager[Any]
+        if batch_slots is None:
+            batch_gate = nullcontext()
         else:
-            raise ValueError(f"Unknown task type: {task}")
+            batch_gate = batch_slots[provider]
 
+        try:
+            async with (
+                batch_gate,
+                self.rate_limiter.slot(provider, estimate_tokens(task, payload)),
+            ):
+                # Latency excludes time spent queued for capacity
+                start = time.perf_counter()
+                result: Dict[str, Any] = await asyncio.wait_for(
+                    handler(payload), timeout
+                )
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if is_retryable(e):
+                stats.record_failure()
+                breaker.record_failure()
+            else:
+                # Bad requests say nothing about the provider's health
+                breaker.release()
+            raise
+
+        stats.record_success(time.perf_counter() - start, result.get("cost"))
+        breaker.record_success()
         result["provider"] = provider
         result["status"] = "success"
         return result
 
+    def _get_stats(self, provider: str, task: str) -> ProviderStats:
+        """Get (or create) rolling stats for a provider/task pair"""
+        by_task = self.metrics.setdefault(provider, {})
+        if task not in by_task:
+            by_task[task] = ProviderStats()
+        return by_task[task]
+
     def _get_default_providers(self, task: str) -> List[str]:
         """Get default providers for a task type"""
         defaults = {
@@ -189,5 +750,21 @@ class ModelRouter:
         return defaults.get(task, [])
 
 
+def register_default_providers(router: ModelRouter) -> None:
+    """Register adapters for every vendor that has credentials configured"""
+    if settings.OPENAI_API_KEY:
+        router.register_provider("openai", OpenAIProvider())
+    if settings.ELEVENLABS_API_KEY:
+        router.register_provider("elevenlabs", ElevenLabsProvider())
+    if settings.REPLICATE_API_TOKEN:
+        router.register_provider("replicate", ReplicateProvider())
+
+
+async def _aiter(items: Iterable[Any]) -> AsyncIterator[Any]:
+    """Adapt a plain iterable to the async iterator protocol"""
+    for item in items:
+        yield item
+
+
 # Global router instance
 model_router = ModelRouter()
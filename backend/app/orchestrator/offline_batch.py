@@ -0,0 +1,174 @@
+"""
+Offline text generation
+Low-priority text requests are collected in Redis, submitted to the OpenAI
+Batch API by a worker, and their results written back to Generation rows
+"""
+
+import json
+from typing import Any, Dict, List
+import structlog
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis
+from app.models.generation import Generation, GenerationStatus
+from app.services import generation_events
+from app.services.payloads import payload_store
+
+logger = structlog.get_logger()
+
+PENDING_KEY = "openai_batch:pending"  # List of {"generation_id", "payload"}
+ACTIVE_KEY = "openai_batch:active"  # Hash: batch ID -> JSON list of generation IDs
+FLUSH_KEY = "openai_batch:flush_scheduled"
+POLL_KEY = "openai_batch:poll_scheduled"
+# POLL_KEY outlives a lost or dead-lettered poll by this many intervals at most
+POLL_KEY_INTERVALS = 3
+
+
+def is_eligible(task: str, priority: str) -> bool:
+    """Whether a request can wait for the Batch API instead of running now"""
+    return (
+        settings.OPENAI_BATCH_ENABLED and task == "generate_text" and priority == "low"
+    )
+
+
+async def enqueue(generation_id: str, payload: Dict[str, Any]) -> None:
+    """Queue a text request for the next batch submission"""
+    from app.workers.tasks import submit_openai_batches
+
+    redis = get_redis()
+    length = await redis.rpush(
+        PENDING_KEY, json.dumps({"generation_id": generation_id, "payload": payload})
+    )
+    if length >= settings.OPENAI_BATCH_MAX_REQUESTS:
+        submit_openai_batches.send()
+    elif await redis.set(FLUSH_KEY, 1, nx=True, ex=settings.OPENAI_BATCH_FLUSH_SECONDS):
+        # First request of a new batch: make sure it is sent within the window
+        submit_openai_batches.send_with_options(
+            delay=settings.OPENAI_BATCH_FLUSH_SECONDS * 1000
+        )
+
+
+async def submit_pending(provider: Any) -> List[str]:
+    """Submit everything queued, in batches of OPENAI_BATCH_MAX_REQUESTS"""
+    redis = get_redis()
+    await redis.delete(FLUSH_KEY)
+
+    batch_ids = []
+    while True:
+        raw = await redis.lpop(PENDING_KEY, settings.OPENAI_BATCH_MAX_REQUESTS)
+        if not raw:
+            break
+        requests = {}
+        for item in map(json.loads, raw):
+            requests[item["generation_id"]] = item["payload"]
+
+        try:
+            batch_id = await provider.submit_batch(requests)
+        except Exception:
+            # Put the requests back in their original order for the retry
+            await redis.lpush(PENDING_KEY, *reversed(raw))
+            raise
+
+        await redis.hset(ACTIVE_KEY, batch_id, json.dumps(list(requests)))
+        await _update_generations(
+            {
+                generation_id: {"status": "processing", "batch_id": batch_id}
+                for generation_id in requests
+            }
+        )
+        batch_ids.append(batch_id)
+        logger.info("OpenAI batch submitted", batch_id=batch_id, requests=len(requests))
+
+    if batch_ids:
+        await schedule_poll()
+    return batch_ids
+
+
+def _poll_key_ttl() -> int:
+    return settings.OPENAI_BATCH_POLL_SECONDS * POLL_KEY_INTERVALS
+
+
+async def schedule_poll() -> None:
+    """Start the polling loop unless one is already running"""
+    from app.workers.tasks import poll_openai_batches
+
+    if await get_redis().set(POLL_KEY, 1, nx=True, ex=_poll_key_ttl()):
+        poll_openai_batches.send_with_options(
+            delay=settings.OPENAI_BATCH_POLL_SECONDS * 1000
+        )
+
+
+async def reschedule_poll() -> None:
+    """Continue a running polling loop, keeping its marker alive"""
+    from app.workers.tasks import poll_openai_batches
+
+    await get_redis().set(POLL_KEY, 1, ex=_poll_key_ttl())
+    poll_openai_batches.send_with_options(
+        delay=settings.OPENAI_BATCH_POLL_SECONDS * 1000
+    )
+
+
+async def poll_active(provider: Any) -> int:
+    """Collect finished batches; returns how many are still running"""
+    redis = get_redis()
+    active = await redis.hgetall(ACTIVE_KEY)
+    running = 0
+    for raw_id, raw_ids in active.items():
+        batch_id = raw_id.decode() if isinstance(raw_id, bytes) else raw_id
+        results = await provider.fetch_batch(batch_id)
+        if results is None:
+            running += 1
+            continue
+
+        updates = {}
+        for generation_id in json.loads(raw_ids):
+            result = results.get(generation_id) or {
+                "status": "failed",
+                "error": "Missing from batch output",
+            }
+            updates[generation_id] = {**result, "batch_id": batch_id}
+        await _update_generations(updates)
+        await redis.hdel(ACTIVE_KEY, batch_id)
+        logger.info(
+            "OpenAI batch collected",
+            batch_id=batch_id,
+            succeeded=sum(r["status"] == "success" for r in updates.values()),
+            failed=sum(r["status"] == "failed" for r in updates.values()),
+        )
+    return running
+
+
+async def _update_generations(updates: Dict[str, Dict[str, Any]]) -> None:
+    """Apply batch states/results to their Generation rows in one transaction"""
+    async with AsyncSessionLocal() as session:
+        rows = await session.execute(
+            select(Generation).where(Generation.id.in_(list(updates)))
+        )
+        generations = list(rows.scalars())
+    # Rows are detached here, so blob I/O doesn't hold a connection
+    for generation in generations:
+        update = updates[generation.id]
+        metadata = dict(await payload_store.load(generation.output_metadata) or {})
+        metadata["batch_id"] = update["batch_id"]
+        generation.provider = "openai"
+
+        if update["status"] == "processing":
+            generation.status = GenerationStatus.PROCESSING
+        elif update["status"] == "success":
+            generation.status = GenerationStatus.COMPLETED
+            generation.cost = update["cost"]
+            generation.latency = update["latency"]
+            metadata.update(
+                text=update["text"], model=update["model"], tokens=update["tokens"]
+            )
+        else:
+            generation.status = GenerationStatus.FAILED
+            generation.error_message = update["error"]
+        generation.output_metadata = metadata
+    await payload_store.offload_changes(generations)
+    async with AsyncSessionLocal() as session:
+        session.add_all(generations)
+        await session.commit()
+    await generation_events.publish(generations)
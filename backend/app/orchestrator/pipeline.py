@@ -0,0 +1,181 @@
+"""
+Pipeline executor
+Runs a DAG of stages for many items at once, each stage as soon as its inputs
+are ready, with per-stage concurrency limits and Redis checkpoints
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import structlog
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.orchestrator.exceptions import StageDeferred, StageFailed
+
+logger = structlog.get_logger()
+
+# (item, outputs of the stages it depends on) -> stage output
+StageFn = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class Stage:
+    """One step of a pipeline"""
+
+    name: str
+    run: StageFn
+    depends_on: Tuple[str, ...] = ()
+    concurrency: int = 4
+
+
+class PipelineCheckpoint:
+    """Stage outputs of one pipeline run, kept in a Redis hash"""
+
+    def __init__(self, run_id: str):
+        self.key = f"pipeline:{run_id}"
+
+    async def load(self) -> Dict[str, Any]:
+        try:
+            raw = await get_redis().hgetall(self.key)
+        except Exception as e:
+            logger.warning("Pipeline checkpoint unavailable", error=str(e))
+            return {}
+        return {
+            (field.decode() if isinstance(field, bytes) else field): json.loads(value)
+            for field, value in raw.items()
+        }
+
+    async def save(self, field: str, output: Any) -> None:
+        try:
+            redis = get_redis()
+            await redis.hset(self.key, field, json.dumps(output, default=str))
+            await redis.expire(self.key, settings.PIPELINE_CHECKPOINT_TTL)
+        except Exception as e:
+            # Losing a checkpoint only costs a redo on retry
+            logger.warning("Pipeline checkpoint failed", field=field, error=str(e))
+
+
+class Pipeline:
+    """
+    Dependency-aware executor for per-item stage graphs
+
+    Every (item, stage) pair is its own task that waits only for that item's
+    dependencies, so independent items overlap and a batch takes roughly as
+    long as its slowest chain. Each stage has its own semaphore. Completed
+    outputs are checkpointed under the run ID, so re-running the same run
+    (e.g. a retried actor) skips work that already finished.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = self._topological(stages)
+
+    @staticmethod
+    def _topological(stages: List[Stage]) -> List[Stage]:
+        by_name = {stage.name: stage for stage in stages}
+        ordered: List[Stage] = []
+        visiting = set()
+
+        def visit(stage: Stage) -> None:
+            if stage in ordered:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"Pipeline has a cycle through {stage.name}")
+            visiting.add(stage.name)
+            for dependency in stage.depends_on:
+                if dependency not in by_name:
+                    raise ValueError(
+                        f"Stage {stage.name} depends on unknown stage {dependency}"
+                    )
+                visit(by_name[dependency])
+            visiting.discard(stage.name)
+            ordered.append(stage)
+
+        for stage in stages:
+            visit(stage)
+        return ordered
+
+    async def run(
+        self, run_id: str, items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Run every stage for every item
+
+        Returns one entry per item with its stage ``outputs`` and a ``status``
+        of "completed", "failed" (with ``error``) or "deferred" when a stage
+        raised ``StageDeferred`` and the item must be run again later. A failed
+        stage fails only its dependents; other stages and items keep going.
+        """
+        checkpoint = PipelineCheckpoint(run_id)
+        saved = await checkpoint.load()
+        limits = {
+            stage.name: asyncio.Semaphore(stage.concurrency) for stage in self.stages
+        }
+
+        async def run_stage(
+            index: int, stage: Stage, deps: Dict[str, "asyncio.Task[Any]"]
+        ) -> Any:
+            field = f"{index}:{stage.name}"
+            if field in saved:
+                return saved[field]
+
+            inputs = {}
+            for name, task in deps.items():
+                try:
+                    inputs[name] = await task
+                except StageDeferred as e:
+                    raise StageDeferred(stage.name, f"dependency {name} waiting") from e
+                except Exception as e:
+                    raise StageFailed(stage.name, f"dependency {name} failed") from e
+
+            async with limits[stage.name]:
+                output = await stage.run(items[index], inputs)
+            await checkpoint.save(field, output)
+            return output
+
+        tasks: List[Dict[str, "asyncio.Task[Any]"]] = []
+        for index in range(len(items)):
+            item_tasks: Dict[str, "asyncio.Task[Any]"] = {}
+            for stage in self.stages:
+                deps = {name: item_tasks[name] for name in stage.depends_on}
+                item_tasks[stage.name] = asyncio.create_task(
+                    run_stage(index, stage, deps)
+                )
+            tasks.append(item_tasks)
+
+        try:
+            await asyncio.gather(
+                *(task for item_tasks in tasks for task in item_tasks.values()),
+                return_exceptions=True,
+            )
+        finally:
+            for item_tasks in tasks:
+                for task in item_tasks.values():
+                    task.cancel()
+
+        results = []
+        for index, item_tasks in enumerate(tasks):
+            outputs: Dict[str, Any] = {}
+            error: Optional[str] = None
+            deferred = False
+            for name, task in item_tasks.items():
+                exc = task.exception()
+                if exc is None:
+                    outputs[name] = task.result()
+                elif isinstance(exc, StageDeferred):
+                    deferred = True
+                elif error is None or not isinstance(exc, StageFailed):
+                    # Report the root failure rather than its dependents
+                    error = str(exc)
+            result: Dict[str, Any] = {"index": index, "outputs": outputs}
+            if error is None:
+                result["status"] = "deferred" if deferred else "completed"
+            else:
+                result["status"] = "failed"
+                result["error"] = error
+                logger.warning(
+                    "Pipeline item failed", run_id=run_id, index=index, error=error
+                )
+            results.append(result)
+        return results
@@ -0,0 +1,256 @@
+"""
+Vendor rate limiting
+Per-provider requests/minute, tokens/minute and concurrency caps, shared across
+API and worker processes through Redis
+"""
+
+import asyncio
+import random
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+import structlog
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.core.telemetry import RATE_LIMIT_TIMEOUTS, RATE_LIMIT_WAIT
+from app.orchestrator.exceptions import RateLimitTimeout
+
+logger = structlog.get_logger()
+
+Release = Callable[[], Awaitable[None]]
+
+# Token buckets: KEYS = bucket keys, ARGV = (capacity, refill/s, requested) per key.
+# Consumes from every bucket only if all have enough; otherwise returns the
+# seconds to wait until they would. Uses Redis time so hosts needn't agree.
+_TAKE_TOKENS = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local requested = math.min(tonumber(ARGV[i * 3]), capacity)
+    local state = redis.call("HMGET", key, "tokens", "ts")
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens - requested
+    if tokens < requested then
+        wait = math.max(wait, (requested - tokens) / rate)
+    end
+end
+if wait == 0 then
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[i * 3 - 2])
+        local rate = tonumber(ARGV[i * 3 - 1])
+        redis.call("HSET", key, "tokens", levels[i], "ts", now)
+        redis.call("EXPIRE", key, math.ceil(capacity / rate) + 1)
+    end
+end
+return tostring(wait)
+"""
+
+# Concurrency semaphore as a sorted set of leases scored by expiry time
+_ACQUIRE_SLOT = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call("ZREMRANGEBYSCORE", KEYS[1], "-inf", now)
+if redis.call("ZCARD", KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call("ZADD", KEYS[1], now + tonumber(ARGV[3]), ARGV[1])
+    redis.call("PEXPIRE", KEYS[1], tonumber(ARGV[3]))
+    return 1
+end
+return 0
+"""
+
+
+def estimate_tokens(task: str, payload: Dict[str, Any]) -> int:
+    """Rough token cost of a request for TPM accounting (~4 characters per token)"""
+    if task != "generate_text":
+        return 0
+    messages = payload.get("messages") or []
+    chars = sum(len(str(m.get("content") or "")) for m in messages)
+    chars += len(payload.get("prompt") or "")
+    return chars // 4 + (payload.get("max_tokens") or 1000)
+
+
+class LocalTokenBucket:
+    """In-process token bucket used when Redis is unavailable"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, requested: float) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return max(0.0, (min(requested, self.capacity) - self.tokens) / self.rate)
+
+    def take(self, requested: float) -> None:
+        self.tokens -= min(requested, self.capacity)
+
+
+class ProviderRateLimiter:
+    """
+    Queues callers until a provider has request, token and concurrency budget
+
+    Limits come from ``settings.PROVIDER_RATE_LIMITS`` (keys ``rpm``, ``tpm``,
+    ``concurrency``; missing or 0 means unlimited). Waiting longer than
+    ``settings.RATE_LIMIT_MAX_WAIT`` raises RateLimitTimeout so the router can
+    fail over. Queue waits and timeouts are exported per provider to Prometheus.
+    """
+
+    def __init__(self) -> None:
+        self.local_buckets: Dict[Tuple[str, str], LocalTokenBucket] = {}
+        self.local_slots: Dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def slot(self, provider: str, tokens: int = 0) -> AsyncIterator[None]:
+        """Hold one concurrency slot and ``tokens`` TPM budget for a call"""
+        limits = settings.PROVIDER_RATE_LIMITS.get(provider)
+        if not limits:
+            yield
+            return
+
+        start = time.monotonic()
+        deadline = start + settings.RATE_LIMIT_MAX_WAIT
+        try:
+            release = await self._acquire(provider, limits, tokens, deadline)
+        except RateLimitTimeout:
+            RATE_LIMIT_TIMEOUTS.labels(provider).inc()
+            raise
+        waited = time.monotonic() - start
+        RATE_LIMIT_WAIT.labels(provider).observe(waited)
+        if waited > 0.1:
+            logger.info("Queued for provider capacity", provider=provider, wait=waited)
+
+        try:
+            yield
+        finally:
+            await release()
+
+    async def _acquire(
+        self, provider: str, limits: Dict[str, int], tokens: int, deadline: float
+    ) -> Release:
+        if settings.RATE_LIMIT_DISTRIBUTED:
+            try:
+                return await self._acquire_redis(provider, limits, tokens, deadline)
+            except RateLimitTimeout:
+                raise
+            except Exception as e:
+                logger.warning(
+                    "Shared rate limiter unavailable, limiting locally",
+                    provider=provider,
+                    error=str(e),
+                )
+        return await self._acquire_local(provider, limits, tokens, deadline)
+
+    def _buckets(
+        self, limits: Dict[str, int], tokens: int
+    ) -> List[Tuple[str, float, float, float]]:
+        """(name, capacity, refill per second, requested) for each active limit"""
+        buckets: List[Tuple[str, float, float, float]] = []
+        if limits.get("rpm"):
+            buckets.append(("rpm", limits["rpm"], limits["rpm"] / 60, 1))
+        if limits.get("tpm") and tokens:
+            buckets.append(("tpm", limits["tpm"], limits["tpm"] / 60, tokens))
+        return buckets
+
+    async def _acquire_redis(
+        self, provider: str, limits: Dict[str, int], tokens: int, deadline: float
+    ) -> Release:
+        redis = get_redis()
+        slot_key = f"ratelimit:{provider}:slots"
+        lease = uuid.uuid4().hex
+        lease_ms = int(settings.RATE_LIMIT_LEASE_SECONDS * 1000)
+
+        async def release() -> None:
+            try:
+                await get_redis().zrem(slot_key, lease)
+            except Exception as e:
+                # The lease expires on its own
+                logger.warning("Rate limit slot release failed", error=str(e))
+
+        concurrency = limits.get("concurrency")
+        if concurrency:
+            delay = 0.02
+            while not await redis.eval(
+                _ACQUIRE_SLOT, 1, slot_key, lease, concurrency, lease_ms
+            ):
+                if time.monotonic() + delay > deadline:
+                    raise RateLimitTimeout(provider, settings.RATE_LIMIT_MAX_WAIT)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+                delay = min(delay * 2, 0.2)
+
+        buckets = self._buckets(limits, tokens)
+        try:
+            while buckets:
+                keys = [f"ratelimit:{provider}:{name}" for name, *_ in buckets]
+                args = [value for _, *values in buckets for value in values]
+                wait = float(await redis.eval(_TAKE_TOKENS, len(keys), *keys, *args))
+                if wait == 0:
+                    break
+                if time.monotonic() + wait > deadline:
+                    raise RateLimitTimeout(provider, settings.RATE_LIMIT_MAX_WAIT)
+                await asyncio.sleep(wait)
+        except BaseException:
+            if concurrency:
+                await release()
+            raise
+
+        return release if concurrency else _noop_release
+
+    async def _acquire_local(
+        self, provider: str, limits: Dict[str, int], tokens: int, deadline: float
+    ) -> Release:
+        concurrency = limits.get("concurrency")
+        semaphore = None
+        if concurrency:
+            semaphore = self.local_slots.setdefault(
+                provider, asyncio.Semaphore(concurrency)
+            )
+            try:
+                await asyncio.wait_for(
+                    semaphore.acquire(), max(0.0, deadline - time.monotonic())
+                )
+            except asyncio.TimeoutError:
+                raise RateLimitTimeout(provider, settings.RATE_LIMIT_MAX_WAIT)
+
+        async def release() -> None:
+            if semaphore is not None:
+                semaphore.release()
+
+        try:
+            buckets = [
+                (
+                    self.local_buckets.setdefault(
+                        (provider, name), LocalTokenBucket(capacity, rate)
+                    ),
+                    requested,
+                )
+                for name, capacity, rate, requested in self._buckets(limits, tokens)
+            ]
+            while buckets:
+                wait = max(bucket.wait_time(requested) for bucket, requested in buckets)
+                if wait == 0:
+                    for bucket, requested in buckets:
+                        bucket.take(requested)
+                    break
+                if time.monotonic() + wait > deadline:
+                    raise RateLimitTimeout(provider, settings.RATE_LIMIT_MAX_WAIT)
+                await asyncio.sleep(wait)
+        except BaseException:
+            await release()
+            raise
+
+        return release
+
+
+async def _noop_release() -> None:
+    pass
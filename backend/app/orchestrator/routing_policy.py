@@ -0,0 +1,152 @@
+"""
+Routing Policy - Adaptive provider ordering
+Ranks candidate providers by expected latency or cost using live metrics
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import structlog
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import ReadSessionLocal
+from app.models.provider_metrics import ProviderMetrics
+from app.orchestrator.metrics import TASK_MODEL_TYPES, ProviderStats
+
+logger = structlog.get_logger()
+
+# Failure rates are clamped so a provider that always failed still gets a finite score
+MAX_FAILURE_RATE = 0.99
+
+
+@dataclass
+class ProviderEstimate:
+    """Merged view of a provider's recent behaviour for one task"""
+
+    provider: str
+    latency: Optional[float] = None  # Typical latency in seconds
+    tail_latency: Optional[float] = None  # p95 latency in seconds
+    failure_rate: float = 0.0  # 0-1
+    cost: Optional[float] = None  # Expected cost per call in USD
+
+    @property
+    def success_rate(self) -> float:
+        return 1.0 - min(self.failure_rate, MAX_FAILURE_RATE)
+
+    def score(self, objective: str) -> Optional[float]:
+        """
+        Expected price of trying this provider first, divided by its success rate.
+
+        Sorting failover candidates by ``c_i / p_i`` minimises the expected total
+        latency (or cost) of a sequential attempt chain.
+        """
+        value = self.cost if objective == "cost" else self.latency
+        if value is None:
+            return None
+        return value / self.success_rate
+
+
+class RoutingPolicy:
+    """
+    Orders providers for a task using rolling in-process stats from
+    ``ModelRouter.metrics`` and the persisted ``ProviderMetrics`` table
+
+    Providers meeting the task's latency SLO come first, ordered by the
+    objective. Providers without data keep their static order after them so
+    they still receive traffic, and providers breaching the SLO go last.
+    """
+
+    def __init__(self, metrics: Dict[str, Dict[str, ProviderStats]]):
+        self.metrics = metrics
+        # (provider, model_type) -> latest persisted ProviderMetrics snapshot
+        self.persisted: Dict[Tuple[str, str], ProviderMetrics] = {}
+
+    def rank(
+        self, task: str, candidates: List[str], objective: Optional[str] = None
+    ) -> List[str]:
+        """Return ``candidates`` ordered best-first for ``task``"""
+        objective = objective or settings.ROUTING_OBJECTIVE
+        slo = settings.ROUTING_SLO_SECONDS.get(task)
+
+        compliant: List[Tuple[float, int, str]] = []
+        unknown: List[Tuple[int, str]] = []
+        breaching: List[Tuple[float, int, str]] = []
+
+        for position, provider in enumerate(candidates):
+            estimate = self.estimate(provider, task)
+            score = estimate.score(objective)
+            latency_score = estimate.score("latency")
+            if score is None or latency_score is None:
+                unknown.append((position, provider))
+                continue
+            tail = estimate.tail_latency or estimate.latency
+            if slo is not None and tail is not None and tail > slo:
+                # Rank SLO breaches by expected latency regardless of objective
+                breaching.append((latency_score, position, provider))
+            else:
+                compliant.append((score, position, provider))
+
+        ranked = (
+            [p for _, _, p in sorted(compliant)]
+            + [p for _, p in unknown]
+            + [p for _, _, p in sorted(breaching)]
+        )
+        if ranked != candidates:
+            logger.debug(
+                "Providers reordered by routing policy",
+                task=task,
+                objective=objective,
+                static=candidates,
+                ranked=ranked,
+            )
+        return ranked
+
+    def estimate(self, provider: str, task: str) -> ProviderEstimate:
+        """Merge in-process stats with the persisted snapshot for a provider"""
+        estimate = ProviderEstimate(provider=provider)
+        row = self.persisted.get((provider, TASK_MODEL_TYPES.get(task, task)))
+
+        if row is not None:
+            estimate.latency = row.p50_latency or row.avg_latency or None
+            estimate.tail_latency = row.p95_latency or estimate.latency
+            estimate.failure_rate = (row.failure_rate or 0.0) / 100
+            if row.cost_per_second is not None and estimate.latency is not None:
+                estimate.cost = row.cost_per_second * estimate.latency
+
+        stats = self.metrics.get(provider, {}).get(task)
+        if stats is not None and len(stats.outcomes) >= settings.ROUTING_MIN_SAMPLES:
+            # Live data wins over the persisted snapshot. A provider with no
+            # recent successes is treated as infinitely slow.
+            estimate.latency = stats.percentile(50) or float("inf")
+            estimate.tail_latency = stats.percentile(95) or float("inf")
+            estimate.failure_rate = stats.failure_rate or 0.0
+            if stats.mean_cost is not None:
+                estimate.cost = stats.mean_cost
+            elif row is not None and row.cost_per_second is not None:
+                estimate.cost = row.cost_per_second * estimate.latency
+
+        return estimate
+
+    async def refresh_from_db(self) -> None:
+        """Reload the latest ProviderMetrics snapshot for every provider/type"""
+        async with ReadSessionLocal() as session:
+            result = await session.execute(
+                select(ProviderMetrics).order_by(ProviderMetrics.last_updated)
+            )
+            persisted = {}
+            for row in result.scalars():
+                # Ordered oldest first, so the newest row per key wins
+                persisted[(row.provider, row.model_type)] = row
+
+        self.persisted = persisted
+        logger.info("Routing policy refreshed", rows=len(persisted))
+
+    async def refresh_periodically(self, interval: float) -> None:
+        """Keep the persisted snapshot fresh; runs until cancelled"""
+        while True:
+            try:
+                await self.refresh_from_db()
+            except Exception as e:
+                logger.warning("Routing policy refresh failed", error=str(e))
+            await asyncio.sleep(interval)
@@ -0,0 +1,191 @@
+"""
+Priority scheduler
+Weighted-fair admission of generations into a fixed number of execution slots
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Coroutine, Deque, Dict, Optional, Set
+import structlog
+
+from app.core.config import settings
+from app.core.telemetry import SCHEDULER_PREEMPTIONS, SCHEDULER_QUEUED, SCHEDULER_WAIT
+
+logger = structlog.get_logger()
+
+PRIORITIES = ("high", "normal", "low")
+
+
+class _Waiter:
+    """A caller queued for a slot"""
+
+    def __init__(self, priority: str, user_id: str):
+        self.priority = priority
+        self.user_id = user_id
+        self.enqueued_at = time.monotonic()
+        self.future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+
+
+class _Job:
+    """A running preemptible call"""
+
+    def __init__(self, priority: str, task: "asyncio.Task[Any]"):
+        self.priority = priority
+        self.task = task
+        self.preempted = False
+
+
+class PriorityScheduler:
+    """
+    Admits work into ``capacity`` slots by priority and user
+
+    Priorities are served by smooth weighted round-robin, so "low" still makes
+    progress under load but "high" gets most slots. Within a priority, users
+    are served round-robin so one bulk submitter can't starve others. "low"
+    work never takes the last ``low_reserve`` free slots, and when a "high"
+    request finds no free slot a running preemptible "low" call is cancelled
+    and re-queued. Queue depth, admission waits and preemptions are exported
+    to Prometheus.
+    """
+
+    def __init__(self) -> None:
+        self.capacity = settings.SCHEDULER_CAPACITY
+        self.weights = settings.SCHEDULER_WEIGHTS
+        self.low_reserve = settings.SCHEDULER_LOW_RESERVE
+        self.in_use = 0
+        # priority -> user -> FIFO of waiters
+        self.queues: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {
+            p: OrderedDict() for p in PRIORITIES
+        }
+        self.current_weight: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self.preemptible: Set[_Job] = set()
+
+    async def run(
+        self,
+        priority: str,
+        user_id: Optional[str],
+        fn: Callable[[], Coroutine[Any, Any, Any]],
+    ) -> Any:
+        """
+        Run ``fn`` once a slot is granted
+
+        "low" calls are preemptible: if cancelled to make room for "high"
+        work, ``fn`` is re-queued and run again from the start.
+        """
+        while True:
+            async with self.slot(priority, user_id):
+                job = _Job(priority, asyncio.create_task(fn()))
+                if priority == "low" and settings.SCHEDULER_PREEMPT_LOW:
+                    self.preemptible.add(job)
+                try:
+                    return await asyncio.shield(job.task)
+                except asyncio.CancelledError:
+                    if not job.preempted:
+                        job.task.cancel()
+                        raise
+                finally:
+                    self.preemptible.discard(job)
+            logger.info("Low-priority generation preempted, re-queued", user_id=user_id)
+
+    @asynccontextmanager
+    async def slot(self, priority: str, user_id: Optional[str]) -> AsyncIterator[None]:
+        """Hold one execution slot (never preempted)"""
+        priority = priority if priority in PRIORITIES else "normal"
+        waiter = _Waiter(priority, user_id or "anonymous")
+
+        if self._can_admit(priority) and not self._queued_ahead(priority):
+            self._admit(waiter)
+        else:
+            self.queues[priority].setdefault(waiter.user_id, deque()).append(waiter)
+            self._report_queued(priority)
+            if priority == "high" and self.in_use >= self.capacity:
+                self._preempt_low()
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # Admitted just as we were cancelled: hand the slot on
+                    self._release()
+                else:
+                    self._remove(waiter)
+                raise
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _can_admit(self, priority: str) -> bool:
+        free = self.capacity - self.in_use
+        if priority == "low":
+            return free > self.low_reserve
+        return free > 0
+
+    def _queued_ahead(self, priority: str) -> bool:
+        """Whether waiters of this or a higher priority are queued"""
+        ahead = PRIORITIES[: PRIORITIES.index(priority) + 1]
+        return any(self.queues[p] for p in ahead)
+
+    def _admit(self, waiter: _Waiter) -> None:
+        self.in_use += 1
+        SCHEDULER_WAIT.labels(waiter.priority).observe(
+            time.monotonic() - waiter.enqueued_at
+        )
+        if not waiter.future.done():
+            waiter.future.set_result(None)
+
+    def _release(self) -> None:
+        self.in_use -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to queued waiters by weighted round-robin"""
+        while True:
+            eligible = [p for p in PRIORITIES if self.queues[p] and self._can_admit(p)]
+            if not eligible:
+                return
+            # Smooth weighted round-robin across priorities with queued work
+            total = 0
+            for p in eligible:
+                self.current_weight[p] += self.weights.get(p, 1)
+                total += self.weights.get(p, 1)
+            chosen = max(eligible, key=lambda p: self.current_weight[p])
+            self.current_weight[chosen] -= total
+
+            # Round-robin across users within the chosen priority
+            users = self.queues[chosen]
+            user_id, waiters = users.popitem(last=False)
+            waiter = waiters.popleft()
+            if waiters:
+                users[user_id] = waiters
+            self._report_queued(chosen)
+            self._admit(waiter)
+
+    def _remove(self, waiter: _Waiter) -> None:
+        users = self.queues[waiter.priority]
+        waiters = users.get(waiter.user_id)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(waiter)
+        except ValueError:
+            pass
+        if not waiters:
+            del users[waiter.user_id]
+        self._report_queued(waiter.priority)
+
+    def _report_queued(self, priority: str) -> None:
+        SCHEDULER_QUEUED.labels(priority).set(
+            sum(len(waiters) for waiters in self.queues[priority].values())
+        )
+
+    def _preempt_low(self) -> None:
+        if not self.preemptible:
+            return
+        job = next(iter(self.preemptible))
+        self.preemptible.discard(job)
+        job.preempted = True
+        job.task.cancel()
+        SCHEDULER_PREEMPTIONS.inc()
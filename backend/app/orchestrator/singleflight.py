@@ -0,0 +1,262 @@
+"""
+Single-flight request coalescing
+Identical concurrent generations share one provider call, within a process
+and across API/worker processes via a Redis lock and pub/sub channel
+"""
+
+import asyncio
+import json
+import uuid
+from typing import Any, Callable, Coroutine, Dict, Optional, Set
+import structlog
+from redis.asyncio.client import PubSub
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+Result = Dict[str, Any]
+
+# Delete / extend the lock only while we still own it
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+_EXTEND_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Election rounds before a follower gives up and calls the provider itself
+MAX_ELECTION_ROUNDS = 3
+
+
+class _Flight:
+    """One in-flight call and the number of local callers awaiting it"""
+
+    def __init__(self, task: "asyncio.Task[Result]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution
+
+    Local callers await a shielded task so one caller going away doesn't
+    cancel the call for the rest; the call is cancelled only when its last
+    waiter leaves. With ``distributed`` enabled, the first process to take the
+    Redis lock for a key runs the call and publishes its result; other
+    processes wait for that message instead of calling the provider. Followers
+    in a process share one pub/sub connection and reader task.
+    """
+
+    def __init__(self) -> None:
+        self.flights: Dict[str, _Flight] = {}
+        # done channel -> local followers waiting for its message
+        self.followers: Dict[str, Set["asyncio.Future[Any]"]] = {}
+        self.pubsub: Optional[PubSub] = None
+        self.reader: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+        self.stats: Dict[str, int] = {
+            "leaders": 0,
+            "local_coalesced": 0,
+            "remote_coalesced": 0,
+            "fallbacks": 0,
+        }
+
+    async def do(
+        self, key: str, fn: Callable[[], Coroutine[Any, Any, Result]]
+    ) -> Result:
+        """Run ``fn`` once for all concurrent callers with the same ``key``"""
+        flight = self.flights.get(key)
+        if flight is None:
+            if settings.SINGLEFLIGHT_DISTRIBUTED:
+                call = self._distributed(key, fn)
+            else:
+                call = fn()
+            flight = _Flight(asyncio.create_task(call))
+            self.flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.stats["local_coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to receive the result
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+
+    async def _distributed(
+        self, key: str, fn: Callable[[], Coroutine[Any, Any, Result]]
+    ) -> Result:
+        """Elect one process per key to run ``fn``; others wait for its result"""
+        redis = get_redis()
+        lock_key = f"singleflight:lock:{key}"
+        token = uuid.uuid4().hex
+        ttl_ms = int(settings.SINGLEFLIGHT_LOCK_TTL * 1000)
+
+        for _ in range(MAX_ELECTION_ROUNDS):
+            try:
+                acquired = await redis.set(lock_key, token, nx=True, px=ttl_ms)
+            except Exception as e:
+                logger.warning("Single-flight lock unavailable", error=str(e))
+                break
+
+            if acquired:
+                self.stats["leaders"] += 1
+                return await self._lead(key, lock_key, token, fn)
+
+            result = await self._follow(key, lock_key)
+            if result is not None:
+                self.stats["remote_coalesced"] += 1
+                return result
+            # Leader failed, was cancelled or vanished: run a new election
+
+        self.stats["fallbacks"] += 1
+        return await fn()
+
+    async def _lead(
+        self,
+        key: str,
+        lock_key: str,
+        token: str,
+        fn: Callable[[], Coroutine[Any, Any, Result]],
+    ) -> Result:
+        redis = get_redis()
+        keeper = asyncio.create_task(self._keep_lock(lock_key, token))
+        envelope: Dict[str, Any] = {"ok": False}
+        try:
+            result = await fn()
+            envelope = {"ok": True, "result": result}
+            return result
+        finally:
+            keeper.cancel()
+            encoded = json.dumps(envelope, default=str)
+            try:
+                if envelope["ok"]:
+                    await redis.set(
+                        f"singleflight:result:{key}",
+                        encoded,
+                        px=int(settings.SINGLEFLIGHT_RESULT_TTL * 1000),
+                    )
+                await redis.publish(f"singleflight:done:{key}", encoded)
+                await redis.eval(_RELEASE_LOCK, 1, lock_key, token)
+            except Exception as e:
+                logger.warning("Single-flight publish failed", key=key, error=str(e))
+
+    async def _keep_lock(self, lock_key: str, token: str) -> None:
+        """Extend the lock while a long-running leader call is in flight"""
+        ttl_ms = int(settings.SINGLEFLIGHT_LOCK_TTL * 1000)
+        while True:
+            await asyncio.sleep(settings.SINGLEFLIGHT_LOCK_TTL / 3)
+            try:
+                await get_redis().eval(_EXTEND_LOCK, 1, lock_key, token, ttl_ms)
+            except Exception as e:
+                logger.warning("Single-flight lock refresh failed", error=str(e))
+
+    async def _follow(self, key: str, lock_key: str) -> Optional[Result]:
+        """Wait for the leader's result; None if it failed or disappeared"""
+        redis = get_redis()
+        result_key = f"singleflight:result:{key}"
+        channel = f"singleflight:done:{key}"
+        done: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        try:
+            # Subscribe before checking the stored result so nothing is missed
+            await self._watch(channel, done)
+            raw = await redis.get(result_key)
+            while raw is None:
+                try:
+                    raw = await asyncio.wait_for(asyncio.shield(done), 1.0)
+                except asyncio.TimeoutError:
+                    if not await redis.exists(lock_key):
+                        # Lock expired without a publish we saw
+                        raw = await redis.get(result_key)
+                        if raw is None:
+                            return None
+        except Exception as e:
+            logger.warning("Single-flight follow failed", key=key, error=str(e))
+            return None
+        finally:
+            await self._unwatch(channel, done)
+
+        envelope = json.loads(raw)
+        return envelope["result"] if envelope.get("ok") else None
+
+    async def _watch(self, channel: str, done: "asyncio.Future[Any]") -> None:
+        async with self.lock:
+            if self.pubsub is None:
+                self.pubsub = get_redis().pubsub()
+            followers = self.followers.setdefault(channel, set())
+            if not followers:
+                try:
+                    await self.pubsub.subscribe(channel)
+                except Exception:
+                    del self.followers[channel]
+                    raise
+            followers.add(done)
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.create_task(self._read())
+
+    async def _unwatch(self, channel: str, done: "asyncio.Future[Any]") -> None:
+        async with self.lock:
+            followers = self.followers.get(channel, set())
+            followers.discard(done)
+            if followers:
+                return
+            self.followers.pop(channel, None)
+            if self.pubsub is None:
+                return
+            try:
+                await self.pubsub.unsubscribe(channel)
+            except Exception as e:
+                logger.warning("Single-flight unsubscribe failed", error=str(e))
+
+    async def _read(self) -> None:
+        """Resolve local followers as leaders publish their results"""
+        while self.followers and self.pubsub is not None:
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Followers also watch the lock, so a missed message only delays them
+                logger.warning("Single-flight stream interrupted", error=str(e))
+                await asyncio.sleep(1.0)
+                continue
+            if message is None:
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            for done in self.followers.get(channel, ()):
+                if not done.done():
+                    done.set_result(message["data"])
+
+    async def close(self) -> None:
+        if self.reader is not None:
+            self.reader.cancel()
+            await asyncio.gather(self.reader, return_exceptions=True)
+            self.reader = None
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+            self.pubsub = None
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = dict(self.stats)
+        stats["in_flight"] = len(self.flights)
+        return stats
@@ -3,8 +3,16 @@ Provider Adapters
 Isolation layer between application and AI vendors
 """
 
-from app.providers.base_provider import BaseProvider
+from app.providers.base_provider import BaseProvider, STREAMING_TASKS, TASK_METHODS
 from app.providers.openai_adapter import OpenAIProvider
 from app.providers.elevenlabs_adapter import ElevenLabsProvider
+from app.providers.replicate_adapter import ReplicateProvider
 
-__all__ = ["BaseProvider", "OpenAIProvider", "ElevenLabsProvider"]
+__all__ = [
+    "BaseProvider",
+    "STREAMING_TASKS",
+    "TASK_METHODS",
+    "OpenAIProvider",
+    "ElevenLabsProvider",
+    "ReplicateProvider",
+]
@@ -4,7 +4,23 @@ All provider adapters must implement this interface
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Awaitable, Callable, ClassVar, Dict, FrozenSet
+
+# Router task -> adapter method that implements it
+TASK_METHODS: Dict[str, str] = {
+    "voice_clone": "clone_voice",
+    "generate_image": "generate_image",
+    "generate_video": "generate_video",
+    "generate_text": "generate_text",
+    "stream_text": "stream_text",
+    "stream_voice": "stream_voice",
+}
+
+# Router task -> capability that streams its output incrementally
+STREAMING_TASKS: Dict[str, str] = {
+    "generate_text": "stream_text",
+    "voice_clone": "stream_voice",
+}
 
 
 class BaseProvider(ABC):
@@ -13,8 +29,25 @@ class BaseProvider(ABC):
     
     This ensures consistent interface across all providers
     and prevents vendor lock-in
+
+    Adapters declare the router tasks they actually implement in
+    ``capabilities`` so the router never dispatches to a method that
+    only raises NotImplementedError.
     """
 
+    capabilities: ClassVar[FrozenSet[str]] = frozenset()
+
+    def supports(self, task: str) -> bool:
+        """Whether this adapter implements ``task``"""
+        return task in self.capabilities
+
+    def handler_for(self, task: str) -> Callable[[Dict[str, Any]], Awaitable[Dict]]:
+        """Bound adapter method for ``task``"""
+        handler: Callable[[Dict[str, Any]], Awaitable[Dict]] = getattr(
+            self, TASK_METHODS[task]
+        )
+        return handler
+
     @abstractmethod
     async def generate_text(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -38,6 +71,31 @@ class BaseProvider(ABC):
         """
         pass
 
+    async def stream_text(
+        self, payload: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream generated text token by token
+
+        Optional: adapters that implement it add "stream_text" to
+        ``capabilities``.
+
+        Args:
+            payload: same as generate_text
+
+        Yields:
+            {"type": "token", "text": str} for each delta, then one
+            {
+                "type": "done",
+                "cost": float,
+                "latency": float,
+                "model": str,
+                "tokens": int
+            }
+        """
+        raise NotImplementedError("Text streaming not supported")
+        yield  # Makes this an async generator
+
     @abstractmethod
     async def generate_image(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -83,6 +141,31 @@ class BaseProvider(ABC):
         """
         pass
 
+    async def stream_voice(
+        self, payload: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream synthesized speech while it is being generated
+
+        Optional: adapters that implement it add "stream_voice" to
+        ``capabilities``.
+
+        Args:
+            payload: same as clone_voice, plus optional "storage_key"
+
+        Yields:
+            {"type": "audio", "data": bytes} for each chunk, then one
+            {
+                "type": "done",
+                "audio_url": str,
+                "cost": float,
+                "latency": float,
+                "duration": float
+            }
+        """
+        raise NotImplementedError("Voice streaming not supported")
+        yield  # Makes this an async generator
+
     @abstractmethod
     async def generate_video(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -2,17 +2,21 @@
 ElevenLabs Provider Adapter for Voice Cloning
 """
 
-from typing import Dict, Any
+import uuid
+from typing import AsyncIterator, Dict, Any
 from datetime import datetime
 from elevenlabs import AsyncElevenLabs
 from app.providers.base_provider import BaseProvider
 from app.core.config import settings
+from app.services.storage import BackgroundUpload, get_storage
 
 
 class ElevenLabsProvider(BaseProvider):
     """ElevenLabs voice cloning adapter"""
 
-    def __init__(self):
+    capabilities = frozenset({"voice_clone", "stream_voice"})
+
+    def __init__(self) -> None:
         self.client = AsyncElevenLabs(api_key=settings.ELEVENLABS_API_KEY)
 
     async def generate_text(self, payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -24,14 +28,45 @@ class ElevenLabsProvider(BaseProvider):
         raise NotImplementedError("Image generation not supported by ElevenLabs")
 
     async def clone_voice(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate speech using cloned voice"""
+        """Generate speech using cloned voice and store it"""
+        result: Dict[str, Any] = {}
+        async for event in self.stream_voice(payload):
+            # Audio goes straight to storage; only the final metadata is kept
+            if event["type"] == "done":
+                result = event
+        result.pop("type", None)
+        return result
+
+    async def stream_voice(
+        self, payload: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream speech audio while writing it to storage
+
+        Chunks are yielded as soon as ElevenLabs sends them and written to
+        storage concurrently, so at most a few chunks plus one upload part are
+        held in memory regardless of text length.
+        """
         start_time = datetime.now()
+        output_format = payload.get("output_format", "mp3_44100_128")
+        storage_key = payload.get("storage_key") or f"audio/{uuid.uuid4()}.mp3"
 
-        audio = await self.client.text_to_speech.convert(
-            voice_id=payload.get("voice_id"),
-            text=payload.get("text"),
-            model_id=payload.get("model_id", "eleven_monolingual_v1"),
+        upload = BackgroundUpload(
+            await get_storage().open_upload(storage_key, "audio/mpeg")
         )
+        try:
+            async for chunk in self.client.text_to_speech.stream(
+                voice_id=payload.get("voice_id"),
+                text=payload.get("text"),
+                model_id=payload.get("model_id", "eleven_monolingual_v1"),
+                output_format=output_format,
+            ):
+                await upload.put(chunk)
+                yield {"type": "audio", "data": chunk}
+            stored = await upload.close()
+        except BaseException:
+            await upload.abort()
+            raise
 
         latency = (datetime.now() - start_time).total_seconds()
 
@@ -39,16 +74,16 @@ class ElevenLabsProvider(BaseProvider):
         char_count = len(payload.get("text", ""))
         cost = (char_count / 1000) * 0.30
 
-        # TODO: Upload audio to storage and return URL
-        # For now, return placeholder
-        audio_url = "https://storage.example.com/audio/placeholder.mp3"
-
-        return {
-            "audio_url": audio_url,
+        yield {
+            "type": "done",
+            "audio_url": stored.url,
+            "storage_key": stored.key,
+            "sha256": stored.sha256,
             "cost": cost,
             "latency": latency,
             "duration": payload.get("estimated_duration", 0),
             "characters": char_count,
+            "bytes": stored.size,
         }
 
     async def generate_video(self, payload: Dict[str, Any]) -> Dict[str, Any]:
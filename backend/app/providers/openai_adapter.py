@@ -2,18 +2,30 @@
 OpenAI Provider Adapter
 """
 
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any, Optional
+import json
+import uuid
 import openai
 from datetime import datetime
 from app.providers.base_provider import BaseProvider
 from app.core.config import settings
+from app.services.storage import get_storage
+
+# Batch API jobs still running; any other status is final
+BATCH_PENDING_STATUSES = {"validating", "in_progress", "finalizing", "cancelling"}
+# Batch API requests are billed at half the synchronous price
+BATCH_DISCOUNT = 0.5
 
 
 class OpenAIProvider(BaseProvider):
     """OpenAI API adapter"""
 
-    def __init__(self):
-        self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    capabilities = frozenset({"generate_text", "stream_text", "generate_image"})
+
+    def __init__(self) -> None:
+        self.client = openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL or None
+        )
 
     async def generate_text(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Generate text using GPT models"""
@@ -29,37 +41,183 @@ class OpenAIProvider(BaseProvider):
         latency = (datetime.now() - start_time).total_seconds()
 
         # Calculate cost (approximate)
-        input_cost = (response.usage.prompt_tokens / 1000) * 0.03
-        output_cost = (response.usage.completion_tokens / 1000) * 0.06
-        total_cost = input_cost + output_cost
+        total_cost = 0.0
+        tokens = 0
+        if response.usage is not None:
+            input_cost = (response.usage.prompt_tokens / 1000) * 0.03
+            output_cost = (response.usage.completion_tokens / 1000) * 0.06
+            total_cost = input_cost + output_cost
+            tokens = response.usage.total_tokens
 
         return {
             "text": response.choices[0].message.content,
             "cost": total_cost,
             "latency": latency,
             "model": response.model,
-            "tokens": response.usage.total_tokens,
+            "tokens": tokens,
         }
 
+    async def stream_text(
+        self, payload: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream GPT tokens as they are generated"""
+        start_time = datetime.now()
+
+        stream = await self.client.chat.completions.create(
+            model=payload.get("model", "gpt-4"),
+            messages=payload.get("messages", []),
+            temperature=payload.get("temperature", 0.7),
+            max_tokens=payload.get("max_tokens", 1000),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        model = payload.get("model", "gpt-4")
+        usage = None
+        try:
+            async for chunk in stream:
+                model = chunk.model or model
+                if chunk.usage is not None:
+                    # Final chunk carries usage and no choices
+                    usage = chunk.usage
+                for choice in chunk.choices:
+                    if choice.delta.content:
+                        yield {"type": "token", "text": choice.delta.content}
+        finally:
+            await stream.close()
+
+        latency = (datetime.now() - start_time).total_seconds()
+
+        # Calculate cost (approximate)
+        total_cost = 0.0
+        tokens = 0
+        if usage is not None:
+            input_cost = (usage.prompt_tokens / 1000) * 0.03
+            output_cost = (usage.completion_tokens / 1000) * 0.06
+            total_cost = input_cost + output_cost
+            tokens = usage.total_tokens
+
+        yield {
+            "type": "done",
+            "cost": total_cost,
+            "latency": latency,
+            "model": model,
+            "tokens": tokens,
+        }
+
+    async def submit_batch(self, requests: Dict[str, Dict[str, Any]]) -> str:
+        """
+        Submit chat completions as one Batch API job
+
+        ``requests`` maps a custom ID to a text payload; results are keyed by
+        the same IDs. Returns the batch ID.
+        """
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": payload.get("model", "gpt-4"),
+                        "messages": payload.get("messages", []),
+                        "temperature": payload.get("temperature", 0.7),
+                        "max_tokens": payload.get("max_tokens", 1000),
+                    },
+                }
+            )
+            for custom_id, payload in requests.items()
+        ]
+        batch_file = await self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode()), purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    async def fetch_batch(self, batch_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Results of a finished batch keyed by custom ID, or None while it runs
+
+        Requests missing from the output (e.g. the batch expired) are absent
+        from the returned dict.
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status in BATCH_PENDING_STATUSES:
+            return None
+
+        latency = None
+        if batch.completed_at:
+            latency = float(batch.completed_at - batch.created_at)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get("response") or {}
+                body = response.get("body") or {}
+                if response.get("status_code") != 200:
+                    error = item.get("error") or body.get("error") or {}
+                    results[item["custom_id"]] = {
+                        "status": "failed",
+                        "error": error.get("message", "Batch request failed"),
+                    }
+                    continue
+
+                usage = body.get("usage", {})
+                # Calculate cost (approximate)
+                input_cost = (usage.get("prompt_tokens", 0) / 1000) * 0.03
+                output_cost = (usage.get("completion_tokens", 0) / 1000) * 0.06
+                results[item["custom_id"]] = {
+                    "status": "success",
+                    "text": body["choices"][0]["message"]["content"],
+                    "cost": (input_cost + output_cost) * BATCH_DISCOUNT,
+                    "latency": latency,
+                    "model": body.get("model"),
+                    "tokens": usage.get("total_tokens", 0),
+                }
+        return results
+
     async def generate_image(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Generate image using DALL-E"""
         start_time = datetime.now()
 
         response = await self.client.images.generate(
             model=payload.get("model", "dall-e-3"),
-            prompt=payload.get("prompt"),
+            prompt=payload.get("prompt", ""),
             size=payload.get("size", "1024x1024"),
             quality=payload.get("quality", "standard"),
             n=1,
         )
 
+        image_url = response.data[0].url if response.data else None
+        if image_url is None:
+            raise RuntimeError("DALL-E returned no image URL")
+
+        # DALL-E links expire after an hour: stream the image into our storage
+        stored = await get_storage().copy_from_url(
+            payload.get("storage_key") or f"images/{uuid.uuid4()}.png",
+            image_url,
+            "image/png",
+        )
+
         latency = (datetime.now() - start_time).total_seconds()
 
         # DALL-E 3 pricing
         cost = 0.040 if payload.get("quality") == "standard" else 0.080
 
         return {
-            "url": response.data[0].url,
+            "url": stored.url,
+            "storage_key": stored.key,
+            "sha256": stored.sha256,
             "cost": cost,
             "latency": latency,
         }
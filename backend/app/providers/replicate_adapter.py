@@ -0,0 +1,115 @@
+"""
+Replicate Provider Adapter
+"""
+
+from typing import Dict, Any, Optional
+import asyncio
+import uuid
+import replicate
+from datetime import datetime
+from app.providers.base_provider import BaseProvider
+from app.core.config import settings
+from app.services.storage import get_storage
+
+# Approximate GPU price per second of prediction time
+COST_PER_SECOND = 0.0014
+# Prediction statuses after which no more webhooks are sent
+FINAL_STATUSES = {"succeeded", "failed", "canceled"}
+
+
+class ReplicateProvider(BaseProvider):
+    """Replicate API adapter (hosted video models)"""
+
+    capabilities = frozenset({"generate_video"})
+
+    def __init__(self) -> None:
+        self.client = replicate.Client(api_token=settings.REPLICATE_API_TOKEN)
+
+    async def generate_text(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Not supported by this adapter"""
+        raise NotImplementedError("Text generation not supported by Replicate adapter")
+
+    async def generate_image(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Not supported by this adapter"""
+        raise NotImplementedError("Image generation not supported by Replicate adapter")
+
+    async def clone_voice(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Not supported by this adapter"""
+        raise NotImplementedError("Voice cloning not supported by Replicate adapter")
+
+    async def generate_video(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate a video clip and copy it into our storage"""
+        start_time = datetime.now()
+
+        prediction = await self.client.predictions.async_create(
+            model=payload.get("model", settings.REPLICATE_VIDEO_MODEL),
+            input={"prompt": payload.get("prompt"), **payload.get("input", {})},
+        )
+        try:
+            await prediction.async_wait()
+        except asyncio.CancelledError:
+            # Timed-out or hedged-away calls must stop billing GPU time
+            await prediction.async_cancel()
+            raise
+
+        if prediction.status != "succeeded":
+            raise RuntimeError(
+                f"Replicate prediction {prediction.id} {prediction.status}: "
+                f"{prediction.error}"
+            )
+
+        result = await self.store_output(
+            self._snapshot(prediction), payload.get("storage_key")
+        )
+        result["latency"] = (datetime.now() - start_time).total_seconds()
+        return result
+
+    async def submit_video(self, payload: Dict[str, Any], webhook_url: str) -> str:
+        """
+        Start a video prediction without waiting for it
+
+        Replicate calls ``webhook_url`` once the prediction finishes. Returns
+        the prediction ID.
+        """
+        prediction = await self.client.predictions.async_create(
+            model=payload.get("model", settings.REPLICATE_VIDEO_MODEL),
+            input={"prompt": payload.get("prompt"), **payload.get("input", {})},
+            webhook=webhook_url,
+            webhook_events_filter=["completed"],
+        )
+        prediction_id: str = prediction.id
+        return prediction_id
+
+    async def get_prediction(self, prediction_id: str) -> Dict[str, Any]:
+        """Current state of a prediction, shaped like a webhook body"""
+        prediction = await self.client.predictions.async_get(prediction_id)
+        return self._snapshot(prediction)
+
+    async def store_output(
+        self, prediction: Dict[str, Any], storage_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Copy a succeeded prediction's video into our storage"""
+        output = prediction["output"]
+        if isinstance(output, list):
+            output = output[0]
+        stored = await get_storage().copy_from_url(
+            storage_key or f"videos/{uuid.uuid4()}.mp4", str(output), "video/mp4"
+        )
+        predict_time = (prediction.get("metrics") or {}).get("predict_time", 0.0)
+        return {
+            "video_url": stored.url,
+            "storage_key": stored.key,
+            "sha256": stored.sha256,
+            "prediction_id": prediction["id"],
+            "cost": predict_time * COST_PER_SECOND,
+        }
+
+    @staticmethod
+    def _snapshot(prediction: Any) -> Dict[str, Any]:
+        return {
+            "id": prediction.id,
+            "status": prediction.status,
+            "output": prediction.output,
+            "error": prediction.error,
+            "metrics": prediction.metrics,
+        }
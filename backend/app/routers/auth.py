@@ -1,18 +1,37 @@
+from typing import Any, Dict
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import uuid
 
-from app.core.deps import get_db, get_current_active_user
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.deps import get_db, get_current_active_user, security
+from app.core.principal_cache import principal_cache, token_key
+from app.core.security import (
+    PasswordHashingBusy,
+    create_access_token,
+    decode_token,
+    hash_password,
+    verify_and_update,
+)
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
 
 router = APIRouter()
 
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=Token)
-async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+async def register(
+    user_data: UserCreate, db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
     """Register new user"""
     # Check if user already exists
     result = await db.execute(select(User).where(User.email == user_data.email))
@@ -24,12 +43,17 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
             detail="Email already registered"
         )
     
+    try:
+        hashed_password = await hash_password(user_data.password)
+    except PasswordHashingBusy:
+        raise _hashing_busy()
+
     # Create new user
     new_user = User(
         id=str(uuid.uuid4()),
         email=user_data.email,
         name=user_data.name or user_data.email.split('@')[0],
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=hashed_password,
         plan="free",
         credits=100
     )
@@ -49,18 +73,34 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
+async def login(
+    credentials: UserLogin, db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
     """User login"""
     # Get user by email
     result = await db.execute(select(User).where(User.email == credentials.email))
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    valid, new_hash = False, None
+    if user is not None:
+        try:
+            valid, new_hash = await verify_and_update(
+                credentials.password, user.hashed_password
+            )
+        except PasswordHashingBusy:
+            raise _hashing_busy()
+
+    if user is None or not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    if new_hash:
+        # Stored hash predates the current cost setting
+        user.hashed_password = new_hash
+        await db.commit()
     
     # Create access token
     access_token = create_access_token(data={"sub": user.email})
@@ -75,12 +115,25 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
     current_user: User = Depends(get_current_active_user)
-):
+) -> User:
     """Get current user information"""
     return current_user
 
 
 @router.post("/logout")
-async def logout():
-    """User logout (client-side token removal)"""
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: User = Depends(get_current_active_user),
+) -> Dict[str, str]:
+    """User logout: the token stops working on every API instance"""
+    payload = decode_token(credentials.credentials)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await principal_cache.revoke(
+        token_key(credentials.credentials), current_user.id, payload["exp"]
+    )
     return {"message": "Logged out successfully"}
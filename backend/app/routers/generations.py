@@ -1,6 +1,64 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, ReadSessionLocal
+from app.core.deps import get_current_active_user, get_read_db
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursor,
+    page_of,
+    paginate,
+)
+from app.models.generation import Generation, GenerationStatus
+from app.models.user import PlanType, User
+from app.orchestrator import model_router
+from app.schemas.generation import (
+    GenerationSummary,
+    TextGenerationRequest,
+    VoiceGenerationRequest,
+)
+from app.schemas.pagination import Page
+from app.services.generation_events import (
+    FINAL_STATUSES,
+    snapshot,
+    status_dispatcher,
+    status_event,
+)
+from app.services.payloads import payload_store
+from app.services.storage import get_storage
 
 router = APIRouter()
+logger = structlog.get_logger()
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _load_generation(generation_id: str) -> Optional[Generation]:
+    """Read a generation from a replica, falling back to the primary on a miss"""
+    async with ReadSessionLocal() as db:
+        generation = await db.get(Generation, generation_id)
+    if generation is None:
+        # Just created rows may not have replicated yet
+        async with AsyncSessionLocal() as db:
+            generation = await db.get(Generation, generation_id)
+    return generation
+
+
+def _priority_for(user: User) -> str:
+    """Interactive requests from paying plans jump ahead of free-tier work"""
+    return "normal" if user.plan == PlanType.FREE else "high"
 
 
 @router.post("/voice")
@@ -9,6 +67,55 @@ async def generate_voice():
     return {"message": "Voice generation - To be implemented"}
 
 
+@router.post("/voice/stream")
+async def stream_voice(
+    request: VoiceGenerationRequest,
+    current_user: User = Depends(get_current_active_user),
+) -> StreamingResponse:
+    """
+    Stream synthesized speech as it is generated
+
+    The audio is stored at the same time; its URL is returned up front in the
+    X-Audio-Url header.
+    """
+    storage_key = f"audio/{current_user.id}/{uuid.uuid4()}.mp3"
+    payload = {**request.to_payload(), "storage_key": storage_key}
+    events = model_router.stream(
+        "voice_clone",
+        payload,
+        providers=request.providers,
+        priority=_priority_for(current_user),
+        user_id=str(current_user.id),
+    )
+
+    # Wait for the first chunk so provider failures still map to an HTTP error
+    first = await events.__anext__()
+    if first["type"] == "error":
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY, detail="Voice generation failed"
+        )
+
+    async def audio() -> AsyncIterator[bytes]:
+        try:
+            event = first
+            while True:
+                if event["type"] == "audio":
+                    yield event["data"]
+                event = await events.__anext__()
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            logger.error("Voice stream failed", user_id=current_user.id, error=str(e))
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        audio(),
+        media_type="audio/mpeg",
+        headers={"X-Audio-Url": get_storage().url_for(storage_key)},
+    )
+
+
 @router.post("/image")
 async def generate_image():
     """Generate image"""
@@ -21,7 +128,143 @@ async def generate_video():
     return {"message": "Video generation - To be implemented"}
 
 
+@router.post("/text/stream")
+async def stream_text(
+    request: TextGenerationRequest,
+    current_user: User = Depends(get_current_active_user),
+) -> StreamingResponse:
+    """Stream generated text as server-sent events (token..., then done)"""
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for event in model_router.stream(
+                "generate_text",
+                request.to_payload(),
+                providers=request.providers,
+                priority=_priority_for(current_user),
+                user_id=str(current_user.id),
+            ):
+                yield _sse(event["type"], event)
+        except Exception as e:
+            logger.error("Text stream failed", user_id=current_user.id, error=str(e))
+            yield _sse("error", {"type": "error", "error": "Generation failed"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{generation_id}/events")
+async def generation_events(
+    generation_id: str,
+    current_user: User = Depends(get_current_active_user),
+) -> StreamingResponse:
+    """
+    Server-sent status events for a generation
+
+    Sends the current state first, then every update workers publish, and
+    closes after the final ("completed" or "failed") event.
+    """
+    subscription = status_dispatcher.subscribe(generation_id)
+    queue = await subscription.__aenter__()
+    try:
+        # Subscribed before reading the state, so no update is missed
+        current = await snapshot(generation_id)
+        if current is None:
+            # Not published recently: read the row once
+            generation = await _load_generation(generation_id)
+            current = status_event(generation) if generation else None
+        if current is None or current["user_id"] != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Generation not found"
+            )
+    except BaseException:
+        await subscription.__aexit__(None, None, None)
+        raise
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            event = current
+            while True:
+                yield _sse("status", event)
+                if event["status"] in FINAL_STATUSES:
+                    return
+                while True:
+                    try:
+                        event = await asyncio.wait_for(
+                            queue.get(), settings.GENERATION_EVENTS_KEEPALIVE
+                        )
+                        break
+                    except asyncio.TimeoutError:
+                        # Keeps proxies from closing idle connections
+                        yield ": keepalive\n\n"
+        finally:
+            await subscription.__aexit__(None, None, None)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("", response_model=Page[GenerationSummary])
+async def list_generations(
+    status_filter: Optional[GenerationStatus] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> Dict[str, Any]:
+    """The user's generation history, newest first; pass ``next_cursor`` for more"""
+    query = select(
+        Generation.id,
+        Generation.type,
+        Generation.status,
+        Generation.provider,
+        Generation.cost,
+        Generation.output_url,
+        Generation.created_at,
+    ).where(Generation.user_id == current_user.id)
+    if status_filter is not None:
+        query = query.where(Generation.status == status_filter)
+    try:
+        query = paginate(query, Generation.created_at, Generation.id, cursor, limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    rows = (await db.execute(query)).all()
+    items, next_cursor = page_of(rows, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
 @router.get("/{generation_id}")
-async def get_generation(generation_id: str):
-    """Get generation status and result"""
-    return {"message": f"Get generation {generation_id} - To be implemented"}
+async def get_generation(
+    generation_id: str,
+    detail: bool = False,
+    current_user: User = Depends(get_current_active_user),
+) -> Dict[str, Any]:
+    """
+    Get generation status and result
+
+    With ``detail=true`` the full input and output payloads are included,
+    loading them from blob storage if they were offloaded.
+    """
+    generation = await _load_generation(generation_id)
+    if generation is None or generation.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Generation not found"
+        )
+    response: Dict[str, Any] = {
+        **status_event(generation),
+        "type": generation.type,
+        "latency": generation.latency,
+        "created_at": generation.created_at,
+        "updated_at": generation.updated_at,
+    }
+    if detail:
+        payloads = await payload_store.load_generation(generation)
+        response["input"] = payloads["input_data"]
+        response["metadata"] = payloads["output_metadata"]
+    return response
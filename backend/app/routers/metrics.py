@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+import structlog
+
+from app.core.telemetry import render_metrics, sample_queue_depth
+
+router = APIRouter()
+logger = structlog.get_logger()
+
+
+@router.get("", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus scrape endpoint"""
+    try:
+        await sample_queue_depth()
+    except Exception as e:
+        # Still serve the other metrics while Redis is unavailable
+        logger.warning("Queue depth sampling failed", error=str(e))
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -1,4 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Optional
+
+from app.core.deps import get_current_active_user, get_read_db
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursor,
+    page_of,
+    paginate,
+)
+from app.models.influencer_model import InfluencerModel
+from app.models.user import User
+from app.schemas.model import InfluencerModelDetail, InfluencerModelResponse
+from app.schemas.pagination import Page
 
 router = APIRouter()
 
@@ -15,13 +31,43 @@ async def create_face_model():
     return {"message": "Face model creation - To be implemented"}
 
 
-@router.get("/{model_id}")
-async def get_model(model_id: str):
+@router.get("/{model_id}", response_model=InfluencerModelDetail)
+async def get_model(
+    model_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> InfluencerModel:
     """Get model details"""
-    return {"message": f"Get model {model_id} - To be implemented"}
+    model = await db.get(InfluencerModel, model_id)
+    if model is None or model.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Model not found"
+        )
+    return model
 
 
-@router.get("")
-async def list_models():
-    """List all user models"""
-    return {"message": "List models - To be implemented"}
+@router.get("", response_model=Page[InfluencerModelResponse])
+async def list_models(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> Dict[str, Any]:
+    """List the user's models, newest first; pass ``next_cursor`` for more"""
+    query = select(
+        InfluencerModel.id,
+        InfluencerModel.name,
+        InfluencerModel.type,
+        InfluencerModel.provider,
+        InfluencerModel.status,
+        InfluencerModel.created_at,
+    ).where(InfluencerModel.user_id == current_user.id)
+    try:
+        query = paginate(
+            query, InfluencerModel.created_at, InfluencerModel.id, cursor, limit
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    rows = (await db.execute(query)).all()
+    items, next_cursor = page_of(rows, limit)
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Request, status
+import json
+from typing import Dict
+import structlog
+
+from app.providers.replicate_adapter import FINAL_STATUSES
+from app.services import long_video
+from app.services.webhooks import generation_updates, verify_replicate_signature
+from app.workers.tasks import collect_video_segment
+
+router = APIRouter()
+logger = structlog.get_logger()
+
+
+@router.post("/replicate")
+async def replicate_webhook(request: Request) -> Dict[str, str]:
+    """
+    Completion callback for Replicate predictions
+
+    Each finished prediction is handed to a worker exactly once, however many
+    times Replicate delivers it; progress is written to the Generation row in
+    batches.
+    """
+    body = await request.body()
+    try:
+        verify_replicate_signature(request.headers, body)
+    except ValueError as e:
+        logger.warning("Rejected Replicate webhook", error=str(e))
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+
+    prediction = json.loads(body)
+    if prediction.get("status") not in FINAL_STATUSES:
+        return {"status": "ignored"}
+
+    job = await long_video.tracked_prediction(prediction["id"])
+    if job is None:
+        return {"status": "ignored"}
+    if not await long_video.claim_prediction(prediction["id"]):
+        return {"status": "duplicate"}
+
+    try:
+        collect_video_segment.send(prediction["id"])
+    except Exception:
+        # Let Replicate's redelivery retry the hand-off
+        await long_video.release_prediction(prediction["id"])
+        raise
+
+    progress = await long_video.record_finished(job["generation_id"])
+    generation_updates.add(job["generation_id"], output_metadata=progress)
+    return {"status": "accepted"}
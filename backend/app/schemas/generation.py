@@ -0,0 +1,44 @@
+"""Pydantic schemas for generation requests"""
+
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+
+class TextGenerationRequest(BaseModel):
+    messages: List[Dict[str, Any]]
+    model: Optional[str] = None
+    temperature: float = 0.7
+    max_tokens: int = 1000
+    providers: Optional[List[str]] = None
+
+    def to_payload(self) -> Dict[str, Any]:
+        """Provider payload (routing options and unset fields excluded)"""
+        return self.model_dump(exclude={"providers"}, exclude_none=True)
+
+
+class VoiceGenerationRequest(BaseModel):
+    text: str
+    voice_id: str
+    model_id: Optional[str] = None
+    output_format: Optional[str] = None
+    providers: Optional[List[str]] = None
+
+    def to_payload(self) -> Dict[str, Any]:
+        """Provider payload (routing options and unset fields excluded)"""
+        return self.model_dump(exclude={"providers"}, exclude_none=True)
+
+
+class GenerationSummary(BaseModel):
+    """One row of a user's generation history (no payload JSON)"""
+
+    id: str
+    type: str
+    status: str
+    provider: str
+    cost: Optional[float] = None
+    output_url: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
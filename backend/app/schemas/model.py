@@ -0,0 +1,23 @@
+"""Pydantic schemas for influencer models"""
+
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from datetime import datetime
+
+
+class InfluencerModelResponse(BaseModel):
+    id: str
+    name: str
+    type: str
+    provider: str
+    status: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class InfluencerModelDetail(InfluencerModelResponse):
+    training_data_url: Optional[str] = None
+    model_metadata: Optional[Dict[str, Any]] = None
+    updated_at: Optional[datetime] = None
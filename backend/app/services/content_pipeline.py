@@ -0,0 +1,233 @@
+"""
+Content pipeline
+Stages of the batch content workflow: script -> voice -> video, captions from
+the script, and a per-reel package once everything is ready
+"""
+
+import json
+import uuid
+from typing import Any, AsyncIterator, Dict, List
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.generation import Generation, GenerationStatus, GenerationType
+from app.orchestrator import offline_batch
+from app.orchestrator.model_router import model_router
+from app.orchestrator.cache import payload_key
+from app.orchestrator.exceptions import StageDeferred, StageFailed
+from app.orchestrator.pipeline import Pipeline, Stage, StageFn
+from app.services.payloads import payload_store
+from app.services.storage import get_storage
+
+
+def _require(stage: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    if result.get("status") != "success":
+        raise StageFailed(stage, result.get("error", "generation failed"))
+    return result
+
+
+async def _batched_text(
+    stage: str, item: Dict[str, Any], payload: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Low-priority text through the OpenAI Batch API and a Generation row
+
+    The first run queues the request and defers the stage; later runs of the
+    pipeline read the result from the row once its batch has been collected.
+    """
+    generation_id = str(
+        uuid.uuid5(uuid.NAMESPACE_URL, f"{item['run_id']}/{item['index']}/{stage}")
+    )
+    input_data = await payload_store.offload(payload)
+    async with AsyncSessionLocal() as session:
+        generation = await session.get(Generation, generation_id)
+        if generation is None:
+            session.add(
+                Generation(
+                    id=generation_id,
+                    user_id=item["user_id"],
+                    type=GenerationType.TEXT,
+                    provider="openai",
+                    status=GenerationStatus.QUEUED,
+                    input_data=input_data,
+                )
+            )
+            await session.commit()
+
+    if generation is None:
+        result = await model_router.generate(
+            "generate_text",
+            payload,
+            priority="low",
+            user_id=item["user_id"],
+            generation_id=generation_id,
+            use_cache=False,
+            coalesce=False,
+        )
+        if result.get("status") != "queued":
+            return {"text": _require(stage, result)["text"]}
+        raise StageDeferred(stage, "queued for the OpenAI Batch API")
+
+    if generation.status == GenerationStatus.COMPLETED:
+        metadata = await payload_store.load(generation.output_metadata)
+        return {"text": metadata["text"]}
+    if generation.status == GenerationStatus.FAILED:
+        raise StageFailed(stage, generation.error_message or "batch request failed")
+    raise StageDeferred(stage, "waiting for the OpenAI Batch API")
+
+
+async def write_script(item: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Short-form video script for the item's topic"""
+    result = await model_router.generate(
+        "generate_text",
+        {
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You write 30-second scripts for short-form video.",
+                },
+                {"role": "user", "content": f"Topic: {item['topic']}"},
+            ],
+            "temperature": 0.9,
+        },
+        user_id=item["user_id"],
+        # Reels sharing a topic each need their own take
+        use_cache=False,
+        coalesce=False,
+    )
+    return {"text": _require("script", result)["text"]}
+
+
+async def record_voice(item: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Narration of the script in the user's cloned voice"""
+    result = await model_router.generate(
+        "voice_clone",
+        {
+            "text": inputs["script"]["text"],
+            "voice_id": item.get("voice_id"),
+            "storage_key": f"audio/{item['user_id']}/{item['run_id']}/{item['index']}.mp3",
+        },
+        user_id=item["user_id"],
+    )
+    result = _require("voice", result)
+    return {"audio_url": result["audio_url"], "storage_key": result["storage_key"]}
+
+
+async def render_video(item: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Video for the narration"""
+    result = await model_router.generate(
+        "generate_video",
+        {
+            "prompt": item["topic"],
+            "script": inputs["script"]["text"],
+            "audio_url": inputs["voice"]["audio_url"],
+        },
+        user_id=item["user_id"],
+    )
+    result = _require("video", result)
+    return {"video_url": result.get("video_url") or result.get("url")}
+
+
+async def write_captions(
+    item: Dict[str, Any], inputs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Caption and hashtags for the reel
+
+    Nothing waits on captions but packaging, so they go through the OpenAI
+    Batch API when it is enabled.
+    """
+    payload = {
+        "messages": [
+            {
+                "role": "system",
+                "content": "Write a social media caption with hashtags.",
+            },
+            {"role": "user", "content": inputs["script"]["text"]},
+        ],
+        "temperature": 0.7,
+        "max_tokens": 300,
+    }
+    if offline_batch.is_eligible("generate_text", "low") and model_router.supports(
+        "openai", "generate_text"
+    ):
+        return await _batched_text("captions", item, payload)
+
+    result = await model_router.generate(
+        "generate_text",
+        payload,
+        priority="low",
+        user_id=item["user_id"],
+        use_cache=False,
+        coalesce=False,
+    )
+    return {"text": _require("captions", result)["text"]}
+
+
+async def package_reel(item: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Store a manifest with everything needed to publish the reel"""
+    manifest = {
+        "topic": item["topic"],
+        "platforms": item["platforms"],
+        "script": inputs["script"]["text"],
+        "audio_url": inputs["voice"]["audio_url"],
+        "video_url": inputs["video"]["video_url"],
+        "caption": inputs["captions"]["text"],
+    }
+
+    async def body() -> AsyncIterator[bytes]:
+        yield json.dumps(manifest).encode()
+
+    stored = await get_storage().put_stream(
+        f"packages/{item['user_id']}/{item['run_id']}/{item['index']}.json",
+        body(),
+        "application/json",
+    )
+    return {"url": stored.url, "storage_key": stored.key}
+
+
+def _stage(name: str, run: StageFn, *depends_on: str) -> Stage:
+    return Stage(
+        name=name,
+        run=run,
+        depends_on=depends_on,
+        concurrency=settings.PIPELINE_STAGE_CONCURRENCY.get(name, 4),
+    )
+
+
+content_pipeline = Pipeline(
+    [
+        _stage("script", write_script),
+        _stage("voice", record_voice, "script"),
+        _stage("video", render_video, "voice"),
+        _stage("captions", write_captions, "script"),
+        _stage("package", package_reel, "video", "captions"),
+    ]
+)
+
+
+def run_id_for(user_id: str, batch_config: Dict[str, Any]) -> str:
+    """Stable ID for a batch so retries resume from its checkpoints"""
+    return batch_config.get("batch_id") or payload_key(
+        "batch_content_generation", {"user_id": user_id, **batch_config}
+    )
+
+
+def build_items(
+    user_id: str, run_id: str, batch_config: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """One pipeline item per reel, from ``topics`` or ``count`` x ``topic``"""
+    topics = batch_config.get("topics") or [batch_config.get("topic", "")] * int(
+        batch_config.get("count", 1)
+    )
+    return [
+        {
+            "index": index,
+            "run_id": run_id,
+            "user_id": user_id,
+            "topic": topic,
+            "voice_id": batch_config.get("voice_id"),
+            "platforms": batch_config.get("platforms", ["instagram", "tiktok"]),
+        }
+        for index, topic in enumerate(topics)
+    ]
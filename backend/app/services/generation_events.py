@@ -0,0 +1,153 @@
+"""
+Generation status events
+Workers publish status changes on Redis channels; each API process fans them
+out to its subscribers over a single shared pub/sub connection
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
+import structlog
+from redis.asyncio.client import PubSub
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.generation import Generation
+from app.services import payloads
+
+logger = structlog.get_logger()
+
+CHANNEL_PREFIX = "generation:events:"
+SNAPSHOT_PREFIX = "generation:status:"
+FINAL_STATUSES = {"completed", "failed"}
+
+
+def status_event(generation: Generation) -> Dict[str, Any]:
+    """Client-facing view of a generation's current state"""
+    status = getattr(generation.status, "value", generation.status)
+    return {
+        "generation_id": generation.id,
+        "user_id": generation.user_id,
+        "status": status,
+        "provider": generation.provider,
+        "cost": generation.cost,
+        "output_url": generation.output_url,
+        "metadata": payloads.summary(generation.output_metadata),
+        "error": generation.error_message,
+    }
+
+
+async def publish(generations: Iterable[Generation]) -> None:
+    """Publish the state of updated rows and keep a snapshot for new subscribers"""
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for generation in generations:
+                encoded = json.dumps(status_event(generation), default=str)
+                pipe.set(
+                    f"{SNAPSHOT_PREFIX}{generation.id}",
+                    encoded,
+                    ex=settings.GENERATION_EVENTS_SNAPSHOT_TTL,
+                )
+                pipe.publish(f"{CHANNEL_PREFIX}{generation.id}", encoded)
+            await pipe.execute()
+    except Exception as e:
+        # Subscribers fall back to the stored row; never fail the update
+        logger.warning("Generation event publish failed", error=str(e))
+
+
+async def snapshot(generation_id: str) -> Optional[Dict[str, Any]]:
+    """Last published state, if still cached"""
+    try:
+        raw = await get_redis().get(f"{SNAPSHOT_PREFIX}{generation_id}")
+    except Exception as e:
+        logger.warning("Generation snapshot unavailable", error=str(e))
+        return None
+    return json.loads(raw) if raw else None
+
+
+class StatusDispatcher:
+    """
+    Fans generation events out to local subscribers
+
+    One pub/sub connection and one reader task per process serve every
+    subscriber; channels are subscribed while at least one local client is
+    watching them. Each subscriber gets a small queue, and a client that
+    stops reading loses its oldest events rather than blocking the others.
+    """
+
+    def __init__(self) -> None:
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.pubsub: Optional[PubSub] = None
+        self.reader: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def subscribe(self, generation_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Receive events for one generation while the context is open"""
+        queue: asyncio.Queue = asyncio.Queue(
+            maxsize=settings.GENERATION_EVENTS_QUEUE_SIZE
+        )
+        channel = f"{CHANNEL_PREFIX}{generation_id}"
+        async with self.lock:
+            if self.pubsub is None:
+                self.pubsub = get_redis().pubsub()
+            queues = self.subscribers.setdefault(channel, set())
+            if not queues:
+                await self.pubsub.subscribe(channel)
+            queues.add(queue)
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.create_task(self._read())
+        try:
+            yield queue
+        finally:
+            async with self.lock:
+                queues = self.subscribers.get(channel, set())
+                queues.discard(queue)
+                if not queues:
+                    self.subscribers.pop(channel, None)
+                    try:
+                        await self.pubsub.unsubscribe(channel)
+                    except Exception as e:
+                        logger.warning("Unsubscribe failed", error=str(e))
+
+    async def _read(self) -> None:
+        while self.subscribers and self.pubsub is not None:
+            try:
+                message = await self.pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Generation event stream interrupted", error=str(e))
+                await asyncio.sleep(1.0)
+                continue
+            if message is None:
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            event = json.loads(message["data"])
+            for queue in self.subscribers.get(channel, ()):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(event)
+
+    async def close(self) -> None:
+        if self.reader is not None:
+            self.reader.cancel()
+            await asyncio.gather(self.reader, return_exceptions=True)
+            self.reader = None
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+            self.pubsub = None
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "channels": len(self.subscribers),
+            "subscribers": sum(len(q) for q in self.subscribers.values()),
+        }
+
+
+status_dispatcher = StatusDispatcher()
@@ -0,0 +1,88 @@
+"""
+Dependency health prober
+Checks the database and Redis in the background so health endpoints only
+read the last result
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+import structlog
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+
+class HealthProber:
+    """
+    Refreshes dependency status every ``settings.HEALTH_PROBE_INTERVAL`` seconds
+
+    Each probe uses the shared engine and Redis pools with a timeout of
+    ``settings.HEALTH_PROBE_TIMEOUT``. A result older than three intervals is
+    reported as ``stale`` so a stuck prober does not look healthy forever.
+    """
+
+    def __init__(self) -> None:
+        self.services: Dict[str, str] = {"database": "unknown", "redis": "unknown"}
+        self.checked_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def _check_database(self) -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _check_redis(self) -> None:
+        await get_redis().ping()
+
+    async def _probe(self, check: Callable[[], Awaitable[None]]) -> str:
+        try:
+            await asyncio.wait_for(check(), settings.HEALTH_PROBE_TIMEOUT)
+            return "healthy"
+        except asyncio.TimeoutError:
+            return "unhealthy: timed out"
+        except Exception as e:
+            return f"unhealthy: {str(e)}"
+
+    async def probe(self) -> None:
+        database, redis_status = await asyncio.gather(
+            self._probe(self._check_database), self._probe(self._check_redis)
+        )
+        previous = self.services
+        self.services = {"database": database, "redis": redis_status}
+        self.checked_at = time.time()
+        if self.services != previous:
+            logger.info("Dependency health changed", **self.services)
+
+    def start(self) -> None:
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.probe()
+            await asyncio.sleep(settings.HEALTH_PROBE_INTERVAL)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Last probe result, shaped like the health endpoint response"""
+        services = dict(self.services)
+        stale_after = 3 * settings.HEALTH_PROBE_INTERVAL
+        if self.checked_at is None or time.time() - self.checked_at > stale_after:
+            services = {name: "stale" for name in services}
+        healthy = all(value == "healthy" for value in services.values())
+        return {
+            "status": "healthy" if healthy else "degraded",
+            "services": services,
+            "checked_at": self.checked_at,
+        }
+
+
+health_prober = HealthProber()
@@ -0,0 +1,468 @@
+"""
+Long-form video
+Splits a script into scene segments, renders them concurrently across video
+providers with per-segment checkpoints, and stitches them with ffmpeg
+"""
+
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import structlog
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis
+from app.models.generation import Generation, GenerationStatus
+from app.orchestrator.model_router import model_router
+from app.orchestrator.pipeline import PipelineCheckpoint
+from app.providers.replicate_adapter import FINAL_STATUSES
+from app.services import generation_events
+from app.services.payloads import payload_store
+from app.services.storage import READ_CHUNK_SIZE, StoredObject, get_storage
+
+logger = structlog.get_logger()
+
+# Narration pace used to size scenes from a script
+WORDS_PER_SECOND = 2.5
+
+
+def split_scenes(payload: Dict[str, Any]) -> List[str]:
+    """Explicit ``scenes``, or the script cut at sentences into segment-sized scenes"""
+    if payload.get("scenes"):
+        return list(payload["scenes"])
+
+    script = (payload.get("script") or payload.get("prompt") or "").strip()
+    max_words = settings.LONG_VIDEO_SEGMENT_SECONDS * WORDS_PER_SECOND
+    scenes: List[str] = []
+    current: List[str] = []
+    words = 0
+    for sentence in re.split(r"(?<=[.!?])\s+", script):
+        count = len(sentence.split())
+        if current and words + count > max_words:
+            scenes.append(" ".join(current))
+            current, words = [], 0
+        current.append(sentence)
+        words += count
+    if current:
+        scenes.append(" ".join(current))
+    return scenes
+
+
+async def render_segments(
+    generation_id: str, scenes: List[str], payload: Dict[str, Any]
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Render every scene not already checkpointed; None marks a failed segment
+
+    Segments are hedged across video providers, so one slow render gets a
+    backup instead of holding up (or timing out) the job.
+    """
+    checkpoint = PipelineCheckpoint(_job_key(generation_id))
+    saved = await checkpoint.load()
+    segments: List[Optional[Dict[str, Any]]] = [
+        saved.get(str(index)) for index in range(len(scenes))
+    ]
+    missing = [index for index, segment in enumerate(segments) if segment is None]
+    if len(missing) < len(scenes):
+        logger.info(
+            "Resuming long video",
+            generation_id=generation_id,
+            done=len(scenes) - len(missing),
+            missing=len(missing),
+        )
+
+    requests = (
+        {
+            "task": "generate_video",
+            "payload": {
+                "prompt": scenes[index],
+                "input": payload.get("input", {}),
+                "storage_key": f"videos/{generation_id}/segments/{index:04d}.mp4",
+            },
+            "hedge": True,
+            "use_cache": False,
+            "coalesce": False,
+        }
+        for index in missing
+    )
+    async for result in model_router.generate_many(
+        requests, concurrency=settings.LONG_VIDEO_SEGMENT_CONCURRENCY
+    ):
+        index = missing[result["index"]]
+        if result.get("status") != "success":
+            logger.warning(
+                "Video segment failed",
+                generation_id=generation_id,
+                segment=index,
+                error=result.get("error"),
+            )
+            continue
+        segment = {
+            "storage_key": result["storage_key"],
+            "provider": result["provider"],
+            "cost": result.get("cost", 0.0),
+        }
+        await checkpoint.save(str(index), segment)
+        segments[index] = segment
+    return segments
+
+
+async def stitch_segments(key: str, segments: List[Dict[str, Any]]) -> StoredObject:
+    """Concatenate segments with ffmpeg, streaming its output into storage"""
+    storage = get_storage()
+    with tempfile.TemporaryDirectory() as tmp:
+
+        async def download(index: int, segment: Dict[str, Any]) -> str:
+            path = os.path.join(tmp, f"{index:04d}.mp4")
+            with open(path, "wb") as f:
+                async for chunk in storage.read(segment["storage_key"]):
+                    await asyncio.to_thread(f.write, chunk)
+            return path
+
+        paths = await asyncio.gather(
+            *(download(index, segment) for index, segment in enumerate(segments))
+        )
+        list_path = os.path.join(tmp, "segments.txt")
+        with open(list_path, "w") as f:
+            f.writelines(f"file '{path}'\n" for path in paths)
+
+        process = await asyncio.create_subprocess_exec(
+            settings.FFMPEG_PATH,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            list_path,
+            "-c",
+            "copy",
+            # Fragmented MP4 can be written to a pipe without seeking back
+            "-movflags",
+            "frag_keyframe+empty_moov",
+            "-f",
+            "mp4",
+            "pipe:1",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = process.stdout, process.stderr
+        assert stdout is not None and stderr is not None
+        errors = asyncio.create_task(stderr.read())
+
+        async def output() -> AsyncIterator[bytes]:
+            while chunk := await stdout.read(READ_CHUNK_SIZE):
+                yield chunk
+            if await process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed: {(await errors).decode()[-500:]}")
+
+        try:
+            return await storage.put_stream(key, output(), "video/mp4")
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            errors.cancel()
+
+
+async def generate_long_video(
+    generation_id: str, payload: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Render and stitch a long-form video; raises if any segment is missing"""
+    start = time.perf_counter()
+    scenes = split_scenes(payload)
+    if not scenes:
+        raise ValueError("Long video needs a script, prompt or scenes")
+
+    segments = await render_segments(generation_id, scenes, payload)
+    rendered = [segment for segment in segments if segment is not None]
+    if len(rendered) < len(segments):
+        # Finished segments are checkpointed; a retry renders only these
+        failed = len(segments) - len(rendered)
+        raise RuntimeError(f"{failed} of {len(segments)} video segments failed")
+
+    result = await _assemble(generation_id, rendered)
+    result["latency"] = time.perf_counter() - start
+    return result
+
+
+async def _assemble(
+    generation_id: str, segments: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    stored = await stitch_segments(f"videos/{generation_id}.mp4", segments)
+    return {
+        "video_url": stored.url,
+        "storage_key": stored.key,
+        "segments": len(segments),
+        "providers": sorted({segment["provider"] for segment in segments}),
+        "cost": sum(segment["cost"] or 0.0 for segment in segments),
+    }
+
+
+async def update_generation(generation_id: str, **fields: Any) -> None:
+    """Set columns on a Generation row and publish its new state"""
+    fields = await payload_store.offload_fields(fields)
+    async with AsyncSessionLocal() as session:
+        generation = await session.get(Generation, generation_id)
+        if generation is None:
+            logger.warning("Generation not found", generation_id=generation_id)
+            return
+        for name, value in fields.items():
+            setattr(generation, name, value)
+        await session.commit()
+    await generation_events.publish([generation])
+
+
+async def complete_generation(generation_id: str, result: Dict[str, Any]) -> None:
+    """Record a stitched long video on its Generation row"""
+    await update_generation(
+        generation_id,
+        status=GenerationStatus.COMPLETED,
+        provider=",".join(result["providers"]),
+        cost=result["cost"],
+        latency=result["latency"],
+        output_url=result["video_url"],
+        output_metadata={
+            "storage_key": result["storage_key"],
+            "segments": result["segments"],
+        },
+        error_message=None,
+    )
+
+
+# Webhook-driven rendering: segments are submitted as Replicate predictions
+# and collected when their completion webhooks (or the fallback poller) arrive.
+
+
+def _job_key(generation_id: str) -> str:
+    return f"long_video:{generation_id}"
+
+
+def _prediction_key(prediction_id: str) -> str:
+    return f"prediction:{prediction_id}"
+
+
+def webhook_url() -> str:
+    return f"{settings.WEBHOOK_BASE_URL.rstrip('/')}/api/v1/webhooks/replicate"
+
+
+async def submit_segments(generation_id: str, payload: Dict[str, Any]) -> int:
+    """
+    Start a prediction for every scene not yet checkpointed
+
+    Returns the number of predictions started; 0 means every segment is
+    already rendered and the video can be stitched.
+    """
+    scenes = split_scenes(payload)
+    if not scenes:
+        raise ValueError("Long video needs a script, prompt or scenes")
+
+    redis = get_redis()
+    saved = await PipelineCheckpoint(_job_key(generation_id)).load()
+    await redis.hset(
+        _job_key(generation_id),
+        mapping={"total": len(scenes), "started": time.time()},
+    )
+    await redis.expire(_job_key(generation_id), settings.PIPELINE_CHECKPOINT_TTL)
+
+    missing = [index for index in range(len(scenes)) if str(index) not in saved]
+    limit = asyncio.Semaphore(settings.LONG_VIDEO_SEGMENT_CONCURRENCY)
+
+    async def submit(index: int) -> None:
+        async with limit:
+            await _submit_segment(
+                generation_id,
+                {
+                    "segment": index,
+                    "prompt": scenes[index],
+                    "input": payload.get("input", {}),
+                    "attempt": 1,
+                },
+            )
+
+    await asyncio.gather(*(submit(index) for index in missing))
+    return len(missing)
+
+
+async def _submit_segment(generation_id: str, job: Dict[str, Any]) -> None:
+    provider = model_router.providers["replicate"]
+    async with model_router.rate_limiter.slot("replicate"):
+        prediction_id = await provider.submit_video(
+            {"prompt": job["prompt"], "input": job["input"]}, webhook_url()
+        )
+    redis = get_redis()
+    await redis.set(
+        _prediction_key(prediction_id),
+        json.dumps({**job, "generation_id": generation_id}),
+        ex=settings.PIPELINE_CHECKPOINT_TTL,
+    )
+    await redis.hset(
+        f"{_job_key(generation_id)}:pending", str(job["segment"]), prediction_id
+    )
+    await redis.expire(
+        f"{_job_key(generation_id)}:pending", settings.PIPELINE_CHECKPOINT_TTL
+    )
+
+
+async def claim_prediction(prediction_id: str) -> bool:
+    """True for the first caller to see a finished prediction (webhook or poll)"""
+    return bool(
+        await get_redis().set(
+            f"webhook:replicate:{prediction_id}",
+            1,
+            nx=True,
+            ex=settings.PIPELINE_CHECKPOINT_TTL,
+        )
+    )
+
+
+async def release_prediction(prediction_id: str) -> None:
+    """Undo a claim whose processing could not be handed off"""
+    await get_redis().delete(f"webhook:replicate:{prediction_id}")
+
+
+async def abandon_prediction(prediction_id: str, error: str) -> None:
+    """Fail the generation of a prediction that could not be collected"""
+    job = await tracked_prediction(prediction_id)
+    if job is None:
+        return
+    generation_id = job["generation_id"]
+    await update_generation(
+        generation_id,
+        status=GenerationStatus.FAILED,
+        error_message=f"Segment {job['segment']} could not be collected: {error}",
+    )
+    await get_redis().hdel(f"{_job_key(generation_id)}:pending", str(job["segment"]))
+
+
+async def tracked_prediction(prediction_id: str) -> Optional[Dict[str, Any]]:
+    """The segment a prediction renders, if it is one of ours"""
+    raw = await get_redis().get(_prediction_key(prediction_id))
+    return json.loads(raw) if raw else None
+
+
+async def record_finished(generation_id: str) -> Dict[str, Any]:
+    """Count a finished prediction; returns progress for the Generation row"""
+    redis = get_redis()
+    finished = await redis.hincrby(_job_key(generation_id), "finished", 1)
+    total = await redis.hget(_job_key(generation_id), "total")
+    return {"predictions_finished": finished, "segments_total": int(total or 0)}
+
+
+async def handle_prediction(prediction: Dict[str, Any]) -> bool:
+    """
+    Store a finished segment (or resubmit a failed one)
+
+    Returns True when this was the last missing segment and the caller
+    should stitch the video.
+    """
+    job = await tracked_prediction(prediction["id"])
+    if job is None:
+        logger.warning("Untracked prediction", prediction_id=prediction["id"])
+        return False
+    generation_id = job["generation_id"]
+    segment = job["segment"]
+    redis = get_redis()
+
+    if prediction["status"] != "succeeded":
+        if job["attempt"] <= settings.LONG_VIDEO_SEGMENT_RETRIES:
+            logger.warning(
+                "Video segment failed, resubmitting",
+                generation_id=generation_id,
+                segment=segment,
+                error=prediction.get("error"),
+            )
+            await _submit_segment(generation_id, {**job, "attempt": job["attempt"] + 1})
+            return False
+        await update_generation(
+            generation_id,
+            status=GenerationStatus.FAILED,
+            error_message=f"Segment {segment} failed: {prediction.get('error')}",
+        )
+        await redis.hdel(f"{_job_key(generation_id)}:pending", str(segment))
+        return False
+
+    provider = model_router.providers["replicate"]
+    result = await provider.store_output(
+        prediction, f"videos/{generation_id}/segments/{segment:04d}.mp4"
+    )
+    await PipelineCheckpoint(_job_key(generation_id)).save(
+        str(segment),
+        {
+            "storage_key": result["storage_key"],
+            "provider": "replicate",
+            "cost": result["cost"],
+        },
+    )
+    await redis.hdel(f"{_job_key(generation_id)}:pending", str(segment))
+    if await redis.hlen(f"{_job_key(generation_id)}:pending"):
+        return False
+    saved = await PipelineCheckpoint(_job_key(generation_id)).load()
+    if len(saved) < int(await redis.hget(_job_key(generation_id), "total") or 0):
+        # A segment ran out of retries; the job is already marked failed
+        return False
+    # Only one collector gets to trigger the stitch
+    return bool(
+        await redis.set(
+            f"{_job_key(generation_id)}:stitch",
+            1,
+            nx=True,
+            ex=settings.PIPELINE_CHECKPOINT_TTL,
+        )
+    )
+
+
+async def poll_pending(generation_id: str) -> Tuple[int, bool]:
+    """
+    Check predictions whose webhook hasn't arrived
+
+    Returns (predictions still running, whether to stitch now).
+    """
+    provider = model_router.providers["replicate"]
+    pending = await get_redis().hgetall(f"{_job_key(generation_id)}:pending")
+    running = 0
+    stitch = False
+    for raw_id in pending.values():
+        prediction_id = raw_id.decode() if isinstance(raw_id, bytes) else raw_id
+        prediction = await provider.get_prediction(prediction_id)
+        if prediction["status"] not in FINAL_STATUSES:
+            running += 1
+            continue
+        if not await claim_prediction(prediction_id):
+            continue
+        logger.info("Webhook late, collected by polling", prediction_id=prediction_id)
+        try:
+            stitch = await handle_prediction(prediction) or stitch
+        except Exception as e:
+            # Let the next poll (or a webhook redelivery) try again
+            logger.warning(
+                "Collecting prediction failed",
+                prediction_id=prediction_id,
+                error=str(e),
+            )
+            await release_prediction(prediction_id)
+            running += 1
+    return running, stitch
+
+
+async def stitch_job(generation_id: str) -> None:
+    """Stitch a webhook-rendered video from its checkpointed segments"""
+    redis = get_redis()
+    job = await redis.hgetall(_job_key(generation_id))
+    fields = {
+        (key.decode() if isinstance(key, bytes) else key): value
+        for key, value in job.items()
+    }
+    saved = await PipelineCheckpoint(_job_key(generation_id)).load()
+    segments = [saved[str(index)] for index in range(int(fields["total"]))]
+
+    result = await _assemble(generation_id, segments)
+    result["latency"] = time.time() - float(fields["started"])
+    await complete_generation(generation_id, result)
+    logger.info("Long video stitched", generation_id=generation_id)
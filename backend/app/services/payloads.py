@@ -0,0 +1,119 @@
+"""
+Generation payload offloading
+Large ``input_data`` / ``output_metadata`` JSON is stored as a gzip blob in
+object storage, addressed by its SHA-256, and the row keeps a small reference.
+Writers offload before opening their write transaction, so uploads never hold
+a database connection or row locks.
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
+import structlog
+from sqlalchemy import inspect
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.storage import get_storage
+
+logger = structlog.get_logger()
+
+# Generation columns that may be offloaded
+PAYLOAD_COLUMNS = ("input_data", "output_metadata")
+REFERENCE_KEY = "$blob"
+
+
+def is_reference(value: Any) -> bool:
+    return isinstance(value, dict) and REFERENCE_KEY in value
+
+
+def summary(value: Any) -> Any:
+    """Inline payload, or a size marker standing in for an offloaded one"""
+    if is_reference(value):
+        return {"offloaded": True, "size": value["size"]}
+    return value
+
+
+async def _once(data: bytes) -> AsyncIterator[bytes]:
+    yield data
+
+
+class PayloadStore:
+    """
+    Content-addressed, compressed storage for Generation payloads
+
+    Identical payloads share one blob, and blobs are immutable, so loaded
+    payloads are cached in process by hash.
+    """
+
+    def __init__(self) -> None:
+        self.known: Set[str] = set()
+        self.cache: TTLCache[Any] = TTLCache(
+            max_entries=1024, max_size=settings.PAYLOAD_CACHE_MAX_BYTES
+        )
+
+    async def offload(self, value: Any) -> Any:
+        """Return ``value`` unchanged if small, else a reference to its blob"""
+        if value is None or is_reference(value):
+            return value
+        raw = json.dumps(value, separators=(",", ":"), default=str).encode()
+        if len(raw) < settings.PAYLOAD_OFFLOAD_BYTES:
+            return value
+
+        digest = hashlib.sha256(raw).hexdigest()
+        key = f"payloads/{digest[:2]}/{digest}.json.gz"
+        if key not in self.known:
+            blob = gzip.compress(raw, compresslevel=6)
+            await get_storage().put_stream(key, _once(blob), "application/gzip")
+            self.known.add(key)
+            logger.debug("Payload offloaded", key=key, size=len(raw), stored=len(blob))
+        return {REFERENCE_KEY: key, "sha256": digest, "size": len(raw)}
+
+    async def offload_fields(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """``fields`` (column -> value) with large payload columns offloaded"""
+        return {
+            name: await self.offload(value) if name in PAYLOAD_COLUMNS else value
+            for name, value in fields.items()
+        }
+
+    async def offload_changes(self, generations: Iterable[Any]) -> None:
+        """Offload changed payload columns of (detached) Generation rows"""
+        for generation in generations:
+            state = inspect(generation)
+            for column in PAYLOAD_COLUMNS:
+                if not state.attrs[column].history.has_changes():
+                    continue
+                value = getattr(generation, column)
+                offloaded = await self.offload(value)
+                if offloaded is not value:
+                    setattr(generation, column, offloaded)
+
+    async def load(self, value: Any) -> Any:
+        """Resolve a reference to its payload; inline values pass through"""
+        if not is_reference(value):
+            return value
+        key = value[REFERENCE_KEY]
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        blob = bytearray()
+        async for chunk in get_storage().read(key):
+            blob.extend(chunk)
+        raw = gzip.decompress(bytes(blob))
+        if hashlib.sha256(raw).hexdigest() != value["sha256"]:
+            raise ValueError(f"Payload blob {key} does not match its hash")
+        payload = json.loads(raw)
+        self.cache.set(key, payload, settings.PAYLOAD_CACHE_TTL, size=len(raw))
+        return payload
+
+    async def load_generation(self, generation: Any) -> Dict[str, Optional[Any]]:
+        """Both payload columns of a Generation, resolved"""
+        return {
+            column: await self.load(getattr(generation, column))
+            for column in PAYLOAD_COLUMNS
+        }
+
+
+payload_store = PayloadStore()
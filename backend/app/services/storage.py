@@ -0,0 +1,492 @@
+"""
+Object storage for generated assets
+Streams provider output into S3/R2 (or local disk) without buffering whole files
+"""
+
+import asyncio
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional
+import aioboto3
+import httpx
+import structlog
+from aiobotocore.config import AioConfig
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+# S3 requires every multipart part except the last to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+# Chunk size used when reading objects back
+READ_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class StoredObject:
+    """A completed upload"""
+
+    key: str
+    url: str
+    size: int
+    sha256: str
+    content_type: str
+
+
+class StorageUpload(ABC):
+    """
+    An object being written incrementally
+
+    Tracks size and a SHA-256 of the content as it streams through.
+    """
+
+    def __init__(self, key: str, content_type: str):
+        self.key = key
+        self.content_type = content_type
+        self.size = 0
+        self.hasher = hashlib.sha256()
+
+    async def write(self, chunk: bytes) -> None:
+        """Append a chunk to the object"""
+        self.hasher.update(chunk)
+        self.size += len(chunk)
+        await self._write(chunk)
+
+    async def complete(self) -> StoredObject:
+        """Finish the object"""
+        url = await self._complete()
+        return StoredObject(
+            key=self.key,
+            url=url,
+            size=self.size,
+            sha256=self.hasher.hexdigest(),
+            content_type=self.content_type,
+        )
+
+    @abstractmethod
+    async def _write(self, chunk: bytes) -> None:
+        """Backend-specific append"""
+
+    @abstractmethod
+    async def _complete(self) -> str:
+        """Backend-specific commit; returns the object URL"""
+
+    @abstractmethod
+    async def abort(self) -> None:
+        """Discard everything written so far"""
+
+
+class StorageBackend(ABC):
+    """Where generated assets live"""
+
+    @abstractmethod
+    async def open_upload(self, key: str, content_type: str) -> StorageUpload:
+        """Start a streaming upload to ``key``"""
+
+    @abstractmethod
+    def url_for(self, key: str) -> str:
+        """URL under which ``key`` is served"""
+
+    @abstractmethod
+    async def presigned_url(self, key: str, expires_in: Optional[int] = None) -> str:
+        """Time-limited URL for reading a private object"""
+
+    @abstractmethod
+    def read(self, key: str) -> AsyncIterator[bytes]:
+        """Stream an object's content"""
+
+    async def close(self) -> None:
+        """Release pooled connections"""
+
+    async def put_stream(
+        self, key: str, chunks: AsyncIterable[bytes], content_type: str
+    ) -> StoredObject:
+        """Upload an async stream of chunks, aborting on any error"""
+        upload = await self.open_upload(key, content_type)
+        try:
+            async for chunk in chunks:
+                await upload.write(chunk)
+            return await upload.complete()
+        except BaseException:
+            await upload.abort()
+            raise
+
+    async def copy_from_url(
+        self, key: str, source_url: str, content_type: Optional[str] = None
+    ) -> StoredObject:
+        """Stream a vendor-hosted file (e.g. an expiring CDN link) into storage"""
+        async with get_http_client().stream("GET", source_url) as response:
+            response.raise_for_status()
+            content_type = content_type or response.headers.get(
+                "content-type", "application/octet-stream"
+            )
+            return await self.put_stream(
+                key, response.aiter_bytes(READ_CHUNK_SIZE), content_type
+            )
+
+
+class LocalUpload(StorageUpload):
+    """Writes to a temporary file that is renamed into place on completion"""
+
+    def __init__(self, backend: "LocalStorage", key: str, content_type: str):
+        super().__init__(key, content_type)
+        self.backend = backend
+        self.path = backend.path_for(key)
+        self.tmp_path = f"{self.path}.part"
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.tmp_path, "wb")
+
+    async def _write(self, chunk: bytes) -> None:
+        await asyncio.to_thread(self.file.write, chunk)
+
+    async def _complete(self) -> str:
+        await asyncio.to_thread(self.file.close)
+        os.replace(self.tmp_path, self.path)
+        return self.backend.url_for(self.key)
+
+    async def abort(self) -> None:
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class LocalStorage(StorageBackend):
+    """Filesystem backend for development and tests"""
+
+    def __init__(self, root: str, public_url: str = ""):
+        self.root = os.path.abspath(root)
+        self.public_url = public_url.rstrip("/")
+
+    def path_for(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    async def open_upload(self, key: str, content_type: str) -> StorageUpload:
+        return LocalUpload(self, key, content_type)
+
+    def url_for(self, key: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{key}"
+        return f"file://{self.path_for(key)}"
+
+    async def presigned_url(self, key: str, expires_in: Optional[int] = None) -> str:
+        # Local files have no access control to sign
+        return self.url_for(key)
+
+    async def read(self, key: str) -> AsyncIterator[bytes]:
+        with open(self.path_for(key), "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, READ_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+
+class S3Upload(StorageUpload):
+    """
+    S3 multipart upload with concurrent, bounded part uploads
+
+    At most ``max_concurrency`` parts are in flight; ``write`` waits for a
+    slot before buffering more, so memory stays at roughly
+    ``part_size * (max_concurrency + 1)`` per upload. Objects smaller than one
+    part are sent with a single PutObject.
+    """
+
+    def __init__(
+        self,
+        backend: "S3Storage",
+        key: str,
+        content_type: str,
+        part_size: int,
+        max_concurrency: int,
+    ):
+        super().__init__(key, content_type)
+        self.backend = backend
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.buffer = bytearray()
+        self.upload_id: Optional[str] = None
+        self.parts: List[Dict[str, Any]] = []
+        self.part_tasks: List[asyncio.Task] = []
+
+    async def _write(self, chunk: bytes) -> None:
+        self._raise_failed_parts()
+        self.buffer.extend(chunk)
+        if len(self.buffer) >= self.part_size:
+            await self._start_part()
+
+    async def _start_part(self) -> None:
+        client = await self.backend.client()
+        if self.upload_id is None:
+            response = await client.create_multipart_upload(
+                Bucket=self.backend.bucket, Key=self.key, ContentType=self.content_type
+            )
+            self.upload_id = response["UploadId"]
+
+        body, self.buffer = bytes(self.buffer), bytearray()
+        part_number = len(self.part_tasks) + 1
+        await self.slots.acquire()
+        self.part_tasks.append(
+            asyncio.create_task(self._upload_part(client, part_number, body))
+        )
+
+    async def _upload_part(self, client: Any, part_number: int, body: bytes) -> None:
+        try:
+            response = await client.upload_part(
+                Bucket=self.backend.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+            self.parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+        finally:
+            self.slots.release()
+
+    def _raise_failed_parts(self) -> None:
+        for task in self.part_tasks:
+            if task.done() and not task.cancelled():
+                error = task.exception()
+                if error is not None:
+                    raise error
+
+    async def _complete(self) -> str:
+        client = await self.backend.client()
+        if self.upload_id is None:
+            await client.put_object(
+                Bucket=self.backend.bucket,
+                Key=self.key,
+                Body=bytes(self.buffer),
+                ContentType=self.content_type,
+            )
+            self.buffer.clear()
+        else:
+            if self.buffer:
+                await self._start_part()
+            await asyncio.gather(*self.part_tasks)
+            await client.complete_multipart_upload(
+                Bucket=self.backend.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                MultipartUpload={
+                    "Parts": sorted(self.parts, key=lambda p: p["PartNumber"])
+                },
+            )
+        return self.backend.url_for(self.key)
+
+    async def abort(self) -> None:
+        for task in self.part_tasks:
+            task.cancel()
+        await asyncio.gather(*self.part_tasks, return_exceptions=True)
+        self.buffer.clear()
+        if self.upload_id is None:
+            return
+        try:
+            client = await self.backend.client()
+            await client.abort_multipart_upload(
+                Bucket=self.backend.bucket, Key=self.key, UploadId=self.upload_id
+            )
+        except Exception as e:
+            logger.warning("Multipart abort failed", key=self.key, error=str(e))
+
+
+class S3Storage(StorageBackend):
+    """
+    S3 / Cloudflare R2 / S3-compatible backend
+
+    One client (and its connection pool) is shared by every upload in the
+    process and closed on shutdown.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        region: str,
+        access_key_id: str,
+        secret_access_key: str,
+        endpoint_url: Optional[str] = None,
+        public_url: str = "",
+    ):
+        self.bucket = bucket
+        self.region = region
+        self.public_url = public_url.rstrip("/")
+        self.endpoint_url = endpoint_url
+        self.session = aioboto3.Session()
+        self.client_kwargs: Dict[str, Any] = {
+            "region_name": region,
+            "aws_access_key_id": access_key_id,
+            "aws_secret_access_key": secret_access_key,
+            "config": AioConfig(
+                max_pool_connections=settings.STORAGE_MAX_POOL_CONNECTIONS
+            ),
+        }
+        if endpoint_url:
+            self.client_kwargs["endpoint_url"] = endpoint_url
+        self._client: Any = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._client_lock = asyncio.Lock()
+
+    async def client(self) -> Any:
+        """Shared S3 client, created on first use"""
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    stack = AsyncExitStack()
+                    self._client = await stack.enter_async_context(
+                        self.session.client("s3", **self.client_kwargs)
+                    )
+                    self._exit_stack = stack
+        return self._client
+
+    async def close(self) -> None:
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._client = None
+        self._exit_stack = None
+
+    async def open_upload(self, key: str, content_type: str) -> StorageUpload:
+        return S3Upload(
+            self,
+            key,
+            content_type,
+            part_size=settings.STORAGE_PART_SIZE,
+            max_concurrency=settings.STORAGE_MAX_CONCURRENT_PARTS,
+        )
+
+    def url_for(self, key: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{key}"
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
+
+    async def presigned_url(self, key: str, expires_in: Optional[int] = None) -> str:
+        client = await self.client()
+        url: str = await client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=expires_in or settings.STORAGE_PRESIGN_TTL,
+        )
+        return url
+
+    async def read(self, key: str) -> AsyncIterator[bytes]:
+        client = await self.client()
+        response = await client.get_object(Bucket=self.bucket, Key=key)
+        body = response["Body"]
+        try:
+            async for chunk in body.iter_chunks(READ_CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+
+class BackgroundUpload:
+    """
+    Feeds an upload from a bounded queue on a background task
+
+    Lets a producer forward chunks to a client while storage writes happen
+    concurrently; ``put`` only blocks when storage falls ``max_pending`` chunks
+    behind, which keeps memory per stream flat.
+    """
+
+    def __init__(self, upload: StorageUpload, max_pending: int = 16):
+        self.upload = upload
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(max_pending)
+        self.writer = asyncio.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while True:
+            chunk = await self.queue.get()
+            if chunk is None:
+                return
+            await self.upload.write(chunk)
+
+    async def _enqueue(self, chunk: Optional[bytes]) -> None:
+        """Queue a chunk, raising the writer's error if it stops first"""
+        if self.writer.done():
+            # Surface storage errors to the producer
+            self.writer.result()
+        put = asyncio.ensure_future(self.queue.put(chunk))
+        try:
+            await asyncio.wait({put, self.writer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not put.done():
+                put.cancel()
+        if not put.done() or put.cancelled():
+            # The writer ended while the queue was full and nothing will drain it
+            self.writer.result()
+            raise RuntimeError("Upload writer stopped before the stream ended")
+
+    async def put(self, chunk: bytes) -> None:
+        await self._enqueue(chunk)
+
+    async def close(self) -> StoredObject:
+        """Flush pending chunks and complete the upload"""
+        await self._enqueue(None)
+        await self.writer
+        return await self.upload.complete()
+
+    async def abort(self) -> None:
+        self.writer.cancel()
+        await asyncio.gather(self.writer, return_exceptions=True)
+        await self.upload.abort()
+
+
+_storage: Optional[StorageBackend] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Pooled HTTP client for downloading vendor-hosted outputs"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, read=300.0), follow_redirects=True
+        )
+    return _http_client
+
+
+def get_storage() -> StorageBackend:
+    """Process-wide storage backend selected by settings.STORAGE_BACKEND"""
+    global _storage
+    if _storage is None:
+        if settings.STORAGE_BACKEND == "s3":
+            _storage = S3Storage(
+                bucket=settings.AWS_S3_BUCKET,
+                region=settings.AWS_REGION,
+                access_key_id=settings.AWS_ACCESS_KEY_ID,
+                secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                endpoint_url=settings.S3_ENDPOINT_URL or None,
+                public_url=settings.STORAGE_PUBLIC_URL,
+            )
+        elif settings.STORAGE_BACKEND == "r2":
+            _storage = S3Storage(
+                bucket=settings.R2_BUCKET,
+                region="auto",
+                access_key_id=settings.R2_ACCESS_KEY_ID,
+                secret_access_key=settings.R2_SECRET_ACCESS_KEY,
+                endpoint_url=f"https://{settings.R2_ACCOUNT_ID}.r2.cloudflarestorage.com",
+                public_url=settings.STORAGE_PUBLIC_URL,
+            )
+        else:
+            _storage = LocalStorage(
+                settings.STORAGE_LOCAL_DIR, public_url=settings.STORAGE_PUBLIC_URL
+            )
+    return _storage
+
+
+async def close_storage() -> None:
+    """Close pooled storage and HTTP connections"""
+    global _storage, _http_client
+    if _storage is not None:
+        await _storage.close()
+        _storage = None
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
@@ -2,18 +2,103 @@
 Dramatiq task queue workers for GPU-intensive operations
 """
 
+import asyncio
+import concurrent.futures
+from typing import Any, Dict, Optional
 import dramatiq
+from dramatiq.asyncio import get_event_loop_thread
 from dramatiq.brokers.redis import RedisBroker
+from dramatiq.middleware import CurrentMessage
+from dramatiq.middleware.asyncio import AsyncIO
 import structlog
 from app.core.config import settings
+from app.core.redis import get_redis
+from app.core.telemetry import mark_process_dead, sweep_dead_processes
 
 logger = structlog.get_logger()
 
-# Configure Redis broker
+
+class ProviderSetup(dramatiq.Middleware):
+    """
+    Register provider adapters with the router in each worker process and
+    flush its provider metrics from the worker event loop
+    """
+
+    def __init__(self) -> None:
+        self.metrics_flush: Optional[concurrent.futures.Future] = None
+
+    def after_process_boot(self, broker: dramatiq.Broker) -> None:
+        from app.orchestrator import model_router, register_default_providers
+
+        register_default_providers(model_router)
+
+    def after_worker_boot(
+        self, broker: dramatiq.Broker, worker: dramatiq.Worker
+    ) -> None:
+        from app.orchestrator import model_router
+
+        event_loop_thread = get_event_loop_thread()
+        assert event_loop_thread is not None, "AsyncIO middleware is not set up"
+        self.metrics_flush = asyncio.run_coroutine_threadsafe(
+            model_router.metrics_flusher.flush_periodically(
+                settings.METRICS_FLUSH_INTERVAL
+            ),
+            event_loop_thread.loop,
+        )
+
+    def before_worker_shutdown(
+        self, broker: dramatiq.Broker, worker: dramatiq.Worker
+    ) -> None:
+        from app.orchestrator import model_router
+
+        event_loop_thread = get_event_loop_thread()
+        if self.metrics_flush is not None and event_loop_thread is not None:
+            self.metrics_flush.cancel()
+            event_loop_thread.run_coroutine(model_router.metrics_flusher.flush())
+
+
+class MetricsCleanup(dramatiq.Middleware):
+    """Keep exited worker processes out of the shared Prometheus gauges"""
+
+    def after_process_boot(self, broker: dramatiq.Broker) -> None:
+        sweep_dead_processes()
+
+    def after_worker_shutdown(
+        self, broker: dramatiq.Broker, worker: dramatiq.Worker
+    ) -> None:
+        mark_process_dead()
+
+
+# Configure Redis broker (AsyncIO runs the async actors on a worker event loop)
 redis_broker = RedisBroker(url=settings.REDIS_URL)
+redis_broker.add_middleware(AsyncIO())
+redis_broker.add_middleware(CurrentMessage())
+redis_broker.add_middleware(ProviderSetup())
+redis_broker.add_middleware(MetricsCleanup())
 dramatiq.set_broker(redis_broker)
 
 
+def final_attempt() -> bool:
+    """True when the message being processed will not be retried on failure"""
+    message = CurrentMessage.get_current_message()
+    if message is None:
+        return True
+    actor = redis_broker.get_actor(message.actor_name)
+    max_retries = message.options.get("max_retries", actor.options["max_retries"])
+    return bool(message.options.get("retries", 0) >= max_retries)
+
+
+async def _record_failure(generation_id: str, error: Exception) -> None:
+    """Note a long video error; on the last attempt the generation fails"""
+    from app.models.generation import GenerationStatus
+    from app.services import long_video
+
+    fields: Dict[str, Any] = {"error_message": str(error)}
+    if final_attempt():
+        fields["status"] = GenerationStatus.FAILED
+    await long_video.update_generation(generation_id, **fields)
+
+
 @dramatiq.actor(max_retries=3, time_limit=600000)  # 10 minute timeout
 async def train_voice_model(model_id: str, training_data_url: str):
     """
@@ -44,40 +129,177 @@ async def train_face_model(model_id: str, training_data_url: str):
     logger.info("Face model training completed", model_id=model_id)
 
 
-@dramatiq.actor(max_retries=3, time_limit=600000)
+@dramatiq.actor(max_retries=3, time_limit=3600000)  # 1 hour timeout
 async def generate_long_video(generation_id: str, payload: dict):
     """
     Generate long-form video (GPU task)
     
-    Long videos should never run in API request context
+    Long videos should never run in API request context. Scenes render in
+    parallel and are checkpointed, so a retry only redoes missing segments.
+    With a public WEBHOOK_BASE_URL and a webhook secret, segments are
+    submitted as Replicate predictions and the actor returns at once;
+    completion webhooks collect them and polling only covers late webhooks.
     """
+    from app.models.generation import GenerationStatus
+    from app.orchestrator import model_router
+    from app.services import long_video
+
     logger.info("Starting long video generation", generation_id=generation_id)
+    await long_video.update_generation(
+        generation_id, status=GenerationStatus.PROCESSING
+    )
 
-    # TODO: Implement long video generation
-    # 1. Send to video generation provider
-    # 2. Poll for completion
-    # 3. Download and store result
-    # 4. Update generation status
+    try:
+        if (
+            settings.WEBHOOK_BASE_URL
+            and settings.REPLICATE_WEBHOOK_SECRET
+            and "replicate" in model_router.providers
+        ):
+            if await long_video.submit_segments(generation_id, payload):
+                poll_long_video.send_with_options(
+                    args=(generation_id, settings.WEBHOOK_GRACE_SECONDS),
+                    delay=settings.WEBHOOK_GRACE_SECONDS * 1000,
+                )
+            else:
+                stitch_long_video.send(generation_id)
+            logger.info("Long video segments submitted", generation_id=generation_id)
+            return
+
+        result = await long_video.generate_long_video(generation_id, payload)
+    except Exception as e:
+        await _record_failure(generation_id, e)
+        raise
+    await long_video.complete_generation(generation_id, result)
 
     logger.info("Long video generation completed", generation_id=generation_id)
 
 
-@dramatiq.actor
+@dramatiq.actor(max_retries=5)
+async def collect_video_segment(prediction_id: str):
+    """
+    Store a finished segment prediction announced by webhook
+
+    The prediction is fetched from Replicate rather than taken from the
+    webhook body. Once retries run out the generation is marked failed.
+    """
+    from app.orchestrator import model_router
+    from app.providers.replicate_adapter import FINAL_STATUSES
+    from app.services import long_video
+
+    try:
+        provider = model_router.providers["replicate"]
+        prediction = await provider.get_prediction(prediction_id)
+        if prediction["status"] not in FINAL_STATUSES:
+            raise RuntimeError(f"Prediction {prediction_id} is still running")
+        stitch = await long_video.handle_prediction(prediction)
+    except Exception as e:
+        if final_attempt():
+            await long_video.abandon_prediction(prediction_id, str(e))
+        raise
+    segment = await long_video.tracked_prediction(prediction_id) if stitch else None
+    if segment is not None:
+        stitch_long_video.send(segment["generation_id"])
+
+
+@dramatiq.actor(max_retries=5)
+async def poll_long_video(generation_id: str, interval: int):
+    """
+    Fallback for late webhooks: collect finished predictions by polling
+
+    Backs off exponentially up to WEBHOOK_POLL_MAX_INTERVAL while renders run.
+    """
+    from app.services import long_video
+
+    running, stitch = await long_video.poll_pending(generation_id)
+    if stitch:
+        stitch_long_video.send(generation_id)
+    if running:
+        next_interval = min(interval * 2, settings.WEBHOOK_POLL_MAX_INTERVAL)
+        poll_long_video.send_with_options(
+            args=(generation_id, next_interval), delay=interval * 1000
+        )
+
+
+@dramatiq.actor(max_retries=3, time_limit=1800000)  # 30 minute timeout
+async def stitch_long_video(generation_id: str):
+    """Concatenate a long video's rendered segments"""
+    from app.services import long_video
+
+    try:
+        await long_video.stitch_job(generation_id)
+    except Exception as e:
+        await _record_failure(generation_id, e)
+        raise
+
+
+@dramatiq.actor(max_retries=3, time_limit=3600000)  # 1 hour timeout
 async def batch_content_generation(user_id: str, batch_config: dict):
     """
     AI agent batch content generation workflow
     
-    Example: Generate 10 reels with voice, video, and captions
+    Example: Generate 10 reels with voice, video, and captions.
+    Stages run as a pipeline, so reels overlap; a retry resumes from the
+    stages that already completed. While captions wait on the OpenAI Batch
+    API the run is re-sent every OPENAI_BATCH_POLL_SECONDS to package them.
     """
+    from app.services.content_pipeline import build_items, content_pipeline, run_id_for
+
+    run_id = run_id_for(user_id, batch_config)
+    items = build_items(user_id, run_id, batch_config)
     logger.info(
-        "Starting batch content generation", user_id=user_id, count=batch_config.get("count")
+        "Starting batch content generation",
+        user_id=user_id,
+        run_id=run_id,
+        count=len(items),
     )
 
-    # TODO: Implement agent workflow
-    # 1. Generate scripts
-    # 2. Generate voice for each
-    # 3. Generate videos in parallel
-    # 4. Create captions
-    # 5. Package for social platforms
+    results = await content_pipeline.run(run_id, items)
+
+    failed = [r for r in results if r["status"] == "failed"]
+    if failed:
+        # Raising lets Dramatiq retry; finished stages are not redone
+        raise RuntimeError(f"{len(failed)} of {len(results)} reels failed")
+
+    deferred = [r for r in results if r["status"] == "deferred"]
+    if deferred:
+        batch_content_generation.send_with_options(
+            args=(user_id, batch_config),
+            delay=settings.OPENAI_BATCH_POLL_SECONDS * 1000,
+        )
+        logger.info(
+            "Batch content generation waiting on batched stages",
+            run_id=run_id,
+            deferred=len(deferred),
+        )
+        return
+
+    logger.info("Batch content generation completed", user_id=user_id, run_id=run_id)
+
+
+@dramatiq.actor(max_retries=5)
+async def submit_openai_batches():
+    """Submit queued low-priority text requests to the OpenAI Batch API"""
+    from app.orchestrator import model_router, offline_batch
+
+    await offline_batch.submit_pending(model_router.providers["openai"])
+
+
+@dramatiq.actor(max_retries=5)
+async def poll_openai_batches():
+    """
+    Collect finished OpenAI batches into their Generation rows
+
+    Re-enqueues itself until no submitted batch is left running.
+    """
+    from app.orchestrator import model_router, offline_batch
+
+    running = await offline_batch.poll_active(model_router.providers["openai"])
+    if running:
+        await offline_batch.reschedule_poll()
+        return
 
-    logger.info("Batch content generation completed", user_id=user_id)
+    # Stop polling, unless a batch was submitted while we were collecting
+    redis = get_redis()
+    await redis.delete(offline_batch.POLL_KEY)
+    if await redis.hlen(offline_batch.ACTIVE_KEY):
+        await offline_batch.schedule_poll()
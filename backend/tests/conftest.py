@@ -0,0 +1,53 @@
+"""
+Shared fixtures
+Tests run against local stand-ins: SQLite for PostgreSQL, fakeredis for Redis
+and the local storage backend for S3/R2.
+"""
+
+import os
+
+# Settings are read at import time, so point them at the stand-ins first
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("STORAGE_BACKEND", "local")
+
+import fakeredis  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app import models  # noqa: E402,F401
+from app.core import redis as redis_module  # noqa: E402
+from app.core.database import Base  # noqa: E402
+from app.services import storage as storage_module  # noqa: E402
+from app.services.storage import LocalStorage  # noqa: E402
+
+
+@pytest.fixture
+async def redis():
+    """In-memory Redis behind ``get_redis``"""
+    client = fakeredis.aioredis.FakeRedis()
+    redis_module._client = client
+    yield client
+    redis_module._client = None
+    await client.aclose()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Local storage under a temporary directory behind ``get_storage``"""
+    backend = LocalStorage(str(tmp_path / "storage"))
+    storage_module._storage = backend
+    yield backend
+    storage_module._storage = None
+
+
+@pytest.fixture
+async def db(tmp_path):
+    """Session factory for a fresh SQLite database with every table"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
@@ -0,0 +1,94 @@
+import pytest
+
+from app.orchestrator import circuit_breaker
+from app.orchestrator.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def make_breaker(**overrides) -> CircuitBreaker:
+    options = dict(
+        failure_rate=0.5,
+        min_calls=4,
+        window=10,
+        consecutive_failures=3,
+        open_seconds=30.0,
+        half_open_probes=1,
+    )
+    options.update(overrides)
+    return CircuitBreaker("test:generate_text", **options)
+
+
+def test_trips_on_consecutive_failures(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.is_open
+    assert not breaker.allow()
+
+
+def test_trips_on_failure_rate_after_min_calls(clock):
+    breaker = make_breaker(consecutive_failures=100)
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_successful_probe_closes(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == CircuitState.HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow()
+
+
+def test_released_probe_frees_its_slot(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow()
@@ -0,0 +1,133 @@
+import uuid
+from typing import Any, Dict, Optional
+
+import pytest
+
+from app.core.config import settings
+from app.models.generation import Generation, GenerationStatus
+from app.orchestrator import offline_batch
+from app.orchestrator.model_router import ModelRouter
+from app.orchestrator.pipeline import Pipeline, Stage
+from app.services import content_pipeline
+from app.workers import tasks
+
+
+class OpenAIStandIn:
+    """Synchronous chat and Batch API in one provider"""
+
+    capabilities = frozenset({"generate_text"})
+
+    def __init__(self):
+        self.calls = 0
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.finished: Dict[str, Dict[str, Any]] = {}
+
+    async def generate_text(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        return {"text": "sync caption", "cost": 0.01}
+
+    async def submit_batch(self, requests: Dict[str, Any]) -> str:
+        batch_id = f"batch-{len(self.batches)}"
+        self.batches[batch_id] = requests
+        return batch_id
+
+    async def fetch_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        return self.finished.get(batch_id)
+
+
+class Actor:
+    def send(self, *args):
+        pass
+
+    def send_with_options(self, **options):
+        pass
+
+
+async def script(item, inputs):
+    return {"text": f"script {item['index']}"}
+
+
+async def package(item, inputs):
+    return {"caption": inputs["captions"]["text"]}
+
+
+pipeline = Pipeline(
+    [
+        Stage("script", script),
+        Stage("captions", content_pipeline.write_captions, ("script",)),
+        Stage("package", package, ("captions",)),
+    ]
+)
+
+
+@pytest.fixture
+def openai(db, redis, storage, monkeypatch):
+    monkeypatch.setattr(settings, "SINGLEFLIGHT_DISTRIBUTED", False)
+    monkeypatch.setattr(content_pipeline, "AsyncSessionLocal", db)
+    monkeypatch.setattr(offline_batch, "AsyncSessionLocal", db)
+    monkeypatch.setattr(tasks, "submit_openai_batches", Actor())
+    monkeypatch.setattr(tasks, "poll_openai_batches", Actor())
+    provider = OpenAIStandIn()
+    router = ModelRouter()
+    router.register_provider("openai", provider)
+    monkeypatch.setattr(content_pipeline, "model_router", router)
+    return provider
+
+
+def items(count: int):
+    return [
+        {"index": index, "run_id": "run-1", "user_id": "user-1"}
+        for index in range(count)
+    ]
+
+
+async def test_captions_wait_for_the_batch_then_resume(db, openai):
+    first = await pipeline.run("run-1", items(2))
+
+    assert [result["status"] for result in first] == ["deferred", "deferred"]
+    assert openai.calls == 0
+    async with db() as session:
+        generations = (await session.execute(Generation.__table__.select())).all()
+    assert len(generations) == 2
+
+    # Re-running while the batch is pending queues nothing new
+    await pipeline.run("run-1", items(2))
+    [batch_id] = await offline_batch.submit_pending(openai)
+
+    generation_ids = [
+        str(uuid.uuid5(uuid.NAMESPACE_URL, f"run-1/{index}/captions"))
+        for index in range(2)
+    ]
+    assert sorted(openai.batches[batch_id]) == sorted(generation_ids)
+    openai.finished[batch_id] = {
+        generation_ids[0]: {
+            "status": "success",
+            "text": "batched caption",
+            "model": "gpt-4o-mini",
+            "tokens": 20,
+            "cost": 0.002,
+            "latency": 30.0,
+        },
+        generation_ids[1]: {"status": "failed", "error": "content filtered"},
+    }
+    await offline_batch.poll_active(openai)
+
+    results = await pipeline.run("run-1", items(2))
+
+    assert results[0]["status"] == "completed"
+    assert results[0]["outputs"]["package"] == {"caption": "batched caption"}
+    assert results[1]["status"] == "failed"
+    assert "content filtered" in results[1]["error"]
+    async with db() as session:
+        row = await session.get(Generation, generation_ids[0])
+    assert row.status == GenerationStatus.COMPLETED
+
+
+async def test_captions_run_synchronously_without_batching(openai, monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_BATCH_ENABLED", False)
+
+    [result] = await pipeline.run("run-2", items(1))
+
+    assert result["status"] == "completed"
+    assert result["outputs"]["captions"] == {"text": "sync caption"}
+    assert openai.calls == 1
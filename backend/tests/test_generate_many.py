@@ -0,0 +1,103 @@
+import asyncio
+from typing import Any, Dict
+
+import pytest
+
+from app.core.config import settings
+from app.orchestrator.model_router import ModelRouter
+
+
+class CountingProvider:
+    capabilities = frozenset({"generate_text"})
+
+    def __init__(self, fail_first: int = 0):
+        self.running = 0
+        self.peak = 0
+        self.calls = 0
+        self.fail_first = fail_first
+
+    async def generate_text(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(0.01)
+            if self.calls <= self.fail_first:
+                raise ValueError("rejected")
+            return {"text": payload["prompt"], "cost": 0.0}
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def router(monkeypatch) -> ModelRouter:
+    monkeypatch.setattr(settings, "SINGLEFLIGHT_DISTRIBUTED", False)
+    monkeypatch.setattr(settings, "CACHE_ENABLED", False)
+    return ModelRouter()
+
+
+def requests(count: int):
+    return (
+        {
+            "task": "generate_text",
+            "payload": {"prompt": str(index)},
+            "providers": ["vendor"],
+        }
+        for index in range(count)
+    )
+
+
+async def test_bounded_concurrency_and_indexes(router):
+    provider = CountingProvider()
+    router.register_provider("vendor", provider)
+
+    results = [
+        result async for result in router.generate_many(requests(20), concurrency=4)
+    ]
+
+    assert provider.peak <= 4
+    assert sorted(result["index"] for result in results) == list(range(20))
+    assert all(result["text"] == str(result["index"]) for result in results)
+
+
+async def test_pulls_requests_only_as_slots_free(router):
+    router.register_provider("vendor", CountingProvider())
+    pulled = 0
+
+    async def source():
+        nonlocal pulled
+        for request in requests(100):
+            pulled += 1
+            yield request
+
+    batch = router.generate_many(source(), concurrency=3)
+    await batch.__anext__()
+    # Three in flight plus the one that replaced the finished item at most
+    assert pulled <= 4
+    await batch.aclose()
+
+
+async def test_per_provider_concurrency(router):
+    provider = CountingProvider()
+    router.register_provider("vendor", provider)
+
+    async for _ in router.generate_many(
+        requests(12), concurrency=12, provider_concurrency=2
+    ):
+        pass
+
+    assert provider.peak == 2
+
+
+async def test_failed_items_do_not_stop_the_batch(router):
+    router.register_provider("vendor", CountingProvider(fail_first=1))
+
+    results = [
+        result
+        async for result in router.generate_many(
+            requests(5), concurrency=1, item_retries=0
+        )
+    ]
+
+    assert [result["status"] for result in results].count("failed") == 1
+    assert len(results) == 5
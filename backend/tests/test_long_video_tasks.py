@@ -0,0 +1,58 @@
+import pytest
+
+from app.core.config import settings
+from app.models.generation import Generation, GenerationStatus, GenerationType
+from app.services import long_video
+from app.workers import tasks
+
+generate_long_video = tasks.generate_long_video.fn.__wrapped__
+
+
+@pytest.fixture
+async def generation(db, redis, storage, monkeypatch):
+    monkeypatch.setattr(long_video, "AsyncSessionLocal", db)
+    monkeypatch.setattr(settings, "WEBHOOK_BASE_URL", "")
+
+    async def render(generation_id, payload):
+        raise RuntimeError("render failed")
+
+    monkeypatch.setattr(long_video, "generate_long_video", render)
+    async with db() as session:
+        session.add(
+            Generation(
+                id="gen-1",
+                user_id="user-1",
+                type=GenerationType.VIDEO,
+                provider="replicate",
+                status=GenerationStatus.QUEUED,
+            )
+        )
+        await session.commit()
+    return "gen-1"
+
+
+async def load(db, generation_id):
+    async with db() as session:
+        return await session.get(Generation, generation_id)
+
+
+async def test_retryable_failure_keeps_processing(db, generation, monkeypatch):
+    monkeypatch.setattr(tasks, "final_attempt", lambda: False)
+
+    with pytest.raises(RuntimeError):
+        await generate_long_video(generation, {"script": "scene"})
+
+    row = await load(db, generation)
+    assert row.status == GenerationStatus.PROCESSING
+    assert row.error_message == "render failed"
+
+
+async def test_last_attempt_marks_failed(db, generation, monkeypatch):
+    monkeypatch.setattr(tasks, "final_attempt", lambda: True)
+
+    with pytest.raises(RuntimeError):
+        await generate_long_video(generation, {"script": "scene"})
+
+    row = await load(db, generation)
+    assert row.status == GenerationStatus.FAILED
+    assert row.error_message == "render failed"
@@ -0,0 +1,159 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.orchestrator.exceptions import UnsupportedTaskError
+from app.orchestrator.model_router import ModelRouter
+
+
+class VendorError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeProvider:
+    """Text-only adapter that fails with ``error`` when one is set"""
+
+    capabilities = frozenset({"generate_text"})
+
+    def __init__(self, error: Optional[Exception] = None):
+        self.error = error
+        self.calls = 0
+
+    async def generate_text(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return {"text": "ok", "cost": 0.001}
+
+    async def generate_image(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class DuckTypedProvider:
+    """Adapter without ``capabilities``; indexed by the methods it defines"""
+
+    async def generate_image(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {"image_url": "https://example.com/i.png", "cost": 0.01}
+
+
+@pytest.fixture
+def router() -> ModelRouter:
+    return ModelRouter()
+
+
+def test_indexes_declared_capabilities_only(router):
+    router.register_provider("text", FakeProvider())
+    router.register_provider("images", DuckTypedProvider())
+
+    assert router.supports("text", "generate_text")
+    assert not router.supports("text", "generate_image")
+    assert router.supports("images", "generate_image")
+    assert not router.supports("images", "generate_text")
+
+
+def test_reregistering_replaces_capabilities(router):
+    router.register_provider("vendor", FakeProvider())
+    router.register_provider("vendor", DuckTypedProvider())
+
+    assert not router.supports("vendor", "generate_text")
+    assert router.supports("vendor", "generate_image")
+
+
+async def test_unsupported_task_is_rejected_without_a_call(router):
+    router.register_provider("images", DuckTypedProvider())
+
+    with pytest.raises(UnsupportedTaskError):
+        await router._execute_single("generate_text", {}, "images")
+
+
+async def test_fails_over_after_retryable_error(router):
+    down = FakeProvider(VendorError(503))
+    backup = FakeProvider()
+    router.register_provider("down", down)
+    router.register_provider("backup", backup)
+
+    result = await router._execute_sequential(
+        "generate_text", {"prompt": "hi"}, ["down", "backup"], max_retries=1
+    )
+
+    assert result["status"] == "success"
+    assert result["provider"] == "backup"
+    assert down.calls == 1
+    assert router.metrics["down"]["generate_text"].failures == 1
+
+
+async def test_non_retryable_error_is_not_retried(router):
+    rejecting = FakeProvider(VendorError(400))
+    backup = FakeProvider()
+    router.register_provider("rejecting", rejecting)
+    router.register_provider("backup", backup)
+
+    result = await router._execute_sequential(
+        "generate_text", {"prompt": "hi"}, ["rejecting", "backup"], max_retries=3
+    )
+
+    assert result["provider"] == "backup"
+    assert rejecting.calls == 1
+    # A bad request says nothing about the provider's health
+    assert router.breakers.get("rejecting", "generate_text").failure_streak == 0
+
+
+async def test_all_providers_failing(router):
+    router.register_provider("a", FakeProvider(VendorError(400)))
+    router.register_provider("b", FakeProvider(ValueError("bad payload")))
+
+    result = await router._execute_sequential(
+        "generate_text", {"prompt": "hi"}, ["a", "b"], max_retries=3
+    )
+
+    assert result == {"status": "failed", "error": "All providers failed"}
+
+
+class SlowProvider(FakeProvider):
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    async def generate_text(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(self.delay)
+        return await super().generate_text(payload)
+
+
+def hedges(provider: str, outcome: str) -> float:
+    labels = {"task": "generate_text", "provider": provider, "outcome": outcome}
+    return REGISTRY.get_sample_value("router_hedges_total", labels) or 0.0
+
+
+async def test_hedged_backup_win_is_counted(router, monkeypatch):
+    monkeypatch.setattr(settings, "HEDGE_DEFAULT_DELAY", 0.02)
+    router.register_provider("slow", SlowProvider(5))
+    router.register_provider("fast", FakeProvider())
+    fired, won = hedges("fast", "fired"), hedges("fast", "won")
+
+    result = await router._execute_hedged(
+        "generate_text", {"prompt": "hi"}, ["slow", "fast"], max_retries=1
+    )
+
+    assert result["status"] == "success"
+    assert hedges("fast", "fired") == fired + 1
+    assert hedges("fast", "won") == won + 1
+
+
+async def test_fast_primary_does_not_hedge(router, monkeypatch):
+    monkeypatch.setattr(settings, "HEDGE_DEFAULT_DELAY", 1.0)
+    backup = FakeProvider()
+    router.register_provider("primary", FakeProvider())
+    router.register_provider("backup", backup)
+    fired = hedges("backup", "fired")
+
+    await router._execute_hedged(
+        "generate_text", {"prompt": "hi"}, ["primary", "backup"], max_retries=1
+    )
+
+    assert hedges("backup", "fired") == fired
+    assert backup.calls == 0
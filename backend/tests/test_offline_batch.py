@@ -0,0 +1,152 @@
+import json
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from app.core.config import settings
+from app.models.generation import Generation, GenerationStatus, GenerationType
+from app.orchestrator import offline_batch
+from app.workers import tasks
+
+
+class BatchProvider:
+    """Stand-in for the OpenAI Batch API"""
+
+    def __init__(self):
+        self.submitted: Dict[str, Dict[str, Any]] = {}
+        self.finished: Dict[str, Dict[str, Any]] = {}
+
+    async def submit_batch(self, requests: Dict[str, Any]) -> str:
+        batch_id = f"batch-{len(self.submitted)}"
+        self.submitted[batch_id] = requests
+        return batch_id
+
+    async def fetch_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        return self.finished.get(batch_id)
+
+
+class Sent:
+    def __init__(self):
+        self.messages: List[Dict[str, Any]] = []
+
+    def send(self, *args):
+        self.messages.append({})
+
+    def send_with_options(self, **options):
+        self.messages.append(options)
+
+
+@pytest.fixture
+def actors(monkeypatch):
+    sent = {"submit": Sent(), "poll": Sent()}
+    monkeypatch.setattr(tasks, "submit_openai_batches", sent["submit"])
+    monkeypatch.setattr(tasks, "poll_openai_batches", sent["poll"])
+    return sent
+
+
+@pytest.fixture
+async def generations(db, redis, storage, monkeypatch):
+    monkeypatch.setattr(offline_batch, "AsyncSessionLocal", db)
+    monkeypatch.setattr(settings, "OPENAI_BATCH_MAX_REQUESTS", 2)
+    ids = [f"gen-{index}" for index in range(3)]
+    async with db() as session:
+        session.add_all(
+            Generation(
+                id=generation_id,
+                user_id="user-1",
+                type=GenerationType.TEXT,
+                provider="openai",
+                status=GenerationStatus.QUEUED,
+            )
+            for generation_id in ids
+        )
+        await session.commit()
+    return ids
+
+
+async def load(db, generation_id: str) -> Generation:
+    async with db() as session:
+        return await session.get(Generation, generation_id)
+
+
+async def test_enqueue_schedules_one_flush_then_submits_when_full(
+    redis, generations, actors
+):
+    await offline_batch.enqueue("gen-0", {"prompt": "a"})
+    await offline_batch.enqueue("gen-0", {"prompt": "a"})
+
+    submit = actors["submit"].messages
+    assert submit == [{"delay": settings.OPENAI_BATCH_FLUSH_SECONDS * 1000}, {}]
+    assert await redis.llen(offline_batch.PENDING_KEY) == 2
+
+
+async def test_submit_and_collect(db, redis, generations, actors):
+    provider = BatchProvider()
+    for generation_id in generations:
+        await offline_batch.enqueue(generation_id, {"prompt": generation_id})
+
+    batch_ids = await offline_batch.submit_pending(provider)
+
+    assert batch_ids == ["batch-0", "batch-1"]
+    assert list(provider.submitted["batch-0"]) == ["gen-0", "gen-1"]
+    assert await redis.llen(offline_batch.PENDING_KEY) == 0
+    generation = await load(db, "gen-2")
+    assert generation.status == GenerationStatus.PROCESSING
+    assert generation.output_metadata == {"batch_id": "batch-1"}
+    # One polling loop, and its marker expires if the loop is lost
+    assert len(actors["poll"].messages) == 1
+    assert (
+        0
+        < await redis.ttl(offline_batch.POLL_KEY)
+        <= (settings.OPENAI_BATCH_POLL_SECONDS * offline_batch.POLL_KEY_INTERVALS)
+    )
+
+    provider.finished["batch-0"] = {
+        "gen-0": {
+            "status": "success",
+            "text": "hello",
+            "model": "gpt-4o-mini",
+            "tokens": 12,
+            "cost": 0.001,
+            "latency": 2.5,
+        }
+    }
+    assert await offline_batch.poll_active(provider) == 1
+
+    completed = await load(db, "gen-0")
+    assert completed.status == GenerationStatus.COMPLETED
+    assert completed.output_metadata["text"] == "hello"
+    assert completed.cost == 0.001
+    missing = await load(db, "gen-1")
+    assert missing.status == GenerationStatus.FAILED
+    assert missing.error_message == "Missing from batch output"
+    assert json.loads(await redis.hget(offline_batch.ACTIVE_KEY, "batch-1")) == [
+        "gen-2"
+    ]
+    assert not await redis.hexists(offline_batch.ACTIVE_KEY, "batch-0")
+
+
+async def test_failed_submission_requeues_in_order(redis, generations, actors):
+    class Unavailable(BatchProvider):
+        async def submit_batch(self, requests):
+            raise ConnectionError("batch API unavailable")
+
+    for generation_id in generations:
+        await offline_batch.enqueue(generation_id, {"prompt": generation_id})
+
+    with pytest.raises(ConnectionError):
+        await offline_batch.submit_pending(Unavailable())
+
+    pending = await redis.lrange(offline_batch.PENDING_KEY, 0, -1)
+    assert [json.loads(item)["generation_id"] for item in pending] == generations
+
+
+async def test_reschedule_refreshes_poll_marker(redis, actors):
+    await redis.set(offline_batch.POLL_KEY, 1, ex=1)
+
+    await offline_batch.reschedule_poll()
+
+    assert await redis.ttl(offline_batch.POLL_KEY) > 1
+    assert actors["poll"].messages == [
+        {"delay": settings.OPENAI_BATCH_POLL_SECONDS * 1000}
+    ]
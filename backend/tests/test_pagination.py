@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    page_of,
+    paginate,
+)
+from app.models.generation import Generation, GenerationType
+
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+async def generations(db):
+    # Pairs share a timestamp so the id tie-breaker is exercised
+    rows = [
+        Generation(
+            id=f"gen-{index:02d}",
+            user_id="user-1",
+            type=GenerationType.IMAGE,
+            provider="replicate",
+            created_at=START + timedelta(minutes=index // 2),
+        )
+        for index in range(25)
+    ]
+    async with db() as session:
+        session.add_all(rows)
+        await session.commit()
+    return rows
+
+
+async def fetch_page(db, cursor, limit):
+    query = paginate(
+        select(Generation), Generation.created_at, Generation.id, cursor, limit
+    )
+    async with db() as session:
+        rows = (await session.execute(query)).scalars().all()
+    return page_of(rows, limit)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(START, "gen-07")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (START, "gen-07")
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "bm8tc2VwYXJhdG9y", "%%%"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+async def test_pages_cover_every_row_once_newest_first(db, generations):
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        items, cursor = await fetch_page(db, cursor, 10)
+        seen.extend(item.id for item in items)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    expected = sorted(generations, key=lambda g: (g.created_at, g.id), reverse=True)
+    assert seen == [generation.id for generation in expected]
+
+
+async def test_exact_last_page_has_no_cursor(db, generations):
+    items, cursor = await fetch_page(db, None, 25)
+    assert len(items) == 25
+    assert cursor is None
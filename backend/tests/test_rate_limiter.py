@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.orchestrator.exceptions import RateLimitTimeout
+from app.orchestrator.rate_limiter import ProviderRateLimiter, estimate_tokens
+
+
+@pytest.fixture(params=["redis", "local"])
+def limiter(request, monkeypatch):
+    """A limiter using the shared Redis budget or the in-process fallback"""
+    distributed = request.param == "redis"
+    if distributed:
+        request.getfixturevalue("redis")
+    monkeypatch.setattr(settings, "RATE_LIMIT_DISTRIBUTED", distributed)
+    monkeypatch.setattr(settings, "RATE_LIMIT_MAX_WAIT", 0.3)
+    return ProviderRateLimiter()
+
+
+def set_limits(monkeypatch, **limits):
+    monkeypatch.setattr(settings, "PROVIDER_RATE_LIMITS", {"vendor": limits})
+
+
+def sample(name: str, provider: str = "vendor") -> float:
+    return REGISTRY.get_sample_value(name, {"provider": provider}) or 0.0
+
+
+async def test_unlimited_provider_is_not_queued(limiter, monkeypatch):
+    set_limits(monkeypatch)
+    async with limiter.slot("other"):
+        pass
+    assert sample("provider_rate_limit_wait_seconds_count", "other") == 0
+
+
+async def test_concurrency_cap(limiter, monkeypatch):
+    set_limits(monkeypatch, concurrency=2)
+    observed = sample("provider_rate_limit_wait_seconds_count")
+    running = 0
+    peak = 0
+
+    async def call():
+        nonlocal running, peak
+        async with limiter.slot("vendor"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    assert peak == 2
+    assert sample("provider_rate_limit_wait_seconds_count") == observed + 6
+
+
+async def test_times_out_when_capacity_never_frees(limiter, monkeypatch):
+    set_limits(monkeypatch, concurrency=1)
+    timeouts = sample("provider_rate_limit_timeouts_total")
+
+    async with limiter.slot("vendor"):
+        with pytest.raises(RateLimitTimeout):
+            async with limiter.slot("vendor"):
+                pass
+
+    assert sample("provider_rate_limit_timeouts_total") == timeouts + 1
+
+
+async def test_requests_per_minute(limiter, monkeypatch):
+    # Two requests a minute: a burst of two passes, the third would wait ~30s
+    set_limits(monkeypatch, rpm=2)
+    start = time.monotonic()
+    for _ in range(2):
+        async with limiter.slot("vendor"):
+            pass
+    assert time.monotonic() - start < 0.2
+
+    with pytest.raises(RateLimitTimeout):
+        async with limiter.slot("vendor"):
+            pass
+
+
+async def test_tokens_per_minute_blocks_large_requests(limiter, monkeypatch):
+    # 60 tokens/minute: after spending the bucket, the next call needs ~1s
+    set_limits(monkeypatch, tpm=60)
+
+    async with limiter.slot("vendor", tokens=60):
+        pass
+    with pytest.raises(RateLimitTimeout):
+        async with limiter.slot("vendor", tokens=60):
+            pass
+
+
+def test_estimate_tokens():
+    payload = {"messages": [{"content": "x" * 400}], "max_tokens": 50}
+    assert estimate_tokens("generate_text", payload) == 150
+    assert estimate_tokens("generate_image", payload) == 0
+
+
+def test_estimate_tokens_ignores_null_fields():
+    payload = {"prompt": None, "messages": None, "max_tokens": None}
+    assert estimate_tokens("generate_text", payload) == 1000
+    payload = {"prompt": "x" * 40, "messages": [{"content": None}]}
+    assert estimate_tokens("generate_text", payload) == 1010
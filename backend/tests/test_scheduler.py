@@ -0,0 +1,168 @@
+import asyncio
+from typing import List
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.orchestrator.scheduler import PriorityScheduler
+
+
+@pytest.fixture
+def scheduler() -> PriorityScheduler:
+    scheduler = PriorityScheduler()
+    scheduler.capacity = 4
+    scheduler.low_reserve = 2
+    scheduler.weights = {"high": 8, "normal": 4, "low": 1}
+    return scheduler
+
+
+def queued(priority: str) -> float:
+    return REGISTRY.get_sample_value("scheduler_queued", {"priority": priority})
+
+
+def preemptions() -> float:
+    return REGISTRY.get_sample_value("scheduler_preemptions_total") or 0.0
+
+
+async def hold(scheduler, priority: str, user: str, release: asyncio.Event):
+    async with scheduler.slot(priority, user):
+        await release.wait()
+
+
+async def test_low_priority_never_takes_the_reserve(scheduler):
+    release = asyncio.Event()
+    tasks = [
+        asyncio.create_task(hold(scheduler, "low", "bulk", release)) for _ in range(4)
+    ]
+    await asyncio.sleep(0)
+
+    assert scheduler.in_use == 2
+    assert queued("low") == 2
+    release.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.in_use == 0
+
+
+async def test_high_priority_is_not_queued_behind_held_back_low_work(scheduler):
+    release = asyncio.Event()
+    tasks = [
+        asyncio.create_task(hold(scheduler, "low", "bulk", release)) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    assert queued("low") == 1
+
+    # Two slots are free: neither caller should wait for a release
+    async with asyncio.timeout(1):
+        async with scheduler.slot("high", "vip"):
+            async with scheduler.slot("normal", "user"):
+                assert scheduler.in_use == 4
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+
+async def test_weighted_order_when_slots_free_up(scheduler):
+    scheduler.capacity = 1
+    scheduler.low_reserve = 0
+    admitted: List[str] = []
+    release = asyncio.Event()
+    blocker = asyncio.create_task(hold(scheduler, "normal", "blocker", release))
+    await asyncio.sleep(0)
+
+    async def record(priority: str):
+        async with scheduler.slot(priority, priority):
+            admitted.append(priority)
+
+    waiters = [
+        asyncio.create_task(record(priority))
+        for priority in ["low"] * 2 + ["normal"] * 4 + ["high"] * 8
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(blocker, *waiters)
+
+    # High work gets most early slots, but low work is not starved
+    assert admitted[0] == "high"
+    assert admitted[:7].count("high") > admitted[:7].count("normal")
+    assert "low" in admitted[:13]
+
+
+async def test_users_share_a_priority_round_robin(scheduler):
+    scheduler.capacity = 1
+    scheduler.low_reserve = 0
+    admitted: List[str] = []
+    release = asyncio.Event()
+    blocker = asyncio.create_task(hold(scheduler, "normal", "blocker", release))
+    await asyncio.sleep(0)
+
+    async def record(user: str):
+        async with scheduler.slot("normal", user):
+            admitted.append(user)
+
+    waiters = [asyncio.create_task(record("bulk")) for _ in range(5)]
+    waiters.append(asyncio.create_task(record("single")))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(blocker, *waiters)
+
+    assert admitted.index("single") == 1
+
+
+async def test_cancelled_waiter_leaves_the_queue(scheduler):
+    scheduler.capacity = 1
+    release = asyncio.Event()
+    blocker = asyncio.create_task(hold(scheduler, "normal", "a", release))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold(scheduler, "normal", "b", release))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert queued("normal") == 0
+    release.set()
+    await blocker
+    assert scheduler.in_use == 0
+
+
+async def test_high_priority_preempts_low(scheduler, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_PREEMPT_LOW", True)
+    preempted = preemptions()
+    scheduler.capacity = 1
+    scheduler.low_reserve = 0
+    attempts = 0
+    high_done = asyncio.Event()
+
+    async def low_work():
+        nonlocal attempts
+        attempts += 1
+        if not high_done.is_set():
+            await asyncio.sleep(60)
+        return "low"
+
+    low = asyncio.create_task(scheduler.run("low", "bulk", low_work))
+    await asyncio.sleep(0.01)
+
+    async def high_work():
+        return "high"
+
+    async with asyncio.timeout(1):
+        assert await scheduler.run("high", "vip", high_work) == "high"
+    high_done.set()
+
+    async with asyncio.timeout(1):
+        assert await low == "low"
+    assert attempts == 2
+    assert preemptions() == preempted + 1
+
+
+async def test_admission_waits_are_observed(scheduler):
+    before = REGISTRY.get_sample_value(
+        "scheduler_wait_seconds_count", {"priority": "high"}
+    )
+    async with scheduler.slot("high", "vip"):
+        pass
+    after = REGISTRY.get_sample_value(
+        "scheduler_wait_seconds_count", {"priority": "high"}
+    )
+    assert after == (before or 0) + 1
@@ -0,0 +1,166 @@
+import asyncio
+from typing import Any, Dict
+
+import pytest
+
+from app.core.config import settings
+from app.orchestrator.model_router import ModelRouter
+from app.orchestrator.singleflight import SingleFlight
+
+
+class SlowCall:
+    """Counts calls and returns after a short delay"""
+
+    def __init__(self, result: Dict[str, Any], delay: float = 0.05):
+        self.result = result
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self) -> Dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return dict(self.result)
+
+
+@pytest.fixture
+def local_only(monkeypatch):
+    monkeypatch.setattr(settings, "SINGLEFLIGHT_DISTRIBUTED", False)
+
+
+async def test_coalesces_concurrent_callers(local_only):
+    flight = SingleFlight()
+    call = SlowCall({"text": "shared"})
+
+    results = await asyncio.gather(*(flight.do("key", call) for _ in range(10)))
+
+    assert call.calls == 1
+    assert all(result == {"text": "shared"} for result in results)
+    assert flight.get_stats()["local_coalesced"] == 9
+    assert flight.get_stats()["in_flight"] == 0
+
+
+async def test_different_keys_run_separately(local_only):
+    flight = SingleFlight()
+    call = SlowCall({"text": "x"})
+
+    await asyncio.gather(flight.do("a", call), flight.do("b", call))
+
+    assert call.calls == 2
+
+
+async def test_one_caller_leaving_does_not_cancel_the_call(local_only):
+    flight = SingleFlight()
+    call = SlowCall({"text": "kept"}, delay=0.1)
+
+    leaving = asyncio.create_task(flight.do("key", call))
+    staying = asyncio.create_task(flight.do("key", call))
+    await asyncio.sleep(0.01)
+    leaving.cancel()
+
+    assert await staying == {"text": "kept"}
+    assert call.calls == 1
+
+
+async def test_last_caller_leaving_cancels_the_call(local_only):
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def never_finishes():
+        started.set()
+        await asyncio.sleep(60)
+
+    caller = asyncio.create_task(flight.do("key", never_finishes))
+    await started.wait()
+    task = flight.flights["key"].task
+    caller.cancel()
+    await asyncio.gather(caller, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert task.cancelled()
+
+
+async def test_coalesces_across_processes(redis):
+    leader, follower = SingleFlight(), SingleFlight()
+    call = SlowCall({"text": "remote"}, delay=0.1)
+
+    leading = [asyncio.create_task(leader.do(f"k{i}", call)) for i in range(20)]
+    await asyncio.sleep(0.02)
+    following = [asyncio.create_task(follower.do(f"k{i}", call)) for i in range(20)]
+    await asyncio.sleep(0.02)
+
+    # Every waiting key shares the follower's one pub/sub connection
+    assert len(follower.followers) == 20
+    results = await asyncio.gather(*leading, *following)
+
+    assert call.calls == 20
+    assert all(result == {"text": "remote"} for result in results)
+    assert follower.get_stats()["remote_coalesced"] == 20
+    assert follower.followers == {}
+    await leader.close()
+    await follower.close()
+
+
+async def test_follower_runs_the_call_when_leader_fails(redis):
+    leader, follower = SingleFlight(), SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("provider down")
+
+    call = SlowCall({"text": "fallback"})
+    leading = asyncio.create_task(leader.do("key", failing))
+    await asyncio.sleep(0.01)
+    following = asyncio.create_task(follower.do("key", call))
+
+    with pytest.raises(RuntimeError):
+        await leading
+    assert await following == {"text": "fallback"}
+    assert call.calls == 1
+    await leader.close()
+    await follower.close()
+
+
+async def test_next_flight_is_not_served_the_previous_result(redis):
+    first, second, follower = SingleFlight(), SingleFlight(), SingleFlight()
+    await first.do("key", SlowCall({"text": "old"}, delay=0.01))
+    # A second later the finished flight's result must be gone
+    await asyncio.sleep(1)
+
+    leading = asyncio.create_task(
+        second.do("key", SlowCall({"text": "new"}, delay=0.1))
+    )
+    await asyncio.sleep(0.02)
+
+    assert await follower.do("key", SlowCall({"text": "own"})) == {"text": "new"}
+    await leading
+    for flight in (first, second, follower):
+        await flight.close()
+
+
+class PinnedProvider:
+    capabilities = frozenset({"generate_text"})
+
+    def __init__(self, name: str):
+        self.name = name
+
+    async def generate_text(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(0.05)
+        return {"text": f"from {self.name}", "cost": 0.0}
+
+
+async def test_pinned_providers_are_not_coalesced(redis, local_only):
+    router = ModelRouter()
+    router.register_provider("a", PinnedProvider("a"))
+    router.register_provider("b", PinnedProvider("b"))
+    payload = {"prompt": "same", "temperature": 0}
+
+    first, second = await asyncio.gather(
+        router.generate("generate_text", payload, providers=["a"]),
+        router.generate("generate_text", payload, providers=["b"]),
+    )
+
+    assert first["provider"] == "a"
+    assert second["provider"] == "b"
+    # Nor is one served the other's cached result
+    cached = await router.generate("generate_text", payload, providers=["b"])
+    assert cached["provider"] == "b"
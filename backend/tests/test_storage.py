@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import os
+from typing import AsyncIterator, List
+
+import pytest
+
+from app.services.storage import BackgroundUpload
+
+
+async def _chunks(parts: List[bytes]) -> AsyncIterator[bytes]:
+    for part in parts:
+        yield part
+
+
+async def _read_all(storage, key: str) -> bytes:
+    data = bytearray()
+    async for chunk in storage.read(key):
+        data.extend(chunk)
+    return bytes(data)
+
+
+async def test_put_stream_round_trip(storage):
+    parts = [b"a" * 100_000, b"b" * 50_000, b"c"]
+    stored = await storage.put_stream("videos/v.mp4", _chunks(parts), "video/mp4")
+
+    content = b"".join(parts)
+    assert stored.key == "videos/v.mp4"
+    assert stored.size == len(content)
+    assert stored.sha256 == hashlib.sha256(content).hexdigest()
+    assert stored.content_type == "video/mp4"
+    assert stored.url.startswith("file://")
+    assert await _read_all(storage, "videos/v.mp4") == content
+
+
+async def test_failed_stream_leaves_nothing(storage):
+    async def broken() -> AsyncIterator[bytes]:
+        yield b"partial"
+        raise RuntimeError("source failed")
+
+    with pytest.raises(RuntimeError):
+        await storage.put_stream("audio/a.mp3", broken(), "audio/mpeg")
+
+    assert os.listdir(os.path.join(storage.root, "audio")) == []
+
+
+async def test_rejects_keys_outside_root(storage):
+    with pytest.raises(ValueError):
+        storage.path_for("../escape.txt")
+
+
+async def test_public_url(storage):
+    storage.public_url = "https://cdn.example.com"
+    assert storage.url_for("images/i.png") == "https://cdn.example.com/images/i.png"
+
+
+async def test_background_upload_streams_to_storage(storage):
+    upload = BackgroundUpload(await storage.open_upload("audio/b.mp3", "audio/mpeg"))
+    for index in range(40):
+        await upload.put(bytes([index]) * 1000)
+    stored = await upload.close()
+
+    assert stored.size == 40_000
+    assert await _read_all(storage, "audio/b.mp3") == b"".join(
+        bytes([index]) * 1000 for index in range(40)
+    )
+
+
+class _FailingUpload:
+    def __init__(self, fail_at: int):
+        self.fail_at = fail_at
+        self.writes = 0
+
+    async def write(self, chunk: bytes):
+        self.writes += 1
+        await asyncio.sleep(0.001)
+        if self.writes == self.fail_at:
+            raise OSError("storage unavailable")
+
+    async def complete(self):
+        raise AssertionError("must not complete")
+
+    async def abort(self):
+        pass
+
+
+async def test_background_upload_surfaces_writer_error_when_queue_full():
+    upload = BackgroundUpload(_FailingUpload(fail_at=2), max_pending=2)
+    with pytest.raises(OSError):
+        async with asyncio.timeout(2):
+            for _ in range(100):
+                await upload.put(b"x")
+    with pytest.raises(OSError):
+        async with asyncio.timeout(2):
+            await upload.close()
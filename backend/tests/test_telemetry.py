@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from app.core import telemetry
+
+
+@pytest.fixture
+def multiproc_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    return tmp_path
+
+
+def touch(directory, *names):
+    for name in names:
+        (directory / name).write_bytes(b"")
+
+
+def test_reset_removes_every_sample_file(multiproc_dir):
+    touch(multiproc_dir, "counter_1.db", "gauge_livesum_1.db", "notes.txt")
+
+    telemetry.reset_multiproc_dir()
+
+    assert sorted(os.listdir(multiproc_dir)) == ["notes.txt"]
+
+
+def test_sweep_drops_live_gauges_of_exited_processes(multiproc_dir):
+    dead = 2**22 + 1  # Above the default pid_max, so never a running process
+    alive = os.getpid()
+    touch(
+        multiproc_dir,
+        f"gauge_livesum_{dead}.db",
+        f"counter_{dead}.db",
+        f"gauge_livesum_{alive}.db",
+    )
+
+    telemetry.sweep_dead_processes()
+
+    # Counters of exited processes keep counting towards the totals
+    assert sorted(os.listdir(multiproc_dir)) == sorted(
+        [f"counter_{dead}.db", f"gauge_livesum_{alive}.db"]
+    )
+
+
+def test_mark_process_dead_defaults_to_this_process(multiproc_dir):
+    touch(multiproc_dir, f"gauge_livesum_{os.getpid()}.db")
+
+    telemetry.mark_process_dead()
+
+    assert os.listdir(multiproc_dir) == []
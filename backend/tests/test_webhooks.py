@@ -0,0 +1,61 @@
+import base64
+import hashlib
+import hmac
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.webhooks import verify_replicate_signature
+
+SECRET = "whsec_" + base64.b64encode(b"replicate-test-key").decode()
+BODY = b'{"id": "prediction-1", "status": "succeeded"}'
+
+
+def signed_headers(secret: str = SECRET, timestamp: int = 0) -> dict:
+    timestamp = timestamp or int(time.time())
+    key = base64.b64decode(secret.split("_", 1)[1])
+    signed = f"msg-1.{timestamp}.".encode() + BODY
+    digest = base64.b64encode(hmac.new(key, signed, hashlib.sha256).digest())
+    return {
+        "webhook-id": "msg-1",
+        "webhook-timestamp": str(timestamp),
+        "webhook-signature": f"v1,{digest.decode()}",
+    }
+
+
+@pytest.fixture(autouse=True)
+def secret(monkeypatch):
+    monkeypatch.setattr(settings, "REPLICATE_WEBHOOK_SECRET", SECRET)
+
+
+def test_valid_signature():
+    verify_replicate_signature(signed_headers(), BODY)
+
+
+def test_rejected_without_configured_secret(monkeypatch):
+    # Signed with the empty key a forger would use
+    headers = signed_headers("whsec_")
+    monkeypatch.setattr(settings, "REPLICATE_WEBHOOK_SECRET", "")
+
+    with pytest.raises(ValueError, match="not configured"):
+        verify_replicate_signature(headers, BODY)
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        signed_headers("whsec_" + base64.b64encode(b"other-key").decode()),
+        signed_headers(timestamp=int(time.time()) - 3600),
+        {"webhook-id": "msg-1"},
+    ],
+    ids=["wrong-key", "stale", "missing-headers"],
+)
+def test_rejected(headers):
+    with pytest.raises(ValueError):
+        verify_replicate_signature(headers, BODY)
+
+
+def test_tampered_body():
+    with pytest.raises(ValueError, match="Invalid webhook signature"):
+        verify_replicate_signature(signed_headers(), BODY + b" ")